@@ -0,0 +1,278 @@
+# analysis/fleet.py
+"""
+Fleet mode: scan many repositories in one batch.
+
+• Targets come from a list of URLs or a manifest file (see ``load_targets``).
+• Repositories are scanned by a bounded pool of workers, with at most
+  ``per_host`` scans against the same Git host at any time.
+• Clone failures (network errors, rate limits…) are retried with
+  exponential backoff; any other failure is recorded and not retried.
+• The CLI also records every scan in the scan history (``analysis.history``).
+• Each repository's outcome is appended to an NDJSON file and synced to
+  disk as soon as its scan ends. That file is also the checkpoint: after a
+  crash the same command resumes and only scans the repositories that have
+  no record yet. The file keeps one header and one summary (of every
+  repository in it) however often it is resumed.
+
+Usage: python -m analysis.fleet MANIFEST OUTPUT [--workers N] [--per-host N] [--retries N]
+                                                [--profile full|manifests]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterable
+from urllib.parse import urlparse
+
+import yaml
+
+from analysis.history import history_store
+from analysis.repo_scan.clone import CLONE_PROFILES
+from analysis.repo_scan.mirror import mirror_pool
+from analysis.runner import run_full_scan
+from analysis.stages import StageError
+from tools.compliance_report import NDJSONReportWriter
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 30.0
+
+
+def load_targets(manifest: Path) -> list[str]:
+    """
+    Repository URLs listed in *manifest*, without duplicates.
+
+    Accepted formats:
+      • plain text, one URL per line (blank lines and ``#`` comments ignored)
+      • a JSON / YAML list of URLs
+      • a JSON / YAML org manifest::
+
+            host: github.com        # optional, defaults to github.com
+            org: acme
+            repos: [api, web, ml/model]   # names, or full URLs
+    """
+    text = Path(manifest).read_text(encoding="utf-8")
+    data: Any
+    if Path(manifest).suffix in (".json", ".yml", ".yaml"):
+        data = yaml.safe_load(text)  # YAML is a superset of JSON
+    else:
+        data = [line.split("#", 1)[0].strip() for line in text.splitlines()]
+
+    if isinstance(data, dict):
+        if "org" not in data or not isinstance(data.get("repos"), list):
+            raise ValueError("Org manifest needs an 'org' and a 'repos' list")
+        base = f"https://{data.get('host', 'github.com')}/{data['org']}"
+        data = [
+            repo if "://" in str(repo) else f"{base}/{str(repo).strip('/')}"
+            for repo in data["repos"]
+        ]
+    if not isinstance(data, list):
+        raise ValueError("Manifest must be a list of repository URLs or an org manifest")
+
+    urls = [str(url) for url in data if url]
+    for url in urls:
+        if urlparse(url).scheme != "https":
+            raise ValueError(f"Repository URL must start with https://: {url}")
+    return list(dict.fromkeys(urls))
+
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, StageError) and exc.stage == "clone"
+
+
+def _open_checkpoint(out: Path) -> tuple[dict[str, str], Any]:
+    """
+    Return the latest status of each repository in *out* and the file opened for appending.
+
+    A record cut short by a crash is truncated away first, and so is the
+    summary of a previous run, which the resumed run replaces.
+    """
+    statuses: dict[str, str] = {}
+    if out.exists():
+        with out.open("r+b") as fh:
+            valid = last = 0
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                last, valid = valid, valid + len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("record") == "repo":
+                    statuses[record["url"]] = record.get("status")
+            fh.seek(last)
+            try:
+                if json.loads(fh.readline()).get("record") == "summary":
+                    valid = last
+            except ValueError:
+                pass
+            fh.truncate(valid)
+    return statuses, out.open("ab")
+
+
+def _scan(scan: Callable[..., dict], url: str, token: str | None,
+          timeouts: dict[str, float] | None) -> dict:
+    context: dict = {}
+    try:
+        context = scan(url, token, timeouts)
+        return context
+    finally:
+        # The batch would otherwise leave one worktree per repository behind
+        # (``run_full_scan`` releases its own unless told to keep it)
+        if context.get("repo_path"):
+            mirror_pool().release(Path(context.pop("repo_path")))
+
+
+def run_fleet(
+    targets: Iterable[str],
+    out: Path,
+    token: str | None = None,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    retries: int = DEFAULT_RETRIES,
+    backoff: float = DEFAULT_BACKOFF,
+    timeouts: dict[str, float] | None = None,
+    retry_failed: bool = False,
+    scan: Callable[..., dict] = run_full_scan,
+    on_record: Callable[[dict], None] | None = None,
+) -> dict[str, int]:
+    """
+    Scan every URL of *targets* and stream one record per repository to *out*.
+
+    Args:
+        targets: Repository URLs
+        out: NDJSON results file; existing records are kept and their
+            repositories skipped (resume)
+        token: GitHub token passed to every scan
+        workers: Maximum scans running at once
+        per_host: Maximum scans running at once against the same host
+        retries: Extra attempts after a failed clone
+        backoff: Delay before the first retry in seconds; doubles on each
+            further attempt (with jitter)
+        timeouts: Stage timeouts, see ``runner.STAGE_TIMEOUTS``
+        retry_failed: On resume, scan again the repositories recorded as failed
+        scan: Scanner called as ``scan(url, token, timeouts)``
+        on_record: Called with each record once it is on disk
+
+    Returns:
+        Counts of ``ok``, ``failed`` and ``skipped`` (already in *out*)
+        repositories of this run; the summary record of *out* counts the
+        latest status of every repository in the file
+    """
+    if workers < 1 or per_host < 1:
+        raise ValueError("workers and per_host must be at least 1")
+    out = Path(out)
+    statuses, fh = _open_checkpoint(out)
+    done = {url for url, status in statuses.items() if status == "ok" or not retry_failed}
+    urls = list(dict.fromkeys(targets))
+    counts = {"ok": 0, "failed": 0, "skipped": sum(url in done for url in urls)}
+
+    # (url, attempt, not before)
+    queue = deque((url, 1, 0.0) for url in urls if url not in done)
+    running: dict[Future, tuple[str, int, float]] = {}
+    busy_hosts: Counter = Counter()
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        with NDJSONReportWriter(fh) as writer:
+            if fh.tell() == 0:
+                writer.header(mode="fleet", repositories=len(urls))
+
+            def record(entry: dict) -> None:
+                statuses[entry["url"]] = entry["status"]
+                writer.write(entry)
+                writer.flush()
+                os.fsync(fh.fileno())
+                if on_record is not None:
+                    on_record(entry)
+
+            while queue or running:
+                now = time.monotonic()
+                # Submit what the worker and host limits allow
+                for item in list(queue):
+                    if len(running) >= workers:
+                        break
+                    url, attempt, not_before = item
+                    if not_before > now or busy_hosts[_host(url)] >= per_host:
+                        continue
+                    queue.remove(item)
+                    busy_hosts[_host(url)] += 1
+                    future = pool.submit(_scan, scan, url, token, timeouts)
+                    running[future] = (url, attempt, time.monotonic())
+
+                waiting = [nb - now for _, _, nb in queue if nb > now]
+                delay = max(min(waiting), 0.01) if waiting else None
+                if not running:
+                    time.sleep(delay or 0.01)
+                    continue
+                finished, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    url, attempt, started = running.pop(future)
+                    busy_hosts[_host(url)] -= 1
+                    elapsed = round(time.monotonic() - started, 3)
+                    exc = future.exception()
+                    if exc is None:
+                        counts["ok"] += 1
+                        record({"record": "repo", "url": url, "status": "ok",
+                                "attempts": attempt, "elapsed": elapsed,
+                                "result": future.result()})
+                    elif _is_retryable(exc) and attempt <= retries:
+                        retry_in = backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+                        queue.append((url, attempt + 1, time.monotonic() + retry_in))
+                    else:
+                        counts["failed"] += 1
+                        record({"record": "repo", "url": url, "status": "failed",
+                                "attempts": attempt, "elapsed": elapsed,
+                                "error": f"{type(exc).__name__}: {exc}"})
+
+            totals = Counter(statuses.values())
+            writer.summary({"ok": totals["ok"], "failed": totals["failed"]})
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        fh.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan many repositories in one batch")
+    parser.add_argument("manifest", type=Path, help="URL list or org manifest (see load_targets)")
+    parser.add_argument("output", type=Path, help="NDJSON results file; resumed if it exists")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF)
+    parser.add_argument("--profile", choices=CLONE_PROFILES, default="full",
+                        help="clone profile; 'manifests' fetches only dependency files")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="scan again the repositories recorded as failed")
+    args = parser.parse_args()
+
+    def progress(entry: dict) -> None:
+        print(f"{entry['status']:>6}  {entry['url']}  ({entry['elapsed']}s)", file=sys.stderr)
+
+    totals = run_fleet(
+        load_targets(args.manifest), args.output,
+        token=os.getenv("GITHUB_TOKEN"),
+        workers=args.workers, per_host=args.per_host,
+        retries=args.retries, backoff=args.backoff,
+        retry_failed=args.retry_failed, on_record=progress,
+        scan=partial(run_full_scan, profile=args.profile, history=history_store()),
+    )
+    print(json.dumps(totals), file=sys.stderr)
+    sys.exit(1 if totals["failed"] else 0)
@@ -0,0 +1,357 @@
+# analysis/history.py
+"""
+Persistent history of scan results.
+
+• One row per scan: repository, commit, kind (full / diff), risk level and
+  Trivy severity counts; one row per compliance rule that fired, with its
+  number of occurrences.
+• Indexed by repository and time, by time alone and by rule, so dashboards
+  (“Critical counts across all repositories this quarter, per week”) are
+  answered by ``trend`` / ``rule_trend`` queries instead of rescanning.
+• SQLite by default (``<cache dir>/history/history.sqlite``); the backend is
+  chosen by URL, so ``COMPLIANCE_HISTORY_URL=postgresql://…`` stores the
+  history in Postgres, e.g. the docker-compose service (needs ``psycopg``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+from urllib.parse import urlparse
+
+from utils.cache_dir import cache_dir
+
+try:
+    import psycopg
+except ImportError:  # optional Postgres backend
+    psycopg = None
+
+SEVERITIES = ("critical", "high", "medium", "low", "unknown")
+
+KINDS = ("full", "diff")
+BUCKETS = {"day": 86400, "week": 7 * 86400}
+# Epoch day 0 was a Thursday: shift weeks to start on Monday
+_BUCKET_OFFSET = {"day": 0, "week": 3 * 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id         {id_column},
+    repo       TEXT    NOT NULL,
+    commit_sha TEXT,
+    kind       TEXT    NOT NULL,
+    scanned_at BIGINT  NOT NULL,
+    risk       TEXT,
+    critical   INTEGER NOT NULL,
+    high       INTEGER NOT NULL,
+    medium     INTEGER NOT NULL,
+    low        INTEGER NOT NULL,
+    unknown    INTEGER NOT NULL,
+    meta       TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_repo_time ON scans (repo, scanned_at);
+CREATE INDEX IF NOT EXISTS scans_time ON scans (scanned_at);
+CREATE TABLE IF NOT EXISTS scan_findings (
+    scan_id  BIGINT  NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+    standard TEXT    NOT NULL,
+    rule     TEXT    NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (scan_id, standard, rule)
+);
+CREATE INDEX IF NOT EXISTS scan_findings_rule ON scan_findings (rule, scan_id);
+"""
+
+
+class SQLiteBackend:
+    """Local history file."""
+
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, path: Path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+
+    def script(self, sql: str) -> None:
+        self.conn.executescript(sql)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> list[tuple]:
+        return self.conn.execute(sql, params).fetchall()
+
+    def insert(self, sql: str, params: Sequence[Any]) -> int:
+        return self.conn.execute(sql, params).lastrowid
+
+    def executemany(self, sql: str, rows: list[Sequence[Any]]) -> None:
+        self.conn.executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self.conn:
+            yield
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class PostgresBackend:
+    """Shared history in a Postgres database."""
+
+    id_column = "BIGSERIAL PRIMARY KEY"
+
+    def __init__(self, url: str):
+        if psycopg is None:
+            raise ImportError("The Postgres history backend needs the 'psycopg' package")
+        self.conn = psycopg.connect(url, autocommit=True)
+
+    @staticmethod
+    def _sql(sql: str) -> str:
+        return sql.replace("?", "%s")
+
+    def script(self, sql: str) -> None:
+        with self.conn.transaction():
+            for statement in filter(str.strip, sql.split(";")):
+                self.conn.execute(statement)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> list[tuple]:
+        return self.conn.execute(self._sql(sql), params).fetchall()
+
+    def insert(self, sql: str, params: Sequence[Any]) -> int:
+        return self.conn.execute(self._sql(sql) + " RETURNING id", params).fetchone()[0]
+
+    def executemany(self, sql: str, rows: list[Sequence[Any]]) -> None:
+        with self.conn.cursor() as cur:
+            cur.executemany(self._sql(sql), rows)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self.conn.transaction():
+            yield
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def connect(url: str | None = None) -> SQLiteBackend | PostgresBackend:
+    """
+    Backend for *url* (default: ``COMPLIANCE_HISTORY_URL``, else the local SQLite file).
+
+    Accepted URLs are ``sqlite:///path/to/file`` and ``postgresql://…``.
+    """
+    url = url or os.getenv("COMPLIANCE_HISTORY_URL")
+    if not url:
+        return SQLiteBackend(cache_dir("history") / "history.sqlite")
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        return SQLiteBackend(Path(url[len("sqlite://"):]))
+    if scheme in ("postgres", "postgresql"):
+        return PostgresBackend(url)
+    raise ValueError(f"Unsupported history backend URL scheme: {scheme!r}")
+
+
+def _window(since: float | None, until: float | None) -> tuple[int, int]:
+    return int(since or 0), int(until if until is not None else time.time() + 1)
+
+
+def _bucketing(bucket: str, kind: str) -> tuple[int, int]:
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    return BUCKETS[bucket], _BUCKET_OFFSET[bucket]
+
+
+class HistoryStore:
+    """
+    Scan results over time, with trend queries.
+
+    Args:
+        backend: A backend from ``connect`` (default: ``connect()``)
+    """
+
+    def __init__(self, backend: SQLiteBackend | PostgresBackend | None = None):
+        self.db = backend or connect()
+        self.db.script(_SCHEMA.format(id_column=self.db.id_column))
+        # Fleet workers and runner stages share the connection
+        self._lock = threading.Lock()
+
+    # ── writing ────────────────────────────────────────────────────────────
+    def record(
+        self,
+        repo: str,
+        commit: str | None = None,
+        kind: str = "full",
+        risk: str | None = None,
+        severities: dict[str, int] | None = None,
+        compliance: dict[str, Any] | None = None,
+        scanned_at: float | None = None,
+        meta: dict[str, Any] | None = None,
+    ) -> int:
+        """
+        Store one scan and return its id.
+
+        Args:
+            repo: Repository URL
+            commit: Commit SHA that was scanned
+            kind: ``full`` or ``diff``
+            risk: Risk level of the scan
+            severities: Vulnerability counts by severity (missing ones count 0)
+            compliance: Compliance summary (``TreeScan.summary``): its
+                ``ai_act`` / ``iso_42001`` issue counts become the rule rows
+            scanned_at: Epoch seconds (default: now)
+            meta: Extra JSON-serialisable details
+        """
+        severities = severities or {}
+        compliance = compliance or {}
+        if risk is None:
+            risk = compliance.get("overall_risk")
+        rules = [
+            (standard, rule, count)
+            for standard in ("ai_act", "iso_42001")
+            for rule, count in (compliance.get(standard) or {}).items()
+        ]
+        with self._lock, self.db.transaction():
+            scan_id = self.db.insert(
+                "INSERT INTO scans (repo, commit_sha, kind, scanned_at, risk, "
+                "critical, high, medium, low, unknown, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (repo, commit, kind, int(scanned_at if scanned_at is not None else time.time()),
+                 risk, *(int(severities.get(s, 0)) for s in SEVERITIES),
+                 json.dumps(meta, default=str) if meta else None),
+            )
+            if rules:
+                self.db.executemany(
+                    "INSERT INTO scan_findings (scan_id, standard, rule, count) VALUES (?, ?, ?, ?)",
+                    [(scan_id, *row) for row in rules],
+                )
+        return scan_id
+
+    def record_full_scan(self, repo: str, context: dict[str, Any]) -> int:
+        """Store the result of ``runner.run_full_scan``."""
+        return self.record(
+            repo, context.get("commit"), "full",
+            risk=context.get("risk"), severities=context.get("severities"),
+            meta={"profile": context.get("profile"), "stages": context.get("stages")},
+        )
+
+    def record_diff_scan(self, repo: str, result: dict[str, Any]) -> int:
+        """Store the result of ``runner.run_diff_scan``."""
+        return self.record(
+            repo, result.get("head"), "diff", compliance=result.get("compliance"),
+            meta={"base": result.get("base"), "scope": result.get("scope")},
+        )
+
+    # ── queries ────────────────────────────────────────────────────────────
+    def _rows(self, sql: str, params: Sequence[Any]) -> list[tuple]:
+        with self._lock:
+            return self.db.query(sql, params)
+
+    def history(self, repo: str, since: float | None = None, until: float | None = None,
+                limit: int = 100) -> list[dict[str, Any]]:
+        """Scans of *repo*, newest first."""
+        rows = self._rows(
+            "SELECT id, commit_sha, kind, scanned_at, risk, critical, high, medium, low, unknown "
+            "FROM scans WHERE repo = ? AND scanned_at >= ? AND scanned_at < ? "
+            "ORDER BY scanned_at DESC LIMIT ?",
+            (repo, *_window(since, until), limit),
+        )
+        return [
+            {"id": r[0], "commit": r[1], "kind": r[2], "scanned_at": r[3], "risk": r[4],
+             **dict(zip(SEVERITIES, r[5:]))}
+            for r in rows
+        ]
+
+    def latest(self, kind: str = "full") -> list[dict[str, Any]]:
+        """The most recent scan of every repository."""
+        rows = self._rows(
+            "SELECT repo, commit_sha, scanned_at, risk, critical, high, medium, low, unknown "
+            "FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY repo ORDER BY scanned_at DESC, id DESC) AS rn "
+            "      FROM scans WHERE kind = ?) AS ranked "
+            "WHERE rn = 1 ORDER BY repo",
+            (kind,),
+        )
+        return [
+            {"repo": r[0], "commit": r[1], "scanned_at": r[2], "risk": r[3],
+             **dict(zip(SEVERITIES, r[4:]))}
+            for r in rows
+        ]
+
+    def trend(
+        self,
+        metric: str = "critical",
+        bucket: str = "week",
+        since: float | None = None,
+        until: float | None = None,
+        repos: Sequence[str] | None = None,
+        kind: str = "full",
+    ) -> list[dict[str, Any]]:
+        """
+        *metric* summed over repositories per time bucket.
+
+        Each repository counts once per bucket, with its last scan of *kind*
+        in that bucket (only full scans record Trivy counts). Returns
+        ``[{"start": epoch, "total": int, "repos": int}]``.
+        """
+        if metric not in SEVERITIES:
+            raise ValueError(f"metric must be one of {', '.join(SEVERITIES)}")
+        width, offset = _bucketing(bucket, kind)
+        repo_filter = f" AND repo IN ({', '.join('?' * len(repos))})" if repos else ""
+        rows = self._rows(
+            f"SELECT b, SUM({metric}), COUNT(*) FROM ("
+            f"  SELECT (scanned_at + ?) / ? AS b, {metric},"
+            f"         ROW_NUMBER() OVER (PARTITION BY repo, (scanned_at + ?) / ?"
+            f"                            ORDER BY scanned_at DESC, id DESC) AS rn"
+            f"  FROM scans WHERE kind = ? AND scanned_at >= ? AND scanned_at < ?{repo_filter}"
+            f") AS ranked WHERE rn = 1 GROUP BY b ORDER BY b",
+            (offset, width, offset, width, kind, *_window(since, until), *(repos or ())),
+        )
+        return [{"start": b * width - offset, "total": int(total), "repos": n} for b, total, n in rows]
+
+    def rule_trend(
+        self,
+        rule: str,
+        bucket: str = "week",
+        since: float | None = None,
+        until: float | None = None,
+        kind: str = "diff",
+    ) -> list[dict[str, Any]]:
+        """
+        Per time bucket, how many repositories had compliance findings for *rule*
+        and how many occurrences there were in total.
+
+        Like ``trend``, each repository counts with its last scan of *kind* in
+        the bucket (only diff scans record compliance findings), so a finding
+        fixed later in the bucket is not counted.
+        """
+        width, offset = _bucketing(bucket, kind)
+        rows = self._rows(
+            "SELECT latest.b, COUNT(DISTINCT latest.id), SUM(f.count) FROM ("
+            "  SELECT id, (scanned_at + ?) / ? AS b,"
+            "         ROW_NUMBER() OVER (PARTITION BY repo, (scanned_at + ?) / ?"
+            "                            ORDER BY scanned_at DESC, id DESC) AS rn"
+            "  FROM scans WHERE kind = ? AND scanned_at >= ? AND scanned_at < ?"
+            ") AS latest JOIN scan_findings f ON f.scan_id = latest.id "
+            "WHERE latest.rn = 1 AND f.rule = ? GROUP BY latest.b ORDER BY latest.b",
+            (offset, width, offset, width, kind, *_window(since, until), rule),
+        )
+        return [{"start": b * width - offset, "repos": n, "occurrences": int(total)}
+                for b, n, total in rows]
+
+    def close(self) -> None:
+        self.db.close()
+
+
+_store: HistoryStore | None = None
+
+
+def history_store() -> HistoryStore:
+    """The process-wide store (see ``connect`` for the backend selection)."""
+    global _store
+    if _store is None:
+        _store = HistoryStore()
+    return _store
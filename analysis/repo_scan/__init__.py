@@ -1,5 +1,6 @@
 # analysis/repo_scan/__init__.py
-from .clone import clone_repo
-from .sbom  import generate_sbom
+from .clone  import clone_repo
+from .mirror import MirrorPool, mirror_pool
+from .sbom   import generate_sbom
 
-__all__ = ["clone_repo", "generate_sbom"]
\ No newline at end of file
+__all__ = ["clone_repo", "generate_sbom", "MirrorPool", "mirror_pool"]
\ No newline at end of file
@@ -1,30 +1,41 @@
 # analysis/repo_scan/clone.py
 from pathlib import Path
-from urllib.parse import urlparse
-import subprocess
-import tempfile
 
+from .mirror import mirror_pool
+from .sbom import MANIFESTS
 
-def clone_repo(url: str, token: str | None = None) -> Path:
+# Files checked out by the "manifests" profile: everything the SBOM and the
+# governance stage read (gitignore syntax, matched at any depth)
+MANIFEST_PATTERNS = (
+    *sorted(MANIFESTS), "requirements*.txt", "*.csproj", "*.deps.json", "governance.yml",
+)
+
+# Sparse-checkout patterns per scan profile (None = whole tree)
+CLONE_PROFILES = {
+    "full": None,
+    "manifests": MANIFEST_PATTERNS,
+}
+
+
+def clone_repo(url: str, token: str | None = None, profile: str = "full",
+               timeout: float | None = None) -> Path:
     """
     Clone a *public* or *private* GitHub repository and return the local path.
 
-    If a GitHub PAT is provided, it’s injected into the HTTPS URL so that
-    `git clone` can authenticate without prompting.
+    If a GitHub PAT is provided, it’s sent with every request to the Git
+    host so that `git fetch` can authenticate without prompting.
+
+    The repository is kept in the shared mirror pool: only the first call
+    downloads it, later calls fetch what changed. The returned directory is
+    a worktree of the mirror; it is removed by ``mirror_pool().release`` or,
+    at the latest, once it is older than the pool's worktree TTL.
+
+    The ``"manifests"`` profile is a partial clone: only dependency
+    manifests and lockfiles are downloaded and checked out. Call
+    ``mirror_pool().hydrate`` before reading any other file.
+
+    Past *timeout* seconds git is killed and the clone raises.
     """
-    parsed = urlparse(url)
-    if parsed.scheme != "https":
-        raise ValueError("Repository URL must start with https://")
-
-    auth_url = (
-        f"https://{token}:x-oauth-basic@{parsed.netloc}{parsed.path}"
-        if token
-        else url
-    )
-
-    dst = Path(tempfile.mkdtemp(prefix="repo_"))
-    subprocess.run(
-        ["git", "clone", "--depth", "1", auth_url, str(dst)],
-        check=True,
-    )
-    return dst
\ No newline at end of file
+    if profile not in CLONE_PROFILES:
+        raise ValueError(f"Unknown clone profile {profile!r}; expected one of {', '.join(CLONE_PROFILES)}")
+    return mirror_pool().checkout(url, token, sparse=CLONE_PROFILES[profile], timeout=timeout)
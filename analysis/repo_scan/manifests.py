@@ -0,0 +1,331 @@
+# analysis/repo_scan/manifests.py
+"""
+Fast-path SBOM: read dependency manifests directly, without Trivy.
+
+• Parses the common manifests and lockfiles of the Python, npm, Go, Rust,
+  Ruby and PHP ecosystems (see ``PARSERS``) into CycloneDX components.
+• A manifest whose lockfile sits in the same directory is skipped: the
+  lockfile has the resolved versions.
+• Runs in milliseconds on a typical repository; large monorepos are parsed
+  by a process pool.
+• Lists dependencies only. Vulnerability matching still needs Trivy
+  (``sbom.generate_sbom``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from urllib.parse import quote
+
+import yaml
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ModuleNotFoundError:  # TOML manifests are skipped
+        tomllib = None
+
+from .sbom import _SKIP_DIRS
+
+# Below this many manifests, parsing in-process is faster than a pool
+PARALLEL_THRESHOLD = 32
+
+TOOL_NAME = "ai-compliance-mvp manifest parser"
+
+# (ecosystem, name, version) — version is None when the manifest only has a range
+Dependency = tuple[str, str, "str | None"]
+
+_REQUIREMENT = re.compile(
+    r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:(===?)\s*([^\s;,#]+))?"
+)
+_YARN_ENTRY = re.compile(r'^"?((?:@[^@/"]+/)?[^@"\s]+)@')
+_YARN_VERSION = re.compile(r'^\s+version:?\s+"?([^"\s]+)"?')
+_GEM_SPEC = re.compile(r"^    (\S+) \(([^)]+)\)$")
+
+
+def _pypi_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _requirement(line: str) -> Dependency | None:
+    match = _REQUIREMENT.match(line)
+    if match is None:
+        return None
+    name, pin, version = match.groups()
+    return "pypi", _pypi_name(name), version if pin else None
+
+
+def _load_toml(path: Path) -> dict[str, Any]:
+    if tomllib is None:
+        return {}
+    with path.open("rb") as fh:
+        return tomllib.load(fh)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Parsers: path → dependencies
+# ──────────────────────────────────────────────────────────────────────────────
+def parse_requirements(path: Path) -> Iterator[Dependency]:
+    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
+        line = line.split(" #", 1)[0].strip()
+        # Options, includes, editable installs and URLs carry no name to report
+        if not line or line.startswith(("#", "-", "git+", "http:", "https:", "file:")):
+            continue
+        dep = _requirement(line)
+        if dep is not None:
+            yield dep
+
+
+def parse_pyproject(path: Path) -> Iterator[Dependency]:
+    data = _load_toml(path)
+    project = data.get("project") or {}
+    specs = list(project.get("dependencies") or [])
+    for extra in (project.get("optional-dependencies") or {}).values():
+        specs.extend(extra)
+    for spec in specs:
+        dep = _requirement(spec)
+        if dep is not None:
+            yield dep
+
+    poetry = (data.get("tool") or {}).get("poetry") or {}
+    groups = [poetry.get("dependencies") or {}, poetry.get("dev-dependencies") or {}]
+    groups += [g.get("dependencies") or {} for g in (poetry.get("group") or {}).values()]
+    for deps in groups:
+        for name in deps:
+            if name.lower() != "python":
+                yield "pypi", _pypi_name(name), None
+
+
+def parse_toml_lock(ecosystem: str) -> Callable[[Path], Iterator[Dependency]]:
+    """poetry.lock, uv.lock and Cargo.lock: ``[[package]]`` tables with name and version."""
+    def parse(path: Path) -> Iterator[Dependency]:
+        for package in _load_toml(path).get("package") or []:
+            name = package.get("name")
+            if name:
+                yield ecosystem, _pypi_name(name) if ecosystem == "pypi" else name, package.get("version")
+    return parse
+
+
+def parse_pipfile_lock(path: Path) -> Iterator[Dependency]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for section in ("default", "develop"):
+        for name, info in (data.get(section) or {}).items():
+            version = (info or {}).get("version", "")
+            yield "pypi", _pypi_name(name), version.lstrip("=") or None
+
+
+def parse_package_lock(path: Path) -> Iterator[Dependency]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    packages = data.get("packages")
+    if packages:  # lockfileVersion 2 and 3
+        for key, info in packages.items():
+            if "node_modules/" in key and not info.get("link"):
+                yield "npm", key.rsplit("node_modules/", 1)[1], info.get("version")
+        return
+
+    def walk(deps: dict[str, Any]) -> Iterator[Dependency]:  # lockfileVersion 1
+        for name, info in deps.items():
+            yield "npm", name, info.get("version")
+            yield from walk(info.get("dependencies") or {})
+    yield from walk(data.get("dependencies") or {})
+
+
+def parse_package_json(path: Path) -> Iterator[Dependency]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for section in ("dependencies", "devDependencies", "optionalDependencies", "peerDependencies"):
+        for name in data.get(section) or {}:
+            yield "npm", name, None
+
+
+def parse_yarn_lock(path: Path) -> Iterator[Dependency]:
+    """Yarn classic (v1) and berry lockfiles."""
+    name = None
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line and not line[0].isspace() and not line.startswith("#"):
+            match = _YARN_ENTRY.match(line)
+            name = (
+                match.group(1)
+                if match and line.rstrip().endswith(":") and "@workspace:" not in line
+                else None
+            )
+        elif name is not None:
+            match = _YARN_VERSION.match(line)
+            if match:
+                yield "npm", name, match.group(1)
+                name = None
+
+
+def parse_pnpm_lock(path: Path) -> Iterator[Dependency]:
+    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    for key in data.get("packages") or {}:
+        # "/name/1.2.3_peer@…" (v5), "/name@1.2.3(peer@…)" (v6) or "name@1.2.3" (v9)
+        key = key.lstrip("/").split("(", 1)[0]
+        name, _, version = key.rpartition("/")
+        version = version.split("_", 1)[0]
+        if name and version[:1].isdigit() and "@" not in version:
+            yield "npm", name, version
+            continue
+        at = key.rfind("@")
+        if at > 0:
+            yield "npm", key[:at], key[at + 1:]
+
+
+def parse_go_mod(path: Path) -> Iterator[Dependency]:
+    block = False
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("//", 1)[0].strip()
+        if line.startswith("require ("):
+            block = True
+            continue
+        if block and line == ")":
+            block = False
+            continue
+        if line.startswith("require "):
+            line = line[len("require "):]
+        elif not block:
+            continue
+        parts = line.split()
+        if len(parts) >= 2:
+            yield "golang", parts[0], parts[1]
+
+
+def parse_gemfile_lock(path: Path) -> Iterator[Dependency]:
+    for line in path.read_text(encoding="utf-8").splitlines():
+        match = _GEM_SPEC.match(line)
+        if match:
+            yield "gem", match.group(1), match.group(2)
+
+
+def parse_composer_lock(path: Path) -> Iterator[Dependency]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for section in ("packages", "packages-dev"):
+        for package in data.get(section) or []:
+            yield "composer", package["name"], str(package.get("version", "")).lstrip("v") or None
+
+
+PARSERS: dict[str, Callable[[Path], Iterator[Dependency]]] = {
+    "requirements.txt": parse_requirements,
+    "pyproject.toml": parse_pyproject,
+    "poetry.lock": parse_toml_lock("pypi"),
+    "uv.lock": parse_toml_lock("pypi"),
+    "Pipfile.lock": parse_pipfile_lock,
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "package.json": parse_package_json,
+    "yarn.lock": parse_yarn_lock,
+    "pnpm-lock.yaml": parse_pnpm_lock,
+    "go.mod": parse_go_mod,
+    "Cargo.lock": parse_toml_lock("cargo"),
+    "Gemfile.lock": parse_gemfile_lock,
+    "composer.lock": parse_composer_lock,
+}
+
+# Manifests skipped when one of these lockfiles is in the same directory
+_LOCKED_BY = {
+    "pyproject.toml": {"poetry.lock", "uv.lock", "Pipfile.lock"},
+    "package.json": {"package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml"},
+}
+
+
+def _parser_for(name: str) -> Callable[[Path], Iterator[Dependency]] | None:
+    if name.startswith("requirements") and name.endswith(".txt"):
+        return parse_requirements
+    return PARSERS.get(name)
+
+
+def find_manifests(repo_dir: Path) -> list[Path]:
+    """Parsable manifests below *repo_dir* (vendored and virtualenv dirs excluded)."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(repo_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+        names = set(filenames)
+        for name in sorted(names):
+            if _parser_for(name) is not None and not (_LOCKED_BY.get(name, set()) & names):
+                found.append(Path(dirpath, name))
+    return found
+
+
+def _parse(path: Path) -> tuple[Path, list[Dependency], str | None]:
+    """Parse one manifest; errors are returned, not raised, so one bad file does not stop a scan."""
+    try:
+        return path, list(_parser_for(path.name)(path)), None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError, yaml.YAMLError) as exc:
+        return path, [], f"{type(exc).__name__}: {exc}"
+
+
+def _purl(ecosystem: str, name: str, version: str | None) -> str:
+    namespace, _, base = name.rpartition("/")
+    path = f"{quote(namespace, safe='/')}/{quote(base)}" if namespace else quote(base)
+    return f"pkg:{ecosystem}/{path}" + (f"@{quote(version, safe='')}" if version else "")
+
+
+def build_sbom(repo_dir: Path, jobs: int | None = None) -> dict[str, Any]:
+    """
+    CycloneDX document of the dependencies declared below *repo_dir*.
+
+    Components are deduplicated by package URL; each lists the manifests it
+    was found in. Manifests that could not be parsed are listed under
+    ``metadata.properties``.
+    """
+    repo_dir = Path(repo_dir)
+    if not repo_dir.is_dir():
+        raise ValueError("repo_dir must be an existing directory")
+
+    manifests = find_manifests(repo_dir)
+    if len(manifests) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parsed = list(pool.map(_parse, manifests, chunksize=8))
+    else:
+        parsed = [_parse(path) for path in manifests]
+
+    components: dict[str, dict[str, Any]] = {}
+    errors = []
+    for path, deps, error in parsed:
+        source = path.relative_to(repo_dir).as_posix()
+        if error is not None:
+            errors.append({"name": "manifest-error", "value": f"{source}: {error}"})
+        for ecosystem, name, version in deps:
+            purl = _purl(ecosystem, name, version)
+            component = components.get(purl)
+            if component is None:
+                component = components[purl] = {
+                    "type": "library",
+                    "bom-ref": purl,
+                    "name": name,
+                    **({"version": version} if version else {}),
+                    "purl": purl,
+                    "properties": [],
+                }
+            if len(component["properties"]) < 20:
+                entry = {"name": "source", "value": source}
+                if entry not in component["properties"]:
+                    component["properties"].append(entry)
+
+    return {
+        "bomFormat": "CycloneDX",
+        "specVersion": "1.5",
+        "version": 1,
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "tools": [{"name": TOOL_NAME}],
+            "properties": [{"name": "manifests", "value": str(len(manifests))}, *errors],
+        },
+        "components": sorted(components.values(), key=lambda c: c["purl"]),
+    }
+
+
+def write_fast_sbom(repo_dir: Path, output: Path | None = None, jobs: int | None = None) -> Path:
+    """``build_sbom`` written to *output*, or to a temporary directory by default."""
+    sbom = build_sbom(repo_dir, jobs)
+    sbom_json = output or Path(tempfile.mkdtemp()) / "sbom.json"
+    sbom_json.write_text(json.dumps(sbom, indent=2), encoding="utf-8")
+    return sbom_json
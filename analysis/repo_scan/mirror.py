@@ -0,0 +1,405 @@
+# analysis/repo_scan/mirror.py
+"""
+Persistent pool of bare repository mirrors.
+
+Each repository URL gets one bare mirror below the shared cache directory.
+The first scan clones it; later scans only ``git fetch`` what changed and
+check the requested commit out into a throw-away ``git worktree``.
+
+• Every worktree has a lease file, locked by the process using it until
+  the worktree is released. A worktree is only pruned once its lease is no
+  longer held (e.g. its process died) and older than ``worktree_ttl``, so
+  long scans in other processes keep theirs. Where file locks are not
+  available, ``touch`` renews a lease.
+• Fetches leave one small pack per fetch behind; once a mirror holds more
+  than ``_GC_PACK_LIMIT`` packs, ``git gc`` repacks it under the mirror lock.
+• Mirrors are evicted least recently used first whenever the pool exceeds
+  its disk quota (``COMPLIANCE_MIRROR_QUOTA_MB``, default 10 GB).
+• Access tokens are only passed on the command line of each git call that
+  may reach the remote (as an HTTP header) and are never written to the
+  mirror's configuration.
+• ``partial=True`` fetches commits and trees only (``--filter=blob:none``)
+  and ``sparse`` worktrees check out just the matching files. Blobs of
+  other files are downloaded on demand by ``hydrate``. Once fetched
+  partially, a mirror stays a partial clone: full checkouts then download
+  the blobs they need in one batch.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import secrets
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+from urllib.parse import urlparse
+
+from utils.cache_dir import cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: mirrors are not locked
+    fcntl = None
+
+DEFAULT_QUOTA_BYTES = int(os.getenv("COMPLIANCE_MIRROR_QUOTA_MB", "10240")) * 1024 * 1024
+DEFAULT_WORKTREE_TTL = 3600.0
+
+# Minimum seconds between two disk-usage checks of the same pool
+_PRUNE_INTERVAL = 60.0
+
+# Packs a mirror may accumulate before it is repacked
+_GC_PACK_LIMIT = 20
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """Seconds left until *deadline* (a ``time.monotonic`` value); raise once it passed."""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("Mirror operation timed out")
+    return left
+
+
+def _git(repo_dir: Path | None, *args: str, deadline: float | None = None) -> bytes:
+    """
+    Run git and return its output.
+
+    Past *deadline*, git and every process it started (remote helpers,
+    index-pack…) are killed, so nothing keeps running under a mirror lock
+    after the caller gave up.
+    """
+    cmd = ["git", *args] if repo_dir is None else ["git", "-C", str(repo_dir), *args]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          start_new_session=True) as proc:
+        try:
+            out, err = proc.communicate(timeout=_remaining(deadline))
+        except subprocess.TimeoutExpired:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            proc.communicate()
+            raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, out, err)
+    return out
+
+
+def _auth_args(url: str, token: str | None) -> list[str]:
+    """Git options authenticating requests to *url*'s host with *token*."""
+    parsed = urlparse(url)
+    if parsed.scheme != "https":
+        raise ValueError("Repository URL must start with https://")
+    if not token:
+        return []
+    basic = base64.b64encode(f"{token}:x-oauth-basic".encode()).decode()
+    # Also inherited by the fetches git starts itself for missing blobs
+    return ["-c", f"http.https://{parsed.netloc}/.extraHeader=Authorization: Basic {basic}"]
+
+
+def _disk_usage(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            total += getattr(st, "st_blocks", 0) * 512 or st.st_size
+    return total
+
+
+@contextmanager
+def _locked(lock_path: Path, blocking: bool = True,
+            deadline: float | None = None) -> Iterator[bool]:
+    """
+    Hold an exclusive lock on *lock_path*; yields False if non-blocking and busy.
+
+    A blocking wait raises ``TimeoutError`` once *deadline* has passed.
+    """
+    with open(lock_path, "a") as fh:
+        if fcntl is not None:
+            try:
+                if blocking and deadline is not None:
+                    while True:
+                        try:
+                            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            time.sleep(min(0.1, _remaining(deadline)))
+                else:
+                    fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class MirrorPool:
+    """
+    Bare mirrors plus short-lived worktrees, bounded by a disk quota.
+
+    Args:
+        root: Pool directory (defaults to ``<cache dir>/mirrors``)
+        quota_bytes: Disk budget for mirrors and worktrees together
+        depth: History depth fetched into the mirrors (``None`` for full history)
+        worktree_ttl: Seconds after which a worktree that was never released is removed
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        quota_bytes: int = DEFAULT_QUOTA_BYTES,
+        depth: int | None = 1,
+        worktree_ttl: float = DEFAULT_WORKTREE_TTL,
+    ):
+        self.root = Path(root) if root else cache_dir("mirrors")
+        self.quota_bytes = quota_bytes
+        self.depth = depth
+        self.worktree_ttl = worktree_ttl
+        self._repos = self.root / "repos"
+        self._worktrees = self.root / "worktrees"
+        self._leases = self.root / "leases"
+        for directory in (self._repos, self._worktrees, self._leases):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._last_prune = float("-inf")
+        # Open (and locked) lease files of this process's worktrees
+        self._held: dict[str, IO[str]] = {}
+        self._held_lock = threading.Lock()
+
+    # ── mirrors ────────────────────────────────────────────────────────────
+    @staticmethod
+    def key(url: str) -> str:
+        """Stable directory name of the mirror of *url*."""
+        parsed = urlparse(url)
+        path = parsed.path.rstrip("/").removesuffix(".git")
+        return hashlib.sha256(f"{parsed.netloc.lower()}{path}".encode()).hexdigest()[:24]
+
+    def fetch(self, url: str, token: str | None = None, *refs: str,
+              partial: bool = False, timeout: float | None = None) -> list[str]:
+        """
+        Bring the mirror of *url* up to date with *refs* and return their commit SHAs.
+
+        Refs are branches, tags or SHAs; with none given the remote ``HEAD`` is
+        fetched. The mirror is created on first use. With *partial*, file
+        contents are left out of the fetch. Past *timeout* seconds (waiting
+        for the mirror lock included) git is killed and ``TimeoutError`` or
+        ``subprocess.TimeoutExpired`` is raised.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        refs = refs or ("HEAD",)
+        if time.monotonic() - self._last_prune > _PRUNE_INTERVAL:
+            self.prune()
+        key = self.key(url)
+        mirror = self._repos / f"{key}.git"
+        with _locked(self._repos / f"{key}.lock", deadline=deadline):
+            if not (mirror / "HEAD").exists():
+                shutil.rmtree(mirror, ignore_errors=True)
+                _git(None, "init", "--quiet", "--bare", str(mirror))
+                _git(mirror, "remote", "add", "origin", url)
+                # Fetched commits are only referenced by FETCH_HEAD and worktrees
+                _git(mirror, "config", "gc.auto", "0")
+
+            options = ["--depth", str(self.depth)] if self.depth else []
+            if partial:
+                # Makes origin a promisor remote that missing blobs are fetched from
+                _git(mirror, "config", "remote.origin.promisor", "true")
+                _git(mirror, "config", "remote.origin.partialclonefilter", "blob:none")
+                _git(mirror, "config", "extensions.partialClone", "origin")
+                options.append("--filter=blob:none")
+            # Keep every fetch as one pack (not loose objects) so _GC_PACK_LIMIT sees it
+            _git(mirror, *_auth_args(url, token), "-c", "fetch.unpackLimit=1",
+                 "fetch", "--quiet", *options, "origin", *refs, deadline=deadline)
+            fetched = (mirror / "FETCH_HEAD").read_text().splitlines()
+            if len(list((mirror / "objects" / "pack").glob("*.pack"))) > _GC_PACK_LIMIT:
+                self._gc(mirror, [line.split("\t", 1)[0] for line in fetched], deadline)
+            os.utime(self._repos / f"{key}.lock")
+        return [line.split("\t", 1)[0] for line in fetched]
+
+    def _gc(self, mirror: Path, shas: list[str], deadline: float | None = None) -> None:
+        """Repack *mirror* around the commits just fetched (caller holds its lock)."""
+        # gc keeps what refs and worktrees reach: pin the latest fetch, replacing
+        # the previous one. Commits other scans fetched are only referenced by
+        # FETCH_HEAD until their worktree exists: unreachable objects are kept
+        # for a worktree TTL.
+        pinned = {f"refs/fetched/{i}": sha for i, sha in enumerate(shas)}
+        previous = _git(mirror, "for-each-ref", "--format=%(refname)", "refs/fetched/").split()
+        commands = [f"update {ref} {sha}" for ref, sha in pinned.items()]
+        commands += [f"delete {ref}" for ref in map(bytes.decode, previous) if ref not in pinned]
+        subprocess.run(["git", "-C", str(mirror), "update-ref", "--stdin"],
+                       input="\n".join(commands) + "\n", text=True, check=True, capture_output=True)
+        _git(mirror, "gc", "--quiet", f"--prune={int(self.worktree_ttl)}.seconds.ago",
+             deadline=deadline)
+
+    # ── worktrees ──────────────────────────────────────────────────────────
+    def add_worktree(self, url: str, sha: str, token: str | None = None,
+                     sparse: Iterable[str] | None = None, timeout: float | None = None) -> Path:
+        """
+        Check *sha* (already fetched) out into a new worktree of the mirror of *url*.
+
+        With *sparse*, only files matching those gitignore-style patterns are
+        checked out. *timeout* works as for ``fetch``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        key = self.key(url)
+        mirror = self._repos / f"{key}.git"
+        path = self._worktrees / f"{key}-{secrets.token_hex(4)}"
+        auth = _auth_args(url, token)
+        self._take_lease(path.name)
+        try:
+            with _locked(self._repos / f"{key}.lock", deadline=deadline):
+                if sparse is None:
+                    _git(mirror, *auth, "worktree", "add", "--quiet", "--detach", str(path), sha,
+                         deadline=deadline)
+                else:
+                    _git(mirror, "worktree", "add", "--quiet", "--no-checkout", "--detach",
+                         str(path), sha, deadline=deadline)
+                    _git(path, "sparse-checkout", "set", "--no-cone", *sparse, deadline=deadline)
+                    _git(path, *auth, "reset", "--quiet", "--hard", deadline=deadline)
+        except BaseException:
+            self.release(path)
+            raise
+        return path
+
+    def _take_lease(self, name: str) -> None:
+        fh = open(self._leases / name, "a")
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        with self._held_lock:
+            self._held[name] = fh
+
+    def touch(self, path: Path) -> None:
+        """Renew the lease of a worktree that is still in use."""
+        os.utime(self._leases / Path(path).name)
+
+    def _lease_expired(self, path: Path, now: float) -> bool:
+        lease = self._leases / path.name
+        if not lease.exists():  # created before leases existed
+            return now - path.stat().st_mtime > self.worktree_ttl
+        with _locked(lease, blocking=False) as acquired:
+            # A held lease belongs to a live process, however old it is
+            return acquired and now - lease.stat().st_mtime > self.worktree_ttl
+
+    def hydrate(self, path: Path, url: str, token: str | None = None,
+                patterns: Iterable[str] | None = None) -> None:
+        """
+        Extend a sparse worktree to *patterns*, or to the whole tree if None.
+
+        The missing blobs are fetched in one batch.
+        """
+        path = Path(path)
+        key = path.name.rsplit("-", 1)[0]
+        auth = _auth_args(url, token)
+        with _locked(self._repos / f"{key}.lock"):
+            if patterns is None:
+                _git(path, *auth, "sparse-checkout", "disable")
+            else:
+                _git(path, *auth, "sparse-checkout", "add", *patterns)
+
+    def checkout(self, url: str, token: str | None = None, ref: str = "HEAD",
+                 sparse: Iterable[str] | None = None, timeout: float | None = None) -> Path:
+        """
+        Fetch *ref* of *url* and return a fresh worktree of it; call ``release`` when done.
+
+        A *sparse* checkout is fetched without blobs (see ``hydrate``).
+        *timeout* bounds the fetch and the checkout together.
+        """
+        started = time.monotonic()
+        (sha,) = self.fetch(url, token, ref, partial=sparse is not None, timeout=timeout)
+        if timeout is not None:
+            timeout = max(timeout - (time.monotonic() - started), 0.001)
+        return self.add_worktree(url, sha, token, sparse, timeout=timeout)
+
+    @contextmanager
+    def worktree(self, url: str, token: str | None = None, ref: str = "HEAD",
+                 sparse: Iterable[str] | None = None) -> Iterator[Path]:
+        """``checkout`` as a context manager that releases the worktree on exit."""
+        path = self.checkout(url, token, ref, sparse)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def release(self, path: Path) -> None:
+        """Remove a worktree created by this pool, and its lease."""
+        path = Path(path)
+        key = path.name.rsplit("-", 1)[0]
+        mirror = self._repos / f"{key}.git"
+        if mirror.is_dir():
+            with _locked(self._repos / f"{key}.lock"):
+                try:
+                    _git(mirror, "worktree", "remove", "--force", str(path))
+                except subprocess.CalledProcessError:
+                    shutil.rmtree(path, ignore_errors=True)
+                    _git(mirror, "worktree", "prune")
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+        (self._leases / path.name).unlink(missing_ok=True)
+        with self._held_lock:
+            fh = self._held.pop(path.name, None)
+        if fh is not None:
+            fh.close()
+
+    # ── housekeeping ───────────────────────────────────────────────────────
+    def prune(self) -> None:
+        """Remove expired worktrees, then evict least recently used mirrors over the quota."""
+        self._last_prune = time.monotonic()
+        now = time.time()
+        active = set()
+        for path in self._worktrees.iterdir():
+            try:
+                expired = self._lease_expired(path, now)
+            except FileNotFoundError:  # released meanwhile
+                continue
+            if expired:
+                self.release(path)
+            else:
+                active.add(path.name.rsplit("-", 1)[0])
+        for lease in self._leases.iterdir():
+            # Leases of worktrees that failed to be created or were removed by hand
+            if not (self._worktrees / lease.name).exists():
+                with _locked(lease, blocking=False) as acquired:
+                    if acquired and now - lease.stat().st_mtime > self.worktree_ttl:
+                        lease.unlink(missing_ok=True)
+
+        usage = _disk_usage(self.root)
+        if usage <= self.quota_bytes:
+            return
+
+        locks = sorted(self._repos.glob("*.lock"), key=lambda p: p.stat().st_mtime)
+        for lock in locks:
+            key = lock.stem
+            mirror = self._repos / f"{key}.git"
+            if key in active or not mirror.is_dir():
+                continue
+            with _locked(lock, blocking=False) as acquired:
+                if not acquired:  # being fetched right now
+                    continue
+                size = _disk_usage(mirror)
+                shutil.rmtree(mirror, ignore_errors=True)
+            usage -= size
+            if usage <= self.quota_bytes:
+                break
+
+
+_pool: MirrorPool | None = None
+
+
+def mirror_pool() -> MirrorPool:
+    """The process-wide pool in the shared cache directory."""
+    global _pool
+    if _pool is None:
+        _pool = MirrorPool()
+    return _pool
@@ -0,0 +1,49 @@
+# analysis/repo_scan/revisions.py
+"""
+Git helpers for comparing two commits of a checkout.
+
+The commits only need their trees fetched (e.g. ``MirrorPool.fetch``), which
+is all ``git diff`` and ``git ls-tree`` read.
+"""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+
+def _git(repo_dir: Path, *args: str) -> bytes:
+    return subprocess.run(
+        ["git", "-C", str(repo_dir), *args], check=True, capture_output=True
+    ).stdout
+
+
+def rev_parse(repo_dir: Path, ref: str) -> str:
+    """Resolve a ref (branch, tag, ``HEAD``, abbreviated SHA) to a commit SHA."""
+    return _git(repo_dir, "rev-parse", "--verify", f"{ref}^{{commit}}").decode().strip()
+
+
+def changed_files(repo_dir: Path, base: str, head: str) -> list[str]:
+    """Paths added or modified between two commits (deletions are dropped)."""
+    out = _git(
+        repo_dir, "diff", "--name-only", "--no-renames", "--diff-filter=d", "-z", base, head
+    )
+    return [p.decode("utf-8", "surrogateescape") for p in out.split(b"\0") if p]
+
+
+def tree_blobs(repo_dir: Path, sha: str) -> dict[str, str]:
+    """
+    Map every regular file of a commit to its blob id.
+
+    Blob ids are content hashes, so they double as keys of the findings
+    cache without reading the files. Symlinks and submodules are skipped.
+    """
+    blobs = {}
+    for entry in _git(repo_dir, "ls-tree", "-r", "-z", "--full-tree", sha).split(b"\0"):
+        if not entry:
+            continue
+        meta, path = entry.split(b"\t", 1)
+        mode, kind, blob = meta.split(b" ")
+        if kind == b"blob" and mode in (b"100644", b"100755"):
+            blobs[path.decode("utf-8", "surrogateescape")] = blob.decode()
+    return blobs
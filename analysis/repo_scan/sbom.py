@@ -3,63 +3,353 @@
 Generate a CycloneDX SBOM and a minimal Trivy numeric summary.
 
 • Uses Trivy CLI (https://aquasecurity.github.io/trivy).
+• Walks the repository once: ``trivy fs`` writes the CycloneDX SBOM, then
+  ``trivy sbom`` scans that SBOM for vulnerabilities without touching the
+  repository again.
+• Trivy runs against a warm, shared vulnerability DB where possible
+  (see ``trivy_server``).
+• With a ``VulnIndex``, vulnerabilities are taken from the shared
+  per-component index, and only components it does not know are scanned.
+• Results can be cached (``SbomCache``) by commit SHA, or by the hash of
+  the dependency manifests when the tree is not a clean git checkout; a
+  sparse checkout is also keyed by its patterns. A cached SBOM is reused
+  as long as the Trivy version is unchanged, and its counts until the
+  vulnerability DB is updated.
 • Returns a mapping:
     {
         "sbom_path": Path,
-        "trivy": {"critical": int, "high": int}
+        "trivy": {"critical": int, "high": int},
+        "severities": {"critical": int, "high": int, "medium": int, "low": int, "unknown": int},
+        "cached": bool
     }
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import sqlite3
 import subprocess
 import tempfile
+import threading
+import time
 from pathlib import Path
 from typing import TypedDict
 
+from utils.cache_dir import cache_dir
+from .trivy_report import parse_trivy_report
+from .trivy_server import server_db_version, trivy_backend
+from .vuln_index import VulnIndex, sbom_purls
+
+SEVERITIES = ("critical", "high", "medium", "low", "unknown")
+
+# Files that determine the dependency set Trivy reports
+MANIFESTS = {
+    "requirements.txt", "requirements-dev.txt", "constraints.txt", "setup.py", "setup.cfg",
+    "pyproject.toml", "poetry.lock", "Pipfile", "Pipfile.lock", "uv.lock", "environment.yml",
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "go.mod", "go.sum", "Cargo.toml", "Cargo.lock", "Gemfile", "Gemfile.lock",
+    "composer.json", "composer.lock", "pom.xml", "build.gradle", "build.gradle.kts",
+    "gradle.lockfile", "packages.lock.json", "packages.config", "mix.lock", "pubspec.lock",
+    "Podfile.lock", "Package.resolved", "conan.lock",
+}
+_MANIFEST_SUFFIXES = (".csproj", ".deps.json")
+_SKIP_DIRS = {".git", "node_modules", ".venv", "venv", "__pycache__"}
+
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024
+
+
 class TrivyCounts(TypedDict):
     critical: int
     high: int
 
 
-def _run(cmd: list[str]) -> None:
+def _run(cmd: list[str], timeout: float | None = None) -> None:
     """Run a shell command, raise if it fails, stream output to the terminal."""
-    subprocess.run(cmd, check=True)
+    subprocess.run(cmd, check=True, timeout=timeout)
+
 
+def _severity_counts(report_json: Path) -> dict[str, int]:
+    """Count the vulnerabilities of a Trivy JSON report by severity (streamed)."""
+    stats = parse_trivy_report(report_json, top_n=0)
+    return {severity: stats.severities[severity] for severity in SEVERITIES}
 
-def generate_sbom(repo_dir: Path) -> dict[str, str | TrivyCounts]:
+
+def write_sbom(repo_dir: Path, timeout: float | None = None, output: Path | None = None) -> Path:
+    """
+    Standard CycloneDX SBOM of *repo_dir* (one filesystem walk).
+
+    Written to *output*, or to a temporary directory by default.
+    """
     if not repo_dir.is_dir():
         raise ValueError("repo_dir must be an existing directory")
 
-    tmp = Path(tempfile.mkdtemp())
-    sbom_json = tmp / "sbom.json"
-
-    # 1. Standard CycloneDX SBOM
+    sbom_json = output or Path(tempfile.mkdtemp()) / "sbom.json"
     _run(
-        ["trivy", "sbom", "--format", "cyclonedx", "--output", str(sbom_json), str(repo_dir)]
+        ["trivy", "fs", "--quiet", *trivy_backend().scan_args(), "--format", "cyclonedx",
+         "--output", str(sbom_json), str(repo_dir)],
+        timeout,
     )
+    return sbom_json
 
-    # 2. Trivy “summary” report → count high / critical vulns
-    summary_json = tmp / "trivy-summary.json"
+
+def scan_sbom(sbom_path: Path, timeout: float | None = None) -> dict[str, int]:
+    """Scan a CycloneDX SBOM for vulnerabilities; return the per-severity breakdown."""
+    report_json = Path(sbom_path).with_suffix(".vulns.json")
     _run(
-        ["trivy", "fs", "--quiet", "--severity", "CRITICAL,HIGH",
-         "--format", "json", "--output", str(summary_json), str(repo_dir)]
+        ["trivy", "sbom", "--quiet", *trivy_backend().scan_args(), "--format", "json",
+         "--output", str(report_json), str(sbom_path)],
+        timeout,
     )
+    return _severity_counts(report_json)
+
+
+def trivy_counts(severities: dict[str, int]) -> TrivyCounts:
+    return TrivyCounts(critical=severities["critical"], high=severities["high"])
 
-    with summary_json.open("r", encoding="utf-8") as fh:
-        j = json.load(fh)
 
-    high = critical = 0
-    for result in j.get("Results", []):
-        for vuln in result.get("Vulnerabilities", []):
-            sev = vuln.get("Severity")
-            if sev == "HIGH":
-                high += 1
-            elif sev == "CRITICAL":
-                critical += 1
+# ──────────────────────────────────────────────────────────────────────────────
+# Result cache
+# ──────────────────────────────────────────────────────────────────────────────
+def trivy_versions(timeout: float | None = 60) -> tuple[str, str | None]:
+    """
+    Return ``(trivy version, vulnerability DB timestamp)``; the DB part is None if unknown.
+
+    The DB is the one scans use: a remote Trivy server is asked for its own
+    (see ``server_db_version``), and the DB stays unknown if it cannot say.
+    """
+    backend = trivy_backend()
+    out = subprocess.run(
+        ["trivy", "version", *backend.version_args(), "--format", "json"],
+        check=True, capture_output=True, timeout=timeout,
+    ).stdout
+    info = json.loads(out)
+    db_version = (info.get("VulnerabilityDB") or {}).get("UpdatedAt")
+    if backend.mode == "server" and backend.db_dir is None:
+        db_version = server_db_version(backend.server, min(timeout or 5.0, 5.0))
+    return info.get("Version", "unknown"), db_version
+
+
+def manifest_digest(repo_dir: Path) -> str:
+    """Hash of every dependency manifest and lockfile below *repo_dir*."""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(repo_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+        for name in sorted(filenames):
+            if (name in MANIFESTS or name.endswith(_MANIFEST_SUFFIXES)
+                    or name.startswith("requirements") and name.endswith(".txt")):
+                path = Path(dirpath, name)
+                digest.update(path.relative_to(repo_dir).as_posix().encode() + b"\0")
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def _sparse_patterns(repo_dir: Path) -> list[str] | None:
+    """Sorted patterns of a sparse checkout, None for a full one."""
+    try:
+        sparse = subprocess.run(
+            ["git", "-C", str(repo_dir), "config", "--bool", "core.sparseCheckout"],
+            capture_output=True, text=True,
+        ).stdout.strip()
+        if sparse != "true":
+            return None
+        patterns = subprocess.run(
+            ["git", "-C", str(repo_dir), "sparse-checkout", "list"],
+            check=True, capture_output=True, text=True,
+        ).stdout.splitlines()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return sorted(patterns)
+
+
+def source_key(repo_dir: Path) -> str:
+    """
+    Commit SHA of a clean git checkout, else the manifest digest.
+
+    A sparse checkout (e.g. the ``manifests`` clone profile) yields another
+    SBOM than the full tree of the same commit, so its patterns are part of
+    the key.
+    """
+    try:
+        sha = subprocess.run(
+            ["git", "-C", str(repo_dir), "rev-parse", "--verify", "HEAD^{commit}"],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "-C", str(repo_dir), "status", "--porcelain"],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        sha, dirty = "", True
+    key = f"commit:{sha}" if sha and not dirty else f"manifests:{manifest_digest(repo_dir)}"
+    sparse = _sparse_patterns(repo_dir)
+    if sparse is not None:
+        key += ":sparse:" + hashlib.sha256("\n".join(sparse).encode()).hexdigest()
+    return key
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sbom_results (
+    digest     TEXT PRIMARY KEY,
+    source     TEXT NOT NULL,
+    trivy      TEXT NOT NULL,
+    db_version TEXT,
+    severities TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sbom_results_last_used ON sbom_results (last_used);
+"""
+
+
+class SbomCache:
+    """
+    SBOM files and their vulnerability counts, with a size cap and LRU eviction.
+
+    Entries are keyed by ``source_key`` and the Trivy version; counts are
+    only reused while the vulnerability DB timestamp is the same.
+    """
+
+    def __init__(self, path: Path | None = None, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.dir = Path(path) if path else cache_dir("sbom")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(self.dir / "index.sqlite", timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        # Runner stages share the connection across threads
+        self._lock = threading.Lock()
+
+    def sbom_path(self, digest: str) -> Path:
+        return self.dir / f"{digest}.json"
+
+    def get(self, digest: str) -> tuple[str | None, dict[str, int]] | None:
+        """Return ``(db_version, severities)`` of a cached SBOM, or None on a miss."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT db_version, severities FROM sbom_results WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is None or not self.sbom_path(digest).exists():
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE sbom_results SET last_used = ? WHERE digest = ?", (time.time(), digest)
+                )
+        return row[0], json.loads(row[1])
+
+    def put(self, digest: str, source: str, trivy: str, db_version: str | None,
+            severities: dict[str, int]) -> None:
+        files = (self.sbom_path(digest), self.sbom_path(digest).with_suffix(".vulns.json"))
+        size = sum(f.stat().st_size for f in files if f.exists())
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sbom_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, source, trivy, db_version, json.dumps(severities), size, time.time()),
+            )
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries (and their files) down to 90% of the cap."""
+        with self._lock:
+            total = self.conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM sbom_results"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * 0.9)
+            stale = []
+            for digest, size in self.conn.execute(
+                "SELECT digest, size FROM sbom_results ORDER BY last_used"
+            ).fetchall():
+                if total <= target:
+                    break
+                stale.append((digest,))
+                total -= size
+                for path in (self.sbom_path(digest), self.sbom_path(digest).with_suffix(".vulns.json")):
+                    path.unlink(missing_ok=True)
+            with self.conn:
+                self.conn.executemany("DELETE FROM sbom_results WHERE digest = ?", stale)
+
+
+_cache: SbomCache | None = None
+
+
+def sbom_cache() -> SbomCache:
+    """The process-wide cache in the shared cache directory."""
+    global _cache
+    if _cache is None:
+        _cache = SbomCache()
+    return _cache
+
+
+def _sbom_severities(sbom_json: Path, db_version: str | None, index: VulnIndex | None,
+                     timeout: float | None) -> dict[str, int]:
+    if index is not None and db_version is not None:
+        return index.severities(sbom_purls(sbom_json), db_version, timeout)
+    return scan_sbom(sbom_json, timeout)
+
+
+def _left(deadline: float | None) -> float | None:
+    """Seconds until *deadline*; a passed deadline still lets a call time out."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.001)
+
+
+def generate_sbom(
+    repo_dir: Path,
+    cache: SbomCache | None = None,
+    timeout: float | None = None,
+    index: VulnIndex | None = None,
+) -> dict[str, str | TrivyCounts | dict[str, int] | bool]:
+    """
+    SBOM of *repo_dir* plus the vulnerability counts derived from it.
+
+    With a *cache*, a commit (or manifest set) scanned before reuses its SBOM
+    and, unless the vulnerability DB was updated since, its counts.
+    With an *index*, counts come from the shared component index (unless the
+    DB version is unknown, e.g. with a remote Trivy server too old to report it).
+    *timeout* bounds all Trivy invocations together (e.g. the stage timeout).
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    versions_timeout = 60 if deadline is None else _left(deadline)
+    if cache is None:
+        sbom_json = write_sbom(repo_dir, timeout)
+        db_version = trivy_versions(versions_timeout)[1] if index is not None else None
+        severities = _sbom_severities(sbom_json, db_version, index, _left(deadline))
+        return {
+            "sbom_path": str(sbom_json),
+            "trivy": trivy_counts(severities),
+            "severities": severities,
+            "cached": False,
+        }
+
+    trivy, db_version = trivy_versions(versions_timeout)
+    source = source_key(repo_dir)
+    digest = hashlib.sha256(f"{source}\0{trivy}".encode()).hexdigest()
+    sbom_json = cache.sbom_path(digest)
+
+    hit = cache.get(digest)
+    if hit is not None and db_version is not None and hit[0] == db_version:
+        severities, cached = hit[1], True
+    else:
+        if hit is None:
+            # Write next to the cache entry (one file per writer: fleet
+            # workers may build the same entry at once), then publish atomically
+            fd, tmp = tempfile.mkstemp(dir=sbom_json.parent, prefix=f"{digest}.", suffix=".tmp")
+            os.close(fd)
+            try:
+                write_sbom(repo_dir, _left(deadline), output=Path(tmp))
+                os.replace(tmp, sbom_json)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        severities = _sbom_severities(sbom_json, db_version, index, _left(deadline))
+        cached = False
+        cache.put(digest, source, trivy, db_version, severities)
 
     return {
         "sbom_path": str(sbom_json),
-        "trivy": TrivyCounts(critical=critical, high=high),
-    }
\ No newline at end of file
+        "trivy": trivy_counts(severities),
+        "severities": severities,
+        "cached": cached,
+    }
@@ -0,0 +1,280 @@
+# analysis/repo_scan/trivy_report.py
+"""
+Incremental parser for Trivy JSON reports.
+
+Reports of container-heavy monorepos run to hundreds of MB, mostly
+vulnerability descriptions and references. Instead of ``json.load``-ing the
+whole document, the file is read in chunks and walked down to
+``Results[].Vulnerabilities[]``; each vulnerability object is decoded on its
+own, folded into the counters and dropped. Other members (``Packages``,
+``Misconfigurations``…) are skipped element by element, so memory stays
+bounded by the largest single element plus the counters.
+
+Counters are kept by severity, ecosystem, package and CVE; the package and
+CVE counters are capped (least frequent keys are dropped once the cap is
+hit). The ``top_n`` most severe vulnerabilities are kept as short records
+for reports.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator
+
+SEVERITY_RANK = {"critical": 4, "high": 3, "medium": 2, "low": 1, "unknown": 0}
+
+DEFAULT_TOP_N = 20
+DEFAULT_MAX_KEYS = 100_000
+
+_CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What may still follow a number cut off at the end of the buffer ("7." or "1e+")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_decoder = json.JSONDecoder()
+
+
+class _BoundedCounter(Counter):
+    """Counter that drops its least frequent half when it exceeds *limit* keys."""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+
+    def add(self, key: str) -> None:
+        self[key] += 1
+        if len(self) > self.limit:
+            for key, _ in self.most_common()[self.limit // 2:]:
+                del self[key]
+            self.truncated = True
+
+
+class TrivyStats:
+    """Aggregated view of one or more Trivy reports."""
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N, max_keys: int = DEFAULT_MAX_KEYS):
+        self.top_n = top_n
+        self.total = 0
+        self.severities: Counter = Counter(dict.fromkeys(SEVERITY_RANK, 0))
+        self.ecosystems: Counter = Counter()
+        self.packages = _BoundedCounter(max_keys)
+        self.cves = _BoundedCounter(max_keys)
+        self._top: list[tuple[tuple[int, float, int], dict[str, Any]]] = []
+
+    def add(self, vuln: dict[str, Any], target: str | None, ecosystem: str | None) -> None:
+        severity = str(vuln.get("Severity", "UNKNOWN")).lower()
+        if severity not in SEVERITY_RANK:
+            severity = "unknown"
+        purl = (vuln.get("PkgIdentifier") or {}).get("PURL") or ""
+        if purl.startswith("pkg:"):
+            ecosystem = purl[4:].split("/", 1)[0]
+        package = f"{vuln.get('PkgName', '?')}@{vuln.get('InstalledVersion', '?')}"
+
+        self.total += 1
+        self.severities[severity] += 1
+        self.ecosystems[ecosystem or "unknown"] += 1
+        self.packages.add(package)
+        self.cves.add(vuln.get("VulnerabilityID", "?"))
+
+        if self.top_n:
+            scores = [
+                source.get("V3Score") or source.get("V2Score") or 0
+                for source in (vuln.get("CVSS") or {}).values()
+                if isinstance(source, dict)
+            ]
+            rank = (SEVERITY_RANK[severity], max(scores, default=0), -self.total)
+            if len(self._top) < self.top_n or rank > self._top[0][0]:
+                record = {
+                    "id": vuln.get("VulnerabilityID"),
+                    "package": package,
+                    "fixed_version": vuln.get("FixedVersion"),
+                    "severity": severity,
+                    "score": rank[1],
+                    "title": vuln.get("Title"),
+                    "target": target,
+                }
+                if len(self._top) < self.top_n:
+                    heapq.heappush(self._top, (rank, record))
+                else:
+                    heapq.heapreplace(self._top, (rank, record))
+
+    def top(self) -> list[dict[str, Any]]:
+        """The most severe vulnerabilities, worst first."""
+        return [record for _, record in sorted(self._top, key=lambda item: item[0], reverse=True)]
+
+    def as_dict(self, limit: int = 50) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "severities": dict(self.severities),
+            "ecosystems": dict(self.ecosystems.most_common()),
+            "packages": dict(self.packages.most_common(limit)),
+            "cves": dict(self.cves.most_common(limit)),
+            "top": self.top(),
+        }
+
+
+class _Reader:
+    """Pull reader over a JSON text file, decoding scalars and small values on demand."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = _CHUNK_SIZE) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of Trivy report")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Malformed Trivy report: expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Decode one complete value (refilling the buffer until it fits).
+
+        Each refill at least doubles what is buffered of the value, so a value
+        spanning many chunks is decoded O(log n) times rather than once per chunk.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(max(_CHUNK_SIZE, len(self.buf) - self.pos)):
+                    raise
+                continue
+            # A number cut off by the end of the buffer continues in the next chunk
+            if (not self.eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller consumes each value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+    def elements(self) -> Iterator[None]:
+        """Yield once per array element; the caller consumes each element."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+    def skip(self) -> None:
+        """Skip a value one member or element at a time."""
+        char = self.peek()
+        if char == "{":
+            for _ in self.members():
+                self.value()
+        elif char == "[":
+            for _ in self.elements():
+                self.value()
+        else:
+            self.value()
+
+
+def _result_items(reader: _Reader, lists: tuple[str, ...]
+                  ) -> Iterator[tuple[str, dict[str, Any], str | None, str | None]]:
+    target = ecosystem = None
+    if reader.peek() != "{":
+        reader.skip()
+        return
+    for key in reader.members():
+        if key == "Target":
+            target = reader.value()
+        elif key == "Type":
+            ecosystem = reader.value()
+        elif key in lists and reader.peek() == "[":
+            for _ in reader.elements():
+                item = reader.value()
+                if isinstance(item, dict):
+                    yield key, item, target, ecosystem
+        else:
+            reader.skip()
+
+
+def iter_results(path: Path, lists: tuple[str, ...] = ("Vulnerabilities",)
+                 ) -> Iterator[tuple[str, dict[str, Any], str | None, str | None]]:
+    """
+    Yield ``(list name, item, target, result type)`` for every item of the *lists*
+    (e.g. ``Vulnerabilities``, ``Packages``) of every result of a report.
+
+    The target and type are those seen before the list in its result, which
+    is where Trivy writes them.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        reader = _Reader(fh)
+        if reader.peek() != "{":
+            raise ValueError("Trivy report must be a JSON object")
+        for key in reader.members():
+            if key == "Results" and reader.peek() == "[":
+                for _ in reader.elements():
+                    yield from _result_items(reader, lists)
+            else:
+                reader.skip()
+
+
+def iter_vulnerabilities(path: Path) -> Iterator[tuple[dict[str, Any], str | None, str | None]]:
+    """Yield ``(vulnerability, target, result type)`` for every vulnerability of a report."""
+    for _, vuln, target, ecosystem in iter_results(path):
+        yield vuln, target, ecosystem
+
+
+def parse_trivy_report(
+    path: Path,
+    top_n: int = DEFAULT_TOP_N,
+    max_keys: int = DEFAULT_MAX_KEYS,
+    stats: TrivyStats | None = None,
+) -> TrivyStats:
+    """
+    Stream a Trivy JSON report into ``TrivyStats``.
+
+    Pass *stats* to accumulate several reports into the same counters.
+    """
+    stats = stats or TrivyStats(top_n, max_keys)
+    for vuln, target, ecosystem in iter_vulnerabilities(path):
+        stats.add(vuln, target, ecosystem)
+    return stats
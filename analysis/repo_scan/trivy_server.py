@@ -0,0 +1,322 @@
+# analysis/repo_scan/trivy_server.py
+"""
+Keep the Trivy vulnerability DB warm across scans.
+
+A standalone ``trivy`` run opens (and sometimes downloads) the DB before
+doing any work, and every concurrent run holds its own copy. The scan
+pipeline instead asks ``trivy_backend()`` for the options of its Trivy
+calls, which picks the first mode that works:
+
+• ``server``  – a Trivy server given by ``COMPLIANCE_TRIVY_SERVER`` (e.g. a
+  docker-compose service), or one long-lived local ``trivy server`` that
+  this module starts on demand. Scans become thin clients (``--server``):
+  the DB is loaded once, by the server, however many scans run.
+• ``shared``  – a DB directory downloaded once and then used read-only by
+  every scan (``--cache-dir … --skip-db-update``).
+• ``standalone`` – plain ``trivy`` with its own DB handling.
+
+``COMPLIANCE_TRIVY_MODE`` forces one mode (default ``auto``). The local
+server outlives the Python process that started it and is reused by later
+processes; its PID is recorded as soon as it is spawned, and
+``python -m analysis.repo_scan.trivy_server stop`` ends it. A scan waits
+``COMPLIANCE_TRIVY_START_TIMEOUT`` seconds for a starting server (the first
+start downloads the DB) before falling back for its own run; the server
+keeps starting, the process switches to it once it answers, and no shared
+DB is downloaded meanwhile. A server that stops answering its
+health check is restarted once, after which scans fall back to the next
+mode.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from utils.cache_dir import cache_dir
+from .mirror import _locked
+
+MODES = ("auto", "server", "shared", "standalone")
+
+# Seconds a scan waits for a starting local server before falling back
+SERVER_START_TIMEOUT = float(os.getenv("COMPLIANCE_TRIVY_START_TIMEOUT", "20"))
+# A server still not answering this long after it was spawned is restarted
+SERVER_MAX_STARTUP = 900.0
+# Seconds allowed for downloading the shared DB
+DB_DOWNLOAD_TIMEOUT = 300.0
+# Minimum seconds between two health checks of the server
+HEALTH_INTERVAL = 30.0
+# A shared DB older than this is refreshed before use (Trivy publishes every 6h)
+SHARED_DB_MAX_AGE = 12 * 3600
+
+
+def healthy(url: str, timeout: float = 2.0) -> bool:
+    """True if the Trivy server at *url* answers its health check."""
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/healthz", timeout=timeout) as resp:
+            return resp.status == 200
+    except OSError:
+        return False
+
+
+def server_db_version(url: str, timeout: float = 5.0) -> str | None:
+    """
+    Timestamp of the vulnerability DB the Trivy server at *url* scans with.
+
+    Read from the server's ``/version`` endpoint; None if the server does not
+    have one (Trivy releases before 0.37) or does not answer.
+    """
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/version", timeout=timeout) as resp:
+            info = json.load(resp)
+    except (OSError, ValueError):
+        return None
+    return (info.get("VulnerabilityDB") or {}).get("UpdatedAt") if isinstance(info, dict) else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _alive(pid: int) -> bool:
+    """True if *pid* still is a Trivy process (PIDs get reused)."""
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    cmdline = Path(f"/proc/{pid}/cmdline")
+    return not cmdline.exists() or b"trivy" in cmdline.read_bytes()
+
+
+class LocalServer:
+    """
+    The ``trivy server`` process shared by every scan on this machine.
+
+    Its address and PID are kept in ``<dir>/server.json`` so that other
+    processes reuse it instead of starting their own.
+    """
+
+    def __init__(self, root: Path | None = None):
+        self.dir = Path(root) if root else cache_dir("trivy")
+        self.db_dir = self.dir / "db"
+        self._state = self.dir / "server.json"
+        self._lock = self.dir / "server.lock"
+
+    def _read_state(self) -> dict | None:
+        try:
+            return json.loads(self._state.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def status(self) -> dict | None:
+        """Address and PID of the running server, or None."""
+        state = self._read_state()
+        return state if state and _alive(state["pid"]) and healthy(state["url"]) else None
+
+    def starting(self) -> bool:
+        """True if the recorded server is running but has not answered yet."""
+        state = self._read_state()
+        return bool(state) and not state.get("ready") and _alive(state["pid"]) and (
+            time.time() - state.get("started", 0) <= SERVER_MAX_STARTUP
+        )
+
+    def _spawn(self) -> tuple[dict, subprocess.Popen]:
+        port = _free_port()
+        with open(self.dir / "server.log", "ab") as log:
+            proc = subprocess.Popen(
+                ["trivy", "server", "--listen", f"127.0.0.1:{port}",
+                 "--cache-dir", str(self.db_dir)],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                start_new_session=True,  # outlives this process
+            )
+        state = {"pid": proc.pid, "url": f"http://127.0.0.1:{port}", "started": time.time()}
+        self._state.write_text(json.dumps(state))
+        return state, proc
+
+    def ensure(self, start_timeout: float = SERVER_START_TIMEOUT) -> str:
+        """
+        Return the URL of a healthy server, starting one if needed.
+
+        Raises:
+            RuntimeError: The server exited, or is not answering after
+                *start_timeout* seconds (it is left starting in that case)
+        """
+        with _locked(self._lock):
+            state, proc = self._read_state(), None
+            # A server that answered before, or never did in time, is wedged
+            if state is None or not _alive(state["pid"]) or not healthy(state["url"]) and (
+                state.get("ready") or time.time() - state.get("started", 0) > SERVER_MAX_STARTUP
+            ):
+                self.stop()
+                state, proc = self._spawn()
+            deadline = time.monotonic() + start_timeout
+            while not healthy(state["url"]):
+                if proc.poll() is not None if proc else not _alive(state["pid"]):
+                    self._state.unlink(missing_ok=True)
+                    raise RuntimeError(f"Trivy server exited (see {self.dir / 'server.log'})")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Trivy server is still starting (see {self.dir / 'server.log'})")
+                time.sleep(0.5)
+            if not state.get("ready"):
+                state["ready"] = True
+                self._state.write_text(json.dumps(state))
+            return state["url"]
+
+    def stop(self) -> None:
+        """Terminate the recorded server (and its children), started or not."""
+        state = self._read_state()
+        if state is None:
+            return
+        if _alive(state["pid"]):
+            # The server leads its own session: signal the whole group
+            try:
+                if hasattr(os, "killpg"):
+                    os.killpg(state["pid"], signal.SIGTERM)
+                else:
+                    os.kill(state["pid"], signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self._state.unlink(missing_ok=True)
+
+
+def _fresh(db_dir: Path, max_age: float = SHARED_DB_MAX_AGE) -> bool:
+    metadata = db_dir / "db" / "metadata.json"
+    return metadata.exists() and time.time() - metadata.stat().st_mtime <= max_age
+
+
+def warm_shared_db(db_dir: Path, max_age: float = SHARED_DB_MAX_AGE) -> Path:
+    """Download the vulnerability DB into *db_dir* unless a fresh copy is there."""
+    with _locked(db_dir.parent / "shared.lock"):
+        if not _fresh(db_dir, max_age):
+            subprocess.run(
+                ["trivy", "image", "--quiet", "--download-db-only", "--cache-dir", str(db_dir)],
+                check=True, timeout=DB_DOWNLOAD_TIMEOUT,
+            )
+    return db_dir
+
+
+class TrivyBackend:
+    """
+    How Trivy is invoked: extra options for scans and for ``trivy version``.
+
+    Args:
+        mode: ``server``, ``shared`` or ``standalone``
+        server: URL of the Trivy server (server mode)
+        db_dir: Cache directory holding the DB, when known
+    """
+
+    def __init__(self, mode: str, server: str | None = None, db_dir: Path | None = None):
+        self.mode = mode
+        self.server = server
+        self.db_dir = db_dir
+
+    def scan_args(self) -> list[str]:
+        """Options for vulnerability scans (``trivy fs`` / ``trivy sbom``)."""
+        if self.mode == "server":
+            return ["--server", self.server]
+        if self.mode == "shared":
+            return ["--cache-dir", str(self.db_dir), "--skip-db-update", "--skip-java-db-update"]
+        return []
+
+    def version_args(self) -> list[str]:
+        """Options making ``trivy version`` report the DB the scans use."""
+        return ["--cache-dir", str(self.db_dir)] if self.db_dir else []
+
+    def __repr__(self) -> str:
+        return f"TrivyBackend({self.mode!r}, server={self.server!r}, db_dir={self.db_dir!r})"
+
+
+class _Selector:
+    """Pick, health-check and downgrade the backend of this process."""
+
+    def __init__(self):
+        self.backend: TrivyBackend | None = None
+        self.server: LocalServer | None = None
+        self.pending: LocalServer | None = None  # local server still starting
+        self.restarted = False
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+    def _select(self, mode: str) -> TrivyBackend:
+        remote = os.getenv("COMPLIANCE_TRIVY_SERVER")
+        if mode in ("auto", "server"):
+            if remote:
+                if healthy(remote):
+                    return TrivyBackend("server", server=remote)
+            elif (backend := self._local()) is not None:
+                return backend
+        if mode in ("auto", "shared"):
+            db_dir = cache_dir("trivy", "shared")
+            # Never download a second DB while the local server fetches its own
+            if self.pending is None or _fresh(db_dir):
+                try:
+                    return TrivyBackend("shared", db_dir=warm_shared_db(db_dir))
+                except (OSError, subprocess.SubprocessError):
+                    pass
+        return TrivyBackend("standalone")
+
+    def _local(self) -> TrivyBackend | None:
+        """Server backend on the local server, or None if it is not up (yet)."""
+        server = LocalServer()
+        try:
+            url = server.ensure()
+        except (OSError, RuntimeError):
+            self.pending = server if server.starting() else None
+            return None
+        self.server, self.pending = server, None
+        return TrivyBackend("server", url, server.db_dir)
+
+    def get(self) -> TrivyBackend:
+        with self.lock:
+            mode = os.getenv("COMPLIANCE_TRIVY_MODE", "auto")
+            if mode not in MODES:
+                raise ValueError(f"COMPLIANCE_TRIVY_MODE must be one of {', '.join(MODES)}")
+            if self.backend is None:
+                self.backend = self._select(mode)
+                self.last_check = time.monotonic()
+            elif time.monotonic() - self.last_check > HEALTH_INTERVAL:
+                self.last_check = time.monotonic()
+                if self.backend.mode == "server" and not healthy(self.backend.server):
+                    if self.server is not None and not self.restarted:
+                        self.restarted = True
+                        if (backend := self._local()) is not None:
+                            self.backend = backend
+                            return backend
+                    # Next mode down: only a server still starting is tried again
+                    self.backend = self._select("shared" if mode == "auto" else "standalone")
+                elif self.backend.mode != "server" and self.pending is not None:
+                    if self.pending.status() is not None:
+                        self.backend = self._local() or self.backend
+                    elif not self.pending.starting():
+                        self.pending = None
+            return self.backend
+
+
+_selector = _Selector()
+
+
+def trivy_backend() -> TrivyBackend:
+    """The backend for this process's Trivy calls (selected on first use)."""
+    return _selector.get()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) == 2 else ""
+    server = LocalServer()
+    if command == "start":
+        print(server.ensure())
+    elif command == "stop":
+        server.stop()
+    elif command == "status":
+        print(json.dumps(server.status()))
+    else:
+        sys.exit("Usage: python -m analysis.repo_scan.trivy_server start|stop|status")
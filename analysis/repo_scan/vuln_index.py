@@ -0,0 +1,252 @@
+# analysis/repo_scan/vuln_index.py
+"""
+Shared vulnerability index of ``package@version`` components.
+
+The same components appear in most repositories of a fleet. Instead of
+matching every SBOM against the vulnerability DB from scratch, the
+vulnerabilities of each component (identified by its package URL) are
+stored once per vulnerability-DB version:
+
+• ``resolve`` looks components up in the index and sends only the unknown
+  ones to Trivy, as one small synthetic SBOM. Components no other scan is
+  already resolving are claimed by the caller; the others are waited for,
+  so concurrent fleet scans resolve each distinct component once.
+• Components Trivy analyzed without finding vulnerabilities are stored
+  too: they are the bulk of every SBOM. Components it did not analyze
+  (e.g. an unsupported ecosystem) are not, so they are never cached as
+  clean.
+• Entries are content-addressed by ``sha256(purl, DB version)``; entries of
+  older DB versions are dropped after a grace period.
+
+Counts from the index are per distinct component: a package listed by two
+lockfiles of the same repository counts once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import unquote
+
+from utils.cache_dir import cache_dir
+from .trivy_report import SEVERITY_RANK, iter_results
+from .trivy_server import trivy_backend
+
+# Seconds entries of a superseded DB version are kept (scans still running on it)
+STALE_DB_GRACE = 24 * 3600
+
+# (vulnerability id, severity)
+Vuln = tuple[str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS component_vulns (
+    key        TEXT PRIMARY KEY,
+    purl       TEXT NOT NULL,
+    db_version TEXT NOT NULL,
+    vulns      TEXT NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS component_vulns_db ON component_vulns (db_version, last_used);
+"""
+
+
+def component_key(purl: str, db_version: str) -> str:
+    return hashlib.sha256(f"{purl}\0{db_version}".encode()).hexdigest()
+
+
+def sbom_purls(sbom_path: Path) -> list[str]:
+    """Distinct package URLs (with a version) of a CycloneDX JSON SBOM."""
+    with open(sbom_path, "r", encoding="utf-8") as fh:
+        bom = json.load(fh)
+    purls: dict[str, None] = {}
+
+    def walk(components: list[dict[str, Any]]) -> None:
+        for component in components:
+            purl = component.get("purl")
+            if purl and "@" in purl:
+                purls[purl] = None
+            walk(component.get("components") or [])
+
+    walk(bom.get("components") or [])
+    return list(purls)
+
+
+def _synthetic_sbom(purls: Iterable[str]) -> dict[str, Any]:
+    components = []
+    for purl in purls:
+        path, _, version = purl.split("?", 1)[0].partition("@")
+        namespace, _, name = path.rpartition("/")
+        components.append({
+            "type": "library",
+            "bom-ref": purl,
+            "name": unquote(name),
+            **({"group": unquote(namespace.split("/", 1)[1])} if namespace.count("/") else {}),
+            "version": unquote(version),
+            "purl": purl,
+        })
+    return {
+        "bomFormat": "CycloneDX",
+        "specVersion": "1.5",
+        "version": 1,
+        "metadata": {"component": {"type": "application", "name": "vuln-index", "bom-ref": "vuln-index"}},
+        "components": components,
+    }
+
+
+def scan_components(purls: list[str], timeout: float | None = None) -> dict[str, list[Vuln]]:
+    """
+    Match *purls* against the vulnerability DB with one Trivy run.
+
+    Only the components Trivy reports as analyzed are returned; the others
+    are unknown rather than free of vulnerabilities.
+    """
+    wanted = set(purls)
+    found: dict[str, dict[str, str]] = {}
+    work = Path(tempfile.mkdtemp())
+    try:
+        sbom_json = work / "components.cdx.json"
+        report_json = work / "report.json"
+        sbom_json.write_text(json.dumps(_synthetic_sbom(purls)), encoding="utf-8")
+        subprocess.run(
+            ["trivy", "sbom", "--quiet", *trivy_backend().scan_args(), "--format", "json",
+             "--list-all-pkgs", "--output", str(report_json), str(sbom_json)],
+            check=True, timeout=timeout,
+        )
+
+        for kind, item, _, _ in iter_results(report_json, ("Packages", "Vulnerabilities")):
+            ident = item.get("Identifier" if kind == "Packages" else "PkgIdentifier") or {}
+            purl = next((ref for ref in (ident.get("BOMRef"), ident.get("PURL")) if ref in wanted), None)
+            if purl is None:
+                continue
+            vulns = found.setdefault(purl, {})
+            if kind == "Vulnerabilities":
+                severity = str(item.get("Severity", "UNKNOWN")).lower()
+                vulns[item.get("VulnerabilityID", "?")] = severity if severity in SEVERITY_RANK else "unknown"
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return {purl: sorted(vulns.items()) for purl, vulns in found.items()}
+
+
+class VulnIndex:
+    """
+    Per-component vulnerability results, keyed by package URL and DB version.
+
+    Args:
+        path: Index directory (defaults to ``<cache dir>/vuln_index``)
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.dir = Path(path) if path else cache_dir("vuln_index")
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.dir / "index.sqlite", timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Components being resolved by a thread of this process
+        self._inflight: dict[str, threading.Event] = {}
+
+    def get(self, purls: Iterable[str], db_version: str) -> dict[str, list[Vuln]]:
+        """Indexed results of *purls*; unknown components are left out."""
+        keys = {component_key(purl, db_version): purl for purl in purls}
+        found: dict[str, list[Vuln]] = {}
+        key_list = list(keys)
+        with self._lock:
+            for i in range(0, len(key_list), 500):
+                batch = key_list[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, vulns FROM component_vulns WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, vulns in rows:
+                    found[keys[key]] = [tuple(v) for v in json.loads(vulns)]
+            if found:
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE component_vulns SET last_used = ? WHERE key = ?",
+                        [(time.time(), component_key(purl, db_version)) for purl in found],
+                    )
+        return found
+
+    def put(self, results: dict[str, list[Vuln]], db_version: str) -> None:
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO component_vulns VALUES (?, ?, ?, ?, ?)",
+                [(component_key(purl, db_version), purl, db_version, json.dumps(vulns), now)
+                 for purl, vulns in results.items()],
+            )
+            self.conn.execute(
+                "DELETE FROM component_vulns WHERE db_version != ? AND last_used < ?",
+                (db_version, now - STALE_DB_GRACE),
+            )
+
+    def resolve(self, purls: Iterable[str], db_version: str,
+                timeout: float | None = None) -> dict[str, list[Vuln]]:
+        """
+        Vulnerabilities of every component in *purls* that Trivy can analyze.
+
+        Components missing from the index are scanned (once, even when
+        several threads ask for them) and added to it. Components Trivy does
+        not analyze are left out of the result and are scanned again next time.
+        """
+        purls = list(dict.fromkeys(purls))
+        results = self.get(purls, db_version)
+        missing = [purl for purl in purls if purl not in results]
+
+        mine, theirs = [], []
+        with self._lock:
+            for purl in missing:
+                key = component_key(purl, db_version)
+                if key in self._inflight:
+                    theirs.append((purl, self._inflight[key]))
+                else:
+                    self._inflight[key] = threading.Event()
+                    mine.append(purl)
+        try:
+            if mine:
+                scanned = scan_components(mine, timeout)
+                self.put(scanned, db_version)
+                results.update(scanned)
+        finally:
+            with self._lock:
+                for purl in mine:
+                    self._inflight.pop(component_key(purl, db_version)).set()
+
+        for purl, done in theirs:
+            done.wait(timeout)
+        # Whatever another thread failed to resolve is scanned here
+        results.update(self.get([purl for purl, _ in theirs], db_version))
+        left = [purl for purl, _ in theirs if purl not in results]
+        if left:
+            scanned = scan_components(left, timeout)
+            self.put(scanned, db_version)
+            results.update(scanned)
+        return results
+
+    def severities(self, purls: Iterable[str], db_version: str,
+                   timeout: float | None = None) -> dict[str, int]:
+        """Vulnerability counts by severity over the distinct components of *purls*."""
+        counts = dict.fromkeys(SEVERITY_RANK, 0)
+        for vulns in self.resolve(purls, db_version, timeout).values():
+            for _, severity in vulns:
+                counts[severity] += 1
+        return counts
+
+
+_index: VulnIndex | None = None
+
+
+def vuln_index() -> VulnIndex:
+    """The process-wide index in the shared cache directory."""
+    global _index
+    if _index is None:
+        _index = VulnIndex()
+    return _index
@@ -1,21 +1,19 @@
 """
 Stage 1 — repository scan:
 • Clone the repo
-• Produce a minimal CycloneDX-style SBOM (placeholder)
+• Produce a CycloneDX SBOM from the dependency manifests (fast path,
+  ``analysis.repo_scan.manifests``)
 
-Replace `_generate_sbom` with Syft / Trivy / cyclonedx-python in production.
+Use ``analysis.repo_scan.sbom`` (Trivy) when vulnerabilities are needed.
 """
 from __future__ import annotations
 from pathlib import Path
-import json, subprocess
 from analysis.repo_scan.clone import clone_repo
+from analysis.repo_scan.manifests import write_fast_sbom
 
 
 def _generate_sbom(path: Path) -> Path:
-    sbom = path / "sbom.json"
-    data = {"metadata": {"tool": "demo-generator"}, "components": []}
-    sbom.write_text(json.dumps(data, indent=2))
-    return sbom
+    return write_fast_sbom(path, path / "sbom.json")
 
 
 def scan(repo_url: str, token: str | None = None) -> dict:
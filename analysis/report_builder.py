@@ -2,14 +2,22 @@
 analysis.report_builder
 ───────────────────────
 Transforms the raw scan context into a Markdown policy using Jinja-2.
+
+The template is only loaded on first use, and its compiled bytecode is
+cached on disk, so later processes skip parsing it. The cache is Jinja's
+private per-user directory, not the shared cache dir: loading bytecode
+runs it. Without a usable directory, templates are simply compiled. ``render_policies`` renders many contexts in one go and streams each
+policy straight into a directory or a ZIP archive.
 """
 
 from __future__ import annotations
 
+import zipfile
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Iterable, Mapping
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Template setup
@@ -21,13 +29,41 @@ _TEMPLATE_DIR = (
     / "templates"
 )
 
-_env = Environment(
-    loader=FileSystemLoader(_TEMPLATE_DIR),
-    autoescape=select_autoescape(enabled_extensions=("md", "j2")),
-    trim_blocks=True,
-    lstrip_blocks=True,
-)
-_policy_tpl = _env.get_template("POLICY.md.j2")
+_env: Environment | None = None
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    """Jinja's per-user cache (mode 0700 in the temp dir), or None if unusable."""
+    try:
+        return FileSystemBytecodeCache()
+    except (OSError, RuntimeError):
+        return None
+
+
+def _policy_tpl() -> Template:
+    """POLICY.md.j2, loaded on first use (Jinja keeps it cached afterwards)."""
+    global _env
+    if _env is None:
+        _env = Environment(
+            loader=FileSystemLoader(_TEMPLATE_DIR),
+            autoescape=select_autoescape(enabled_extensions=("md", "j2")),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            # Keyed by the template source checksum: edits invalidate it
+            bytecode_cache=_bytecode_cache(),
+        )
+    return _env.get_template("POLICY.md.j2")
+
+
+def _member_name(name: str) -> str:
+    parts = Path(name).parts
+    if not parts or Path(name).is_absolute() or ".." in parts:
+        raise ValueError(f"Invalid policy name: {name!r}")
+    return Path(name).as_posix()
+
+
+def _with_defaults(ctx: dict[str, Any]) -> dict[str, Any]:
+    return {**ctx, "now_iso": datetime.utcnow().isoformat(timespec="seconds")}
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -41,5 +77,50 @@ def render_policy(**ctx) -> str:
 
     * ``now_iso`` – current UTC timestamp, ISO-8601
     """
-    ctx["now_iso"] = datetime.utcnow().isoformat(timespec="seconds")
-    return _policy_tpl.render(**ctx)
\ No newline at end of file
+    return _policy_tpl().render(**_with_defaults(ctx))
+
+
+def render_policies(
+    contexts: Mapping[str, dict[str, Any]] | Iterable[tuple[str, dict[str, Any]]],
+    out: str | Path,
+) -> list[str]:
+    """
+    Render one policy per context, streaming each into *out*.
+
+    Args:
+        contexts: ``{name: context}`` or ``(name, context)`` pairs; contexts
+            can be produced lazily, only one is held at a time. Names are
+            relative paths without the ``.md`` suffix
+        out: A directory (one ``<name>.md`` file per context) or a path
+            ending in ``.zip`` (one archive member per context)
+
+    Returns:
+        The names of the files written, in order
+    """
+    items = (
+        (_member_name(name), ctx)
+        for name, ctx in (contexts.items() if isinstance(contexts, Mapping) else contexts)
+    )
+    out = Path(out)
+    template = _policy_tpl()
+    written = []
+
+    if out.suffix == ".zip":
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, ctx in items:
+                member = f"{name}.md"
+                with archive.open(member, "w") as fh:
+                    for chunk in template.generate(**_with_defaults(ctx)):
+                        fh.write(chunk.encode("utf-8"))
+                written.append(member)
+        return written
+
+    out.mkdir(parents=True, exist_ok=True)
+    for name, ctx in items:
+        path = out / f"{name}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.writelines(template.generate(**_with_defaults(ctx)))
+        written.append(path.relative_to(out).as_posix())
+    return written
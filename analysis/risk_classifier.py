@@ -2,9 +2,14 @@
 Map raw vulnerability counts to a qualitative risk level.
 
 Thresholds are *intentionally* simple and transparent; tweak as needed.
+Counts can also be taken from the shared vulnerability index
+(``classify_components``) without scanning the repository again.
 """
 
-from typing import Literal, TypedDict
+from typing import TYPE_CHECKING, Iterable, Literal, TypedDict
+
+if TYPE_CHECKING:
+    from analysis.repo_scan.vuln_index import VulnIndex
 
 
 class TrivySummary(TypedDict):
@@ -22,4 +27,28 @@ def classify(vuln: TrivySummary) -> RiskLevel:
         return "High"
     if vuln["high"] > 0:
         return "Medium"
-    return "Low"
\ No newline at end of file
+    return "Low"
+
+
+def classify_components(
+    purls: Iterable[str],
+    db_version: str | None = None,
+    index: "VulnIndex | None" = None,
+) -> RiskLevel:
+    """
+    Risk of a set of components (package URLs) from the shared vulnerability index.
+
+    Only components the index does not know yet are sent to the scanner.
+    *purls* can come from any CycloneDX SBOM (``vuln_index.sbom_purls``),
+    including the Trivy-free one of ``repo_scan.manifests``. *db_version*
+    defaults to the DB Trivy currently uses.
+    """
+    from analysis.repo_scan.sbom import trivy_versions
+    from analysis.repo_scan.vuln_index import vuln_index
+
+    if db_version is None:
+        db_version = trivy_versions()[1]
+        if db_version is None:
+            raise ValueError("Vulnerability DB version is unknown; pass db_version")
+    counts = (index or vuln_index()).severities(purls, db_version)
+    return classify(TrivySummary(critical=counts["critical"], high=counts["high"]))
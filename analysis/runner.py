@@ -9,26 +9,200 @@ Orchestrates the full pipeline:
     3. Build Markdown policy             → ``report_builder``
 
 Called by *streamlit_compliance.py*.
+
+``run_full_scan`` runs the scanners as a stage graph (``analysis.stages``):
+the OpenSSF Scorecard starts right away, and once the clone is ready the
+SBOM and the governance file are processed concurrently, each with its own
+timeout. Vulnerabilities are counted from the SBOM, so the repository is
+walked only once: components already known to the shared vulnerability
+index are not scanned again, and SBOM results are cached per commit until
+the Trivy vulnerability DB is updated.
+
+``run_diff_scan`` is the PR-gating mode: it compares two commits and only
+analyzes the files that changed, reusing cached findings for the rest.
+
+Both accept a ``HistoryStore`` (``analysis.history``) to keep the result.
 """
 
 from __future__ import annotations
 
-from analysis.repo_scan import clone_repo, generate_sbom
+import subprocess
+import threading
+from pathlib import Path
+
+from analysis.governance import load_governance
+from analysis.history import HistoryStore
+from analysis.repo_scan import clone_repo
+from analysis.repo_scan.mirror import mirror_pool
+from analysis.repo_scan.sbom import generate_sbom, sbom_cache
+from analysis.repo_scan.vuln_index import vuln_index
 from analysis.risk_classifier import classify
 from analysis.report_builder import render_policy
+from analysis.scorecard import scorecard
+from analysis.stages import Stage, run_stages
+from tools.compliance_cache import FindingsCache
+from tools.compliance_tools import get_compliance_checker
+
+
+# Per-stage timeouts in seconds
+STAGE_TIMEOUTS = {
+    "clone": 600,
+    "scorecard": 300,
+    "sbom": 900,
+    "governance": 30,
+}
+
+
+def _head_commit(repo: Path) -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "-C", str(repo), "rev-parse", "HEAD"],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _Checkouts:
+    """
+    Worktrees cloned during one run, released by ``close``.
+
+    A clone that only completes after the run gave up on it (its stage
+    timed out) is released as soon as it returns.
+    """
+
+    def __init__(self):
+        self._paths: list[Path] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add(self, path: Path) -> Path:
+        with self._lock:
+            if not self._closed:
+                self._paths.append(path)
+                return path
+        mirror_pool().release(path)
+        return path
 
+    def close(self, keep: bool = False) -> None:
+        with self._lock:
+            self._closed = True
+            paths, self._paths = self._paths, []
+        if not keep:
+            for path in paths:
+                mirror_pool().release(path)
 
-def run_full_scan(repo_url: str, gh_token: str | None = None) -> dict:
+
+def run_full_scan(
+    repo_url: str,
+    gh_token: str | None = None,
+    timeouts: dict[str, float] | None = None,
+    profile: str = "full",
+    history: HistoryStore | None = None,
+    keep_worktree: bool = False,
+) -> dict:
     """
     End-to-end scan.  Returns a context dict ready for *render_policy*.
+
+    *timeouts* overrides entries of ``STAGE_TIMEOUTS``. The Scorecard and
+    governance stages are optional: if they fail their value is ``None``
+    and the error is listed under ``stages``.
+
+    *profile* is the clone profile (``repo_scan.clone.CLONE_PROFILES``):
+    ``"manifests"`` downloads only what the SBOM and governance stages read,
+    which is much faster on repositories full of media or models.
+
+    With a *history* store, the result is also recorded there.
+
+    The cloned worktree is released before returning, unless *keep_worktree*
+    is set: its path is then ``repo_path`` and the caller releases it with
+    ``mirror_pool().release``.
     """
-    repo_path = clone_repo(repo_url, gh_token)
-    sbom = generate_sbom(repo_path)
-    risk = classify(sbom)
-
-    return {
-        "repo_path": str(repo_path),
-        "sbom": sbom,
-        "risk": risk,
-        # add more keys (OpenSSF Scorecard etc.) as scanners grow
-    }
\ No newline at end of file
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    checkouts = _Checkouts()
+    keep = False
+    try:
+        report = run_stages([
+            # Given the stage timeout so git does not outlive the stage (and its mirror lock)
+            Stage("clone", lambda: checkouts.add(clone_repo(repo_url, gh_token, profile,
+                                                            timeout=timeouts["clone"])),
+                  timeout=timeouts["clone"]),
+            Stage("scorecard", lambda: scorecard(repo_url, timeout=timeouts["scorecard"]),
+                  timeout=timeouts["scorecard"], required=False),
+            Stage("sbom", lambda repo: generate_sbom(repo, sbom_cache(), timeout=timeouts["sbom"],
+                                                     index=vuln_index()),
+                  deps=["clone"], timeout=timeouts["sbom"]),
+            Stage("governance", load_governance, deps=["clone"],
+                  timeout=timeouts["governance"], required=False),
+        ])
+
+        results = report.results
+        sbom = results["sbom"]
+
+        context = {
+            "repo_path": str(results["clone"]) if keep_worktree else None,
+            "commit": _head_commit(results["clone"]),
+            "profile": profile,
+            "sbom": sbom,
+            # Flat keys expected by streamlit_compliance.py and POLICY.md.j2
+            "sbom_path": sbom["sbom_path"],
+            "trivy": sbom["trivy"],
+            "severities": sbom["severities"],
+            "risk": classify(sbom["trivy"]),
+            "scorecard": results.get("scorecard"),
+            "governance": results.get("governance"),
+            "stages": report.as_dict(),
+        }
+        keep = keep_worktree
+    finally:
+        checkouts.close(keep)
+
+    if history is not None:
+        history.record_full_scan(repo_url, context)
+    return context
+
+
+def run_diff_scan(
+    repo_url: str,
+    base_ref: str,
+    head_ref: str,
+    gh_token: str | None = None,
+    jobs: int | None = None,
+    history: HistoryStore | None = None,
+) -> dict:
+    """
+    Compliance scan of *head_ref* scoped to the changes since *base_ref*.
+
+    Only the two commits are fetched (shallow) into the mirror pool, and the
+    head commit is checked out into a worktree that is removed afterwards.
+    Files unchanged since an earlier scan come from the findings cache, so
+    the returned verdict still covers the whole repository. Files missing
+    from the cache are analyzed as well: ``scope`` is ``"full"`` when no
+    unchanged file was cached (e.g. the first scan of the repository),
+    ``"partial"`` when some were and ``"diff"`` when all were. SBOM
+    generation is skipped in this mode. With a *history* store, the result
+    is also recorded there.
+    """
+    pool = mirror_pool()
+    base_sha, head_sha = pool.fetch(repo_url, gh_token, base_ref, head_ref)
+    repo_path = pool.add_worktree(repo_url, head_sha, gh_token)
+
+    cache = FindingsCache()
+    try:
+        scan = get_compliance_checker().analyze_diff(
+            repo_path, base_sha, head_sha, jobs=jobs, cache=cache
+        )
+        compliance = scan.run()
+    finally:
+        cache.close()
+        pool.release(repo_path)
+
+    result = {
+        "base": base_sha,
+        "head": head_sha,
+        "scope": compliance["scope"],
+        "compliance": compliance,
+    }
+    if history is not None:
+        history.record_diff_scan(repo_url, result)
+    return result
@@ -2,10 +2,11 @@
 from pathlib import Path
 import subprocess, json, tempfile
 
-def scorecard(repo_url: str) -> float:
+def scorecard(repo_url: str, timeout: float | None = None) -> float:
     out = Path(tempfile.mktemp())
     subprocess.run(
         ["ossf-scorecard-cli", "score", "--repo", repo_url, "--format", "json", "--output-file", out],
         check=True,
+        timeout=timeout,
     )
     return json.loads(out.read_text())["score"]
\ No newline at end of file
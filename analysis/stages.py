@@ -0,0 +1,187 @@
+# analysis/stages.py
+"""
+Run scanner stages as a dependency graph.
+
+Each stage is a callable that receives the results of the stages it depends
+on. Stages whose dependencies are done run concurrently in a thread pool —
+scanners spend their time waiting on subprocesses, so threads are enough —
+and a pipeline takes about as long as its slowest chain of stages rather
+than the sum of all of them.
+
+Every stage has its own timeout (counted from when it starts) and the
+report records how long each stage took. A failing or timed-out stage
+skips the stages that depend on it; if it is ``required`` the whole run
+raises ``StageError``. Threads cannot be interrupted, so a timed-out stage
+is only abandoned: stages must bound their own subprocesses with the stage
+timeout for the work to actually stop.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable
+
+
+class StageError(RuntimeError):
+    """A required stage failed or timed out."""
+
+    def __init__(self, stage: str, reason: str):
+        super().__init__(f"Stage {stage!r} {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+class Stage:
+    """
+    One node of the graph.
+
+    Args:
+        name: Unique stage name; also the key of its result
+        func: Called with the results of *deps*, in order
+        deps: Names of the stages that must finish first
+        timeout: Seconds the stage may run (``None`` for no limit)
+        required: Abort the run if this stage does not succeed
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Iterable[str] = (),
+        timeout: float | None = None,
+        required: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.required = required
+
+
+class StageReport:
+    """Results, per-stage status and wall-clock timings of a run."""
+
+    def __init__(self):
+        self.results: dict[str, Any] = {}
+        self.status: dict[str, str] = {}       # ok / failed / timeout / skipped
+        self.errors: dict[str, str] = {}
+        self.timings: dict[str, float] = {}
+        self.elapsed = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": dict(self.status),
+            "errors": dict(self.errors),
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def _check_graph(stages: list[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Stage {stage.name!r} depends on unknown stages: {', '.join(missing)}")
+
+    # Kahn's algorithm: every stage must become ready at some point
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages: Iterable[Stage], max_workers: int | None = None) -> StageReport:
+    """
+    Execute a stage graph and return its report.
+
+    Args:
+        stages: The stages; dependencies are referenced by name
+        max_workers: Maximum stages running at once (defaults to one per stage)
+
+    Raises:
+        StageError: A required stage failed, timed out or was skipped
+    """
+    stages = list(stages)
+    _check_graph(stages)
+    by_name = {stage.name: stage for stage in stages}
+    report = StageReport()
+
+    started_run = time.monotonic()
+    started: dict[str, float] = {}
+    running: dict[Future, str] = {}
+    pending = list(stages)
+
+    def timed(stage: Stage, args: list[Any]) -> Any:
+        started[stage.name] = time.monotonic()
+        return stage.func(*args)
+
+    def finish(name: str, status: str, error: str | None = None) -> None:
+        report.status[name] = status
+        if name in started:
+            report.timings[name] = time.monotonic() - started[name]
+        if error is not None:
+            report.errors[name] = error
+            if by_name[name].required:
+                raise StageError(name, error)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1)
+    try:
+        while pending or running:
+            # Submit every stage whose dependencies are settled
+            for stage in list(pending):
+                states = [report.status.get(dep) for dep in stage.deps]
+                if any(state is None for state in states):
+                    continue
+                pending.remove(stage)
+                if all(state == "ok" for state in states):
+                    args = [report.results[dep] for dep in stage.deps]
+                    running[pool.submit(timed, stage, args)] = stage.name
+                else:
+                    finish(stage.name, "skipped", "a dependency did not succeed")
+
+            if not running:
+                continue
+
+            now = time.monotonic()
+            deadlines = [
+                # Stages still queued in the pool are polled until they start
+                started[name] + by_name[name].timeout - now if name in started else 0.05
+                for name in running.values()
+                if by_name[name].timeout is not None
+            ]
+            done, _ = wait(
+                running, timeout=max(min(deadlines), 0) if deadlines else None,
+                return_when=FIRST_COMPLETED,
+            )
+
+            for future in done:
+                name = running.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    report.results[name] = future.result()
+                    finish(name, "ok")
+                else:
+                    finish(name, "failed", f"{type(exc).__name__}: {exc}")
+
+            now = time.monotonic()
+            for future, name in list(running.items()):
+                timeout = by_name[name].timeout
+                if timeout is not None and name in started and now - started[name] >= timeout:
+                    # The thread cannot be stopped; its result is discarded
+                    del running[future]
+                    finish(name, "timeout", f"timed out after {timeout:g}s")
+    finally:
+        report.elapsed = time.monotonic() - started_run
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return report
@@ -1,22 +1,33 @@
 # analysis/trivy_scan.py
 """Run Trivy on a repo and return SBOM + CVE summary."""
-import json, subprocess, tempfile
+import subprocess, tempfile
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
+
+from analysis.repo_scan.trivy_report import parse_trivy_report
+from analysis.repo_scan.trivy_server import trivy_backend
 
 class TrivyReport(TypedDict):
     sbom: Path          # CycloneDX JSON produced by Syft inside Trivy
     critical: int
     high: int
+    summary: dict[str, Any]   # counts by severity / ecosystem / package / CVE + top-N
 
-def run_trivy(repo: Path) -> TrivyReport:
+def run_trivy(repo: Path, timeout: float | None = None) -> TrivyReport:
+    """*repo* may also be a CycloneDX SBOM file, which is scanned instead of the tree."""
     out = Path(tempfile.mktemp(suffix=".json"))
+    command = "sbom" if Path(repo).is_file() else "fs"
     subprocess.run(
-        ["trivy", "fs", "--format", "json", "--output", out, str(repo)],
+        ["trivy", command, *trivy_backend().scan_args(),
+         "--format", "json", "--output", out, str(repo)],
         check=True,
+        timeout=timeout,
     )
-    data = json.loads(out.read_text())
-    vulns = [v for r in data["Results"] for v in r.get("Vulnerabilities", [])]
-    crit = sum(v["Severity"] == "CRITICAL" for v in vulns)
-    high = sum(v["Severity"] == "HIGH" for v in vulns)
-    return TrivyReport(sbom=out, critical=crit, high=high)
\ No newline at end of file
+    # Streamed: reports of large monorepos do not fit comfortably in memory
+    stats = parse_trivy_report(out)
+    return TrivyReport(
+        sbom=out,
+        critical=stats.severities["critical"],
+        high=stats.severities["high"],
+        summary=stats.as_dict(),
+    )
\ No newline at end of file
@@ -0,0 +1,388 @@
+"""
+Compliance Analysis Benchmarks
+
+Reproducible benchmarks for the compliance hot path:
+
+* ``ComplianceChecker.analyze_code`` on synthetic files from 1 KB to 50 MB
+* ``ComplianceChecker.analyze_tree`` on synthetic trees of 100 to 100k files
+  and on the checked-in ``benchmarks/sample_repo``
+* ``KeywordMatcher`` with and without the Aho-Corasick automaton, for
+  vocabularies of 33 (the built-in pack) to 400 keywords; the crossover
+  sets ``compliance_matcher.AUTOMATON_MIN_KEYWORDS``
+* ``generate_compliance_report``, ``render_policy`` and ``risk_classifier.classify``
+
+Each case runs in its own interpreter so peak RSS is per case. Results
+(throughput in MB/s, files/s or ops/s, and peak RSS) are written as JSON and
+can be compared against an earlier run to flag regressions.
+
+Usage:
+    python -m benchmarks.bench_compliance                       # quick profile
+    python -m benchmarks.bench_compliance --profile full
+    python -m benchmarks.bench_compliance --compare bench_results/baseline.json
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_REPO = Path(__file__).resolve().parent / "sample_repo"
+RESULTS_DIR = ROOT / "bench_results"
+
+KB = 1024
+MB = 1024 * 1024
+
+# Bump when the synthetic corpora change so cached trees are regenerated
+CORPUS_VERSION = 1
+
+PROFILES = {
+    "quick": {
+        "file_sizes": [1 * KB, 64 * KB, 1 * MB, 8 * MB],
+        "tree_files": [100, 1000],
+        "matcher_keywords": [33, 100, 200],
+    },
+    "full": {
+        "file_sizes": [1 * KB, 64 * KB, 1 * MB, 8 * MB, 50 * MB],
+        "tree_files": [100, 1000, 10_000, 100_000],
+        "matcher_keywords": [33, 50, 100, 150, 200, 400],
+    },
+}
+
+# Metrics where a higher value is better; everything else compared is lower-is-better
+_THROUGHPUT = ("mb_per_s", "files_per_s", "ops_per_s")
+_MEMORY = ("peak_rss_mb",)
+
+# Minimum wall time spent on a case when repeating it
+_MIN_TIME = 1.0
+
+_FILLER = (
+    "import numpy as np", "def predict(features):", "return model.predict(features)",
+    "for batch in loader:", "loss = criterion(output, target)", "optimizer.step()",
+    "logger.info('epoch %d', epoch)", "# TODO: refactor", "config = load_config(path)",
+    "if threshold is None:", "raise ValueError('invalid input')", "results.append(row)",
+)
+_EXTENSIONS = (".py", ".py", ".py", ".md", ".js", ".yaml")
+
+
+def _size_label(size: int) -> str:
+    return f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+
+def _keywords() -> List[str]:
+    from tools.compliance_tools import DEFAULT_RULE_PACK
+    return [keyword for rule in DEFAULT_RULE_PACK["rules"] for keyword in rule["keywords"]]
+
+
+def synthetic_text(size: int, seed: int = 0) -> str:
+    """Deterministic code-like text of *size* bytes with rule keywords sprinkled in"""
+    rng = random.Random(seed)
+    keywords = _keywords()
+    lines = []
+    length = 0
+    # Build at most 1 MB of distinct lines, then tile
+    while length < min(size, MB):
+        indent = "    " * rng.randint(0, 3)
+        if rng.random() < 0.01:
+            line = f"{indent}# {rng.choice(keywords)}"
+        else:
+            line = indent + rng.choice(_FILLER)
+        lines.append(line)
+        length += len(line) + 1
+    block = "\n".join(lines) + "\n"
+    return (block * (size // len(block) + 1))[:size]
+
+
+def synthetic_tree(files: int) -> Path:
+    """Return a synthetic repository of *files* files, generating it on first use"""
+    from utils.cache_dir import cache_dir
+
+    corpus = cache_dir("bench_corpora", f"tree-{files}-v{CORPUS_VERSION}")
+    tree = corpus / "tree"
+    marker = corpus / ".complete"
+    if marker.exists():
+        return tree
+
+    rng = random.Random(files)
+    texts = [synthetic_text(size, seed) for seed, size in enumerate((256, 1 * KB, 2 * KB, 4 * KB, 8 * KB))]
+    for i in range(files):
+        directory = tree / f"pkg{i // 1000}" / f"mod{(i // 100) % 10}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i}{rng.choice(_EXTENSIONS)}").write_text(rng.choice(texts))
+    marker.touch()
+    return tree
+
+
+def _tree_size(root: Path) -> Tuple[int, int]:
+    files = 0
+    size = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+
+def _repeat(fn: Callable[[], Any]) -> Tuple[float, int]:
+    """Run *fn* until ``_MIN_TIME`` elapsed; return the best time and the run count"""
+    best = float("inf")
+    runs = 0
+    started = time.perf_counter()
+    while runs < 3 or time.perf_counter() - started < _MIN_TIME:
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+        runs += 1
+        if runs >= 1000:
+            break
+    return best, runs
+
+
+def _ops(fn: Callable[[], Any], batch: int) -> Dict[str, Any]:
+    best, runs = _repeat(lambda: [fn() for _ in range(batch)])
+    return {"seconds": best / batch, "runs": runs * batch, "ops_per_s": batch / best}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cases
+# ──────────────────────────────────────────────────────────────────────────────
+def _case_analyze_code(size: int) -> Dict[str, Any]:
+    from tools.compliance_tools import ComplianceChecker
+
+    checker = ComplianceChecker()
+    text = synthetic_text(size)
+    best, runs = _repeat(lambda: checker.analyze_code(text, "py"))
+    return {"seconds": best, "runs": runs, "bytes": size, "mb_per_s": size / MB / best}
+
+
+def _case_analyze_tree(root: Path, jobs: Optional[int]) -> Dict[str, Any]:
+    from tools.compliance_tools import ComplianceChecker
+
+    checker = ComplianceChecker()
+    files, size = _tree_size(root)
+    t0 = time.perf_counter()
+    summary = checker.analyze_tree(root, jobs=jobs).run()
+    seconds = time.perf_counter() - t0
+    return {
+        "seconds": seconds,
+        "runs": 1,
+        "files": files,
+        "bytes": size,
+        "files_analyzed": summary["files_analyzed"],
+        "files_per_s": files / seconds,
+        "mb_per_s": size / MB / seconds,
+    }
+
+
+def _case_matcher(keywords: int, engine: str, size: int = 2 * MB) -> Dict[str, Any]:
+    from tools import compliance_matcher
+
+    # The built-in keywords, padded with rules that never fire (as most rules
+    # of a large pack do not in a given file)
+    vocabulary = _keywords()
+    vocabulary += [f"rule_{i}_{_FILLER[i % len(_FILLER)].split()[0]}" for i in range(keywords - len(vocabulary))]
+    matcher = compliance_matcher.KeywordMatcher(vocabulary[:keywords])
+    if engine == "automaton":
+        if compliance_matcher.ahocorasick is None:
+            raise RuntimeError("pyahocorasick is not installed")
+        automaton = compliance_matcher.ahocorasick.Automaton()
+        for keyword in matcher.keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        matcher._automaton = automaton
+    else:
+        matcher._automaton = None
+    text = synthetic_text(size)
+    best, runs = _repeat(lambda: matcher.first_offsets(text))
+    return {"seconds": best, "runs": runs, "bytes": size, "mb_per_s": size / MB / best}
+
+
+def _case_generate_compliance_report() -> Dict[str, Any]:
+    from tools.compliance_tools import ComplianceChecker, generate_compliance_report
+
+    findings = ComplianceChecker().analyze_code(synthetic_text(64 * KB), "py")
+    return _ops(lambda: generate_compliance_report(findings), 100)
+
+
+def _case_render_policy() -> Dict[str, Any]:
+    from analysis.report_builder import render_policy
+
+    return _ops(lambda: render_policy(trivy={"critical": 1, "high": 12}, risk="Critical"), 100)
+
+
+def _case_classify() -> Dict[str, Any]:
+    from analysis.risk_classifier import classify
+
+    summaries = [{"critical": c, "high": h} for c in (0, 1) for h in (0, 3, 12)]
+    return _ops(lambda: [classify(s) for s in summaries], 10_000)
+
+
+def _cases(profile: str, jobs: Optional[int]) -> Dict[str, Callable[[], Dict[str, Any]]]:
+    config = PROFILES[profile]
+    cases: Dict[str, Callable[[], Dict[str, Any]]] = {}
+    for size in config["file_sizes"]:
+        cases[f"analyze_code/{_size_label(size)}"] = lambda size=size: _case_analyze_code(size)
+    cases["analyze_tree/sample_repo"] = lambda: _case_analyze_tree(SAMPLE_REPO, jobs)
+    for files in config["tree_files"]:
+        cases[f"analyze_tree/{files}_files"] = lambda files=files: _case_analyze_tree(synthetic_tree(files), jobs)
+    for keywords in config["matcher_keywords"]:
+        for engine in ("find", "automaton"):
+            cases[f"matcher/{engine}/{keywords}_keywords"] = (
+                lambda keywords=keywords, engine=engine: _case_matcher(keywords, engine)
+            )
+    cases["generate_compliance_report"] = _case_generate_compliance_report
+    cases["render_policy"] = _case_render_policy
+    cases["classify"] = _case_classify
+    return cases
+
+
+def _peak_rss_mb(who: int) -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (MB if sys.platform == "darwin" else KB), 1)
+
+
+def _run_case(name: str, profile: str, jobs: Optional[int]) -> Dict[str, Any]:
+    """Run one case in this process (called in a fresh interpreter by ``run``)"""
+    try:
+        result = _cases(profile, jobs)[name]()
+    except Exception as exc:
+        result = {"error": f"{type(exc).__name__}: {exc}"}
+    result["peak_rss_mb"] = _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+    workers = _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+    if workers:
+        result["peak_rss_workers_mb"] = workers
+    return result
+
+
+def run(profile: str = "quick", only: Optional[str] = None, jobs: Optional[int] = None) -> Dict[str, Any]:
+    """Run every case of a profile, each in its own interpreter"""
+    results = {}
+    for name in _cases(profile, jobs):
+        if only and not fnmatch.fnmatch(name, only):
+            continue
+        cmd = [sys.executable, "-m", "benchmarks.bench_compliance", "--profile", profile, "--case", name]
+        if jobs:
+            cmd += ["--jobs", str(jobs)]
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1:] or "failed"}
+        else:
+            results[name] = json.loads(proc.stdout)
+        print(f"{name:40s} {_format(results[name])}", file=sys.stderr)
+
+    return {"meta": _meta(profile, jobs), "results": results}
+
+
+def _meta(profile: str, jobs: Optional[int]) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "-C", str(ROOT), "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "profile": profile,
+        "jobs": jobs or os.cpu_count(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _format(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return f"ERROR {result['error']}"
+    parts = []
+    for metric, unit in (("mb_per_s", "MB/s"), ("files_per_s", "files/s"), ("ops_per_s", "ops/s")):
+        if metric in result:
+            parts.append(f"{result[metric]:,.1f} {unit}")
+    if result.get("peak_rss_mb") is not None:
+        parts.append(f"peak RSS {result['peak_rss_mb']:,.1f} MB")
+    return "  ".join(parts)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.15) -> List[str]:
+    """
+    Compare two result files.
+
+    Args:
+        baseline: Results of an earlier run
+        current: Results of this run
+        threshold: Relative change tolerated before flagging a regression
+
+    Returns:
+        One message per regression (empty when there is none)
+    """
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or "error" in old:
+            continue
+        if "error" in new:
+            regressions.append(f"{name}: now failing ({new['error']})")
+            continue
+        for metric in _THROUGHPUT:
+            if old.get(metric) and metric in new and new[metric] < old[metric] * (1 - threshold):
+                regressions.append(
+                    f"{name}: {metric} {old[metric]:,.1f} -> {new[metric]:,.1f} "
+                    f"({new[metric] / old[metric] - 1:+.0%})"
+                )
+        for metric in _MEMORY:
+            if old.get(metric) and new.get(metric) and new[metric] > old[metric] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {metric} {old[metric]:,.1f} -> {new[metric]:,.1f} "
+                    f"({new[metric] / old[metric] - 1:+.0%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the compliance analysis hot path")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", help="Run only the cases matching this glob, e.g. 'analyze_code/*'")
+    parser.add_argument("--jobs", type=int, help="Worker processes for tree cases")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON results")
+    parser.add_argument("--compare", type=Path, help="Earlier results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown (or RSS growth) flagged as a regression")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        print(json.dumps(_run_case(args.case, args.profile, args.jobs)))
+        return 0
+
+    report = run(args.profile, args.only, args.jobs)
+    output = args.output or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
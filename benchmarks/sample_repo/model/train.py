@@ -0,0 +1,38 @@
+"""Train the loan scoring model.
+
+Data governance: training data is versioned and its provenance recorded in
+the ai_inventory. See docs/risk_assessment.md for the risk_assessment.
+"""
+
+import json
+import random
+from pathlib import Path
+
+FEATURES = ["income", "debt_ratio", "employment_years", "credit_history"]
+
+
+def load_dataset(path: Path):
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    # data_quality_assessment: drop incomplete rows
+    return [row for row in rows if all(k in row for k in FEATURES + ["label"])]
+
+
+def train(rows, epochs: int = 10, lr: float = 0.01):
+    weights = {name: 0.0 for name in FEATURES}
+    for _ in range(epochs):
+        random.shuffle(rows)
+        for row in rows:
+            score = sum(weights[k] * row[k] for k in FEATURES)
+            error = row["label"] - score
+            for k in FEATURES:
+                weights[k] += lr * error * row[k]
+    return weights
+
+
+def model_validation(weights, rows):
+    """Accuracy_metrics reported to the model card."""
+    hits = sum(
+        (sum(weights[k] * r[k] for k in FEATURES) > 0.5) == bool(r["label"]) for r in rows
+    )
+    return hits / max(len(rows), 1)
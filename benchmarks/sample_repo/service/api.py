@@ -0,0 +1,28 @@
+"""Scoring API.
+
+Decisions about essential_services (credit) are high risk; every request is
+logged (logging_capabilities) and flagged for human_oversight when the score
+is close to the threshold.
+"""
+
+import logging
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+log = logging.getLogger("scoring")
+THRESHOLD = 0.5
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        score = min(len(body) / 1000, 1.0)
+        needs_review = abs(score - THRESHOLD) < 0.05
+        log.info("score=%.3f review=%s", score, needs_review)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'{"score": %.3f, "review": %s}' % (score, b"true" if needs_review else b"false"))
+
+
+if __name__ == "__main__":
+    HTTPServer(("", 8080), Handler).serve_forever()
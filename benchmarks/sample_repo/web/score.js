@@ -0,0 +1,10 @@
+// Minimal client for the scoring API
+export async function score(applicant) {
+  const res = await fetch("/score", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(applicant),
+  });
+  if (!res.ok) throw new Error(`scoring failed: ${res.status}`);
+  return res.json();
+}
@@ -6,13 +6,18 @@ Streamlit front-end for the AI-Compliance MVP
 2. Trigger the analysis pipeline (repo-scan ➜ risk classification).
 3. Render a Markdown policy using Jinja2 templates.
 4. Offer a ZIP download and (later) open a Pull Request automatically.
+
+The ZIP is compressed in the background into a spooled temporary file while
+the policy renders. ``st.download_button`` only takes the archive as bytes
+(it rejects spooled files) and keeps it in memory for the session, so it is
+read once when the pack is done; the archive stays private to the user who
+ran the scan.
 """
 
 from __future__ import annotations
 
-import io
+import json
 import os
-import zipfile
 from pathlib import Path
 
 import streamlit as st  # ← MUST be imported before any st.* call!
@@ -21,8 +26,12 @@ import streamlit as st  # ← MUST be imported before any st.* call!
 # Local packages (added in the previous steps)
 # ───────────────────────────────────────────────────────────────
 from analysis.runner import run_full_scan        # end-to-end pipeline
+from analysis.history import history_store         # persistent scan history
+from analysis.repo_scan import clone_repo, mirror_pool
+from analysis.repo_scan.manifests import build_sbom  # Trivy-free dependency list
 from analysis.report_builder import render_policy  # fills POLICY.md
 from utils.cost_logger import cost_section         # nice Streamlit UX
+from utils.zip_pack import ZipPack                 # background ZIP builder
 
 # ───────────────────────────────────────────────────────────────
 # Streamlit configuration
@@ -56,6 +65,7 @@ with st.sidebar:
 
     st.markdown("---")
     run_btn = st.button("🚀 Generate Compliance Pack", use_container_width=True)
+    quick_btn = st.button("⚡ Quick dependency list", use_container_width=True)
 
 # ───────────────────────────────────────────────────────────────
 # Helper functions
@@ -69,15 +79,48 @@ def log_step(msg: str) -> None:
     log_placeholder.markdown(f"• {msg}")
 
 
-def build_zip(files: dict[str, str]) -> bytes:
-    """Return an in-memory ZIP archive built from {name: content}."""
-    buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, mode="w") as zf:
-        for name, data in files.items():
-            zf.writestr(name, data)
-    return buffer.getvalue()
+def start_pack(sbom_path: str) -> ZipPack:
+    """Start compressing the evidence (SBOM + Trivy report) in the background."""
+    pack = ZipPack()
+    pack.add_file("sbom.json", sbom_path)
+    vulns = Path(sbom_path).with_suffix(".vulns.json")
+    if vulns.exists():
+        pack.add_file("trivy-report.json", vulns)
+    return pack
 
 
+# ───────────────────────────────────────────────────────────────
+# Quick check: dependencies straight from the manifests (no Trivy)
+# ───────────────────────────────────────────────────────────────
+if quick_btn:
+    if not repo_url:
+        st.error("Please enter a repository URL.")
+        st.stop()
+
+    with cost_section("⚡ Reading dependency manifests"):
+        try:
+            repo = clone_repo(repo_url, gh_token or None, profile="manifests")
+            try:
+                sbom = build_sbom(repo)
+            finally:
+                mirror_pool().release(repo)
+        except Exception as exc:
+            st.exception(exc)
+            st.stop()
+
+    output_placeholder.success(f"✅ {len(sbom['components'])} dependencies")
+    output_placeholder.dataframe(
+        [{"name": c["name"], "version": c.get("version", ""), "purl": c["purl"]}
+         for c in sbom["components"]],
+        use_container_width=True,
+    )
+    st.download_button(
+        "📄 Download SBOM (CycloneDX)",
+        data=json.dumps(sbom, indent=2),
+        file_name="sbom.json",
+        mime="application/json",
+    )
+
 # ───────────────────────────────────────────────────────────────
 # Main execution: runs after the button is pressed
 # ───────────────────────────────────────────────────────────────
@@ -92,17 +135,27 @@ if run_btn:
     ################################################################
     with cost_section("🔍 Cloning repository & generating SBOM"):
         try:
-            scan_out = run_full_scan(repo_url, gh_token)
+            scan_out = run_full_scan(repo_url, gh_token, history=history_store())
             # Expected keys: sbom_path • governance • trivy • scorecard • risk
         except Exception as exc:
             st.exception(exc)
             st.stop()
 
-    ################################################################
-    # 2) Policy generation (Jinja2 template)
-    ################################################################
-    with cost_section("📝 Building compliance policy"):
-        policy_md: str = render_policy(**scan_out)
+    # Evidence files compress in the background while the policy renders;
+    # the pack is discarded if anything below fails before it is closed
+    with start_pack(scan_out["sbom_path"]) as pack:
+        ################################################################
+        # 2) Policy generation (Jinja2 template)
+        ################################################################
+        with cost_section("📝 Building compliance policy"):
+            policy_md: str = render_policy(**scan_out)
+        pack.add_text("POLICY.md", policy_md)
+
+        # The one in-memory copy: download_button stores its data as bytes
+        # and does not accept a SpooledTemporaryFile (nor the file it rolls
+        # over to), so the spooled archive cannot be handed over as-is
+        with pack.close() as archive:
+            pack_zip = archive.read()
 
     ################################################################
     # 3) Pull-Request creation (optional – TODO)
@@ -115,16 +168,10 @@ if run_btn:
     output_placeholder.success("✅ Finished!")
     output_placeholder.markdown(policy_md)
 
-    # Prepare ZIP with the policy and raw evidence (SBOM)
-    zip_bytes = build_zip(
-        {
-            "POLICY.md": policy_md,
-            "sbom.json": Path(scan_out["sbom_path"]).read_text(encoding="utf-8"),
-        }
-    )
+    # ZIP with the policy and raw evidence (SBOM + Trivy report)
     st.download_button(
         "📦 Download ZIP",
-        data=zip_bytes,
+        data=pack_zip,
         file_name="compliance_pack.zip",
         mime="application/zip",
     )
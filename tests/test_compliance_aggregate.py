@@ -0,0 +1,23 @@
+from tools.compliance_aggregate import FindingsAggregate
+from tools.compliance_tools import ComplianceChecker
+
+
+def test_groups_render_like_single_findings():
+    checker = ComplianceChecker()
+    results = {
+        f"f{i}.py": checker.evaluate(checker.find_keywords(text), "py")
+        for i, text in enumerate(["social_scoring()", "social_scoring(); ai_policy", "x = 1"])
+    }
+    aggregate = FindingsAggregate()
+    for path, result in results.items():
+        aggregate.add(path, result)
+
+    groups = aggregate.as_dict()
+    assert groups["files"] == 3 and groups["overall_risk"] == "high"
+    [prohibited] = [g for g in groups["ai_act"] if g["type"] == "prohibited_system"]
+    first = results["f0.py"]
+    [finding] = [f for f in first.findings if first.rule(f).type == "prohibited_system"]
+    assert prohibited == {
+        "standard": "ai_act", **first.finding_dict(finding),
+        "count": 2, "locations": ["f0.py", "f1.py"],
+    }
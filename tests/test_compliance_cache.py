@@ -0,0 +1,30 @@
+from tools.compliance_cache import FindingsCache
+
+
+def _stored_bytes(cache):
+    return cache.conn.execute("SELECT SUM(size) FROM findings").fetchone()[0]
+
+
+def test_replacing_an_entry_keeps_the_size_counter_exact(tmp_path):
+    cache = FindingsCache(tmp_path / "findings.sqlite")
+    cache.put("d1", "r1", "py", ["ai_policy"])
+    cache.commit()  # starts tracking the total size
+
+    for _ in range(100):
+        cache.put("d1", "r1", "py", ["ai_policy", "risk_assessment"])
+    cache.put("d2", "r1", "py", [])
+    cache.commit()
+
+    assert cache._total_bytes == _stored_bytes(cache)
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = FindingsCache(tmp_path / "findings.sqlite", max_bytes=100)
+    cache.commit()
+    for i in range(20):
+        cache.put(f"d{i}", "r1", "py", ["data_protection"])
+        cache.commit()
+
+    assert cache._total_bytes == _stored_bytes(cache) <= 100
+    assert cache.get("d19", "r1", "py") == ["data_protection"]
+    assert cache.get("d0", "r1", "py") is None
@@ -0,0 +1,107 @@
+import random
+
+from tools.compliance_tools import AI_ACT_REQUIREMENTS, ISO_42001_REQUIREMENTS, ComplianceChecker
+
+# ── The original per-keyword analyzer, kept as the reference for the dict shape ──
+_PRESENT = {
+    "high_risk_systems": ("high_risk_system", "Potential high-risk AI system identified",
+                          "Conduct a full impact assessment and ensure all documentation requirements are met"),
+    "prohibited_systems": ("prohibited_system", "Potential prohibited AI practice identified",
+                           "Remove or substantially modify this functionality to comply with AI Act"),
+}
+_MISSING = {
+    ("ai_act", "documentation_requirements"): (
+        "documentation", "medium", "Missing documentation elements",
+        "Add comments or documentation addressing these missing elements"),
+    ("iso_42001", "governance"): (
+        "governance", "medium", "Missing governance elements",
+        "Implement governance controls for these elements"),
+    ("iso_42001", "documentation"): (
+        "documentation", "low", "Missing ISO 42001 documentation elements",
+        "Add documentation for these elements"),
+    ("iso_42001", "operational_controls"): (
+        "operational_controls", "medium", "Missing operational controls",
+        "Implement operational controls for these elements"),
+}
+
+
+def _missing(standard, group, text):
+    kind, risk, description, recommendation = _MISSING[standard, group]
+    requirements = AI_ACT_REQUIREMENTS if standard == "ai_act" else ISO_42001_REQUIREMENTS
+    missing = [k for k in requirements[group] if k not in text and f"document_{k}" not in text]
+    if not missing:
+        return []
+    return [{"type": kind, "missing_elements": missing, "risk_level": risk,
+             "description": f"{description}: {', '.join(missing)}", "recommendation": recommendation}]
+
+
+def _present(group, text):
+    kind, description, recommendation = _PRESENT[group]
+    return [{"type": kind, "category": k, "risk_level": "high",
+             "description": f"{description}: {k}", "recommendation": recommendation}
+            for k in AI_ACT_REQUIREMENTS[group] if k in text]
+
+
+def baseline_analyze_code(code_content):
+    text = code_content.lower()
+    findings = {
+        "ai_act": _present("high_risk_systems", text)
+        + _missing("ai_act", "documentation_requirements", text)
+        + _present("prohibited_systems", text),
+        "iso_42001": _missing("iso_42001", "governance", text)
+        + _missing("iso_42001", "documentation", text)
+        + _missing("iso_42001", "operational_controls", text),
+    }
+    levels = [f["risk_level"] for category in findings.values() for f in category]
+    risk = "high" if "high" in levels else "medium" if "medium" in levels else "low"
+    findings["overall_risk"] = risk
+    summary = (f"Compliance Analysis Summary:\n- Overall Risk Level: {risk.upper()}\n"
+               f"- EU AI Act Issues: {len(findings['ai_act'])}\n"
+               f"- ISO 42001 Issues: {len(findings['iso_42001'])}\n\n")
+    summary += {
+        "high": "URGENT: This code contains high-risk elements that require immediate attention for regulatory compliance.",
+        "medium": "ATTENTION NEEDED: Several compliance issues need to be addressed before production deployment.",
+        "low": "MINOR ISSUES: Low-risk compliance issues identified, consider addressing them in future updates.",
+    }[risk]
+    findings["summary"] = summary
+    return findings
+
+
+KEYWORDS = [k for requirements in (AI_ACT_REQUIREMENTS, ISO_42001_REQUIREMENTS)
+            for group in requirements.values() for k in group]
+
+
+def _texts(count=300, seed=3):
+    rng = random.Random(seed)
+    words = KEYWORDS + ["model", "def", "\n", "Document_Risk_Assessment", "SOCIAL_SCORING"]
+    yield ""
+    yield " ".join(KEYWORDS)
+    yield " ".join(k for k in KEYWORDS if k not in AI_ACT_REQUIREMENTS["high_risk_systems"]
+                   and k not in AI_ACT_REQUIREMENTS["prohibited_systems"])
+    for _ in range(count):
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(0, 50)))
+
+
+def test_as_dict_matches_the_original_analyzer():
+    checker = ComplianceChecker()
+    risks = set()
+    for text in _texts():
+        expected = baseline_analyze_code(text)
+        result = checker.analyze_code(text)
+        assert result == expected
+        assert list(result) == list(expected)
+        assert [list(f) for f in result["ai_act"]] == [list(f) for f in expected["ai_act"]]
+        risks.add(result["overall_risk"])
+    assert risks == {"low", "medium", "high"}
+
+
+def test_compact_result_renders_the_same_findings():
+    checker = ComplianceChecker()
+    for text in _texts(50, seed=11):
+        result = checker.analyze(text)
+        expected = baseline_analyze_code(text)
+        for standard in ("ai_act", "iso_42001"):
+            rendered = [result.finding_dict(f) for f in result.findings if result.rule(f).standard == standard]
+            assert rendered == expected[standard]
+        assert result.overall_risk == expected["overall_risk"]
+        assert result.summary == expected["summary"]
@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from tools import compliance_matcher
+from tools.compliance_matcher import KeywordMatcher
+from tools.compliance_tools import AI_ACT_REQUIREMENTS, ISO_42001_REQUIREMENTS
+
+KEYWORDS = [
+    keyword
+    for requirements in (AI_ACT_REQUIREMENTS, ISO_42001_REQUIREMENTS)
+    for group in requirements.values()
+    for keyword in group
+] + ["risk", "data", "ai"]   # keywords that overlap the longer ones
+
+
+def _fallback(keywords):
+    """Matcher forced onto the str.find path"""
+    matcher = KeywordMatcher(keywords)
+    matcher._automaton = None
+    return matcher
+
+
+def _texts(count=200, seed=42):
+    rng = random.Random(seed)
+    words = KEYWORDS + ["model", "def", "class", "\n", "#", "Éüß", "AI_Policy", "RISK"]
+    for _ in range(count):
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(0, 60)))
+
+
+def test_automaton_matches_fallback(monkeypatch):
+    pytest.importorskip("ahocorasick")
+    monkeypatch.setattr(compliance_matcher, "AUTOMATON_MIN_KEYWORDS", 1)
+    automaton, fallback = KeywordMatcher(KEYWORDS), _fallback(KEYWORDS)
+    assert automaton._automaton is not None
+
+    for text in _texts():
+        assert sorted(automaton.iter_matches(text)) == sorted(fallback.iter_matches(text))
+        assert automaton.first_offsets(text) == fallback.first_offsets(text)
+
+
+def test_automaton_only_for_large_vocabularies():
+    pytest.importorskip("ahocorasick")
+    assert KeywordMatcher(KEYWORDS)._automaton is None
+    many = [f"rule_{i}" for i in range(compliance_matcher.AUTOMATON_MIN_KEYWORDS)]
+    assert KeywordMatcher(many)._automaton is not None
+
+
+def test_fallback_without_extension(monkeypatch):
+    monkeypatch.setattr(compliance_matcher, "ahocorasick", None)
+    matcher = KeywordMatcher(["Risk_Assessment", "ai_policy", "risk"])
+
+    assert matcher._automaton is None
+    assert matcher.keywords == ("risk_assessment", "ai_policy", "risk")
+    text = "# RISK_ASSESSMENT done, see ai_policy and risk_assessment"
+    assert sorted(matcher.iter_matches(text)) == [
+        (2, "risk"), (2, "risk_assessment"), (28, "ai_policy"),
+        (42, "risk"), (42, "risk_assessment"),
+    ]
+    assert matcher.first_offsets(text) == {"risk_assessment": 2, "risk": 2, "ai_policy": 28}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 16, 64])
+def test_stream_matches_whole_text(chunk_size):
+    matcher = KeywordMatcher(KEYWORDS)
+    for text in _texts(50):
+        chunks = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+        assert matcher.first_offsets_stream(chunks) == matcher.first_offsets(text)
+
+
+def test_pickled_matcher_rebuilds_automaton(monkeypatch):
+    import pickle
+
+    monkeypatch.setattr(compliance_matcher, "AUTOMATON_MIN_KEYWORDS", 1)
+    matcher = pickle.loads(pickle.dumps(KeywordMatcher(KEYWORDS)))
+    assert matcher.first_offsets("ai_policy and data_protection") == {
+        "ai_policy": 0, "ai": 0, "data_protection": 14, "data": 14,
+    }
@@ -0,0 +1,38 @@
+import random
+
+from tools.compliance_tools import ComplianceChecker
+
+CHECKER = ComplianceChecker()
+KEYWORDS = [keyword for rule in CHECKER.rules for keyword in rule.keywords]
+
+
+def _texts(count=200, seed=7):
+    rng = random.Random(seed)
+    words = KEYWORDS + ["model", "def", "class", "\n", "#", "Éüß", "RISK_ASSESSMENT"]
+    yield ""
+    yield " ".join(KEYWORDS)
+    for _ in range(count):
+        yield " ".join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+
+
+def test_matrix_matches_analyze_code():
+    texts = list(_texts())
+    matrix = CHECKER.analyze_many(texts)
+    risks = matrix.overall_risk()
+    issues = matrix.issue_counts()
+    missing = matrix.missing_counts()
+    assert len(matrix) == len(texts)
+
+    for i, text in enumerate(texts):
+        expected = CHECKER.analyze_code(text)
+        assert risks[i] == expected["overall_risk"]
+        for standard, counts in issues.items():
+            assert counts[i] == len(expected[standard])
+        for rule in CHECKER.rules:
+            if rule.trigger != "missing":
+                continue
+            reported = [
+                finding["missing_elements"] for finding in expected[rule.standard]
+                if finding["type"] == rule.type and "missing_elements" in finding
+            ]
+            assert missing[f"{rule.standard}.{rule.group}"][i] == sum(map(len, reported))
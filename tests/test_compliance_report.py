@@ -0,0 +1,80 @@
+import io
+import json
+import time
+
+import pytest
+
+from tools import compliance_report
+from tools.compliance_report import NDJSONReportWriter, write_scan_report
+from tools.compliance_tools import ComplianceChecker
+
+FILES = {"app.py": "social_scoring(); ai_policy", "docs/README.md": "risk_assessment", "x.py": "x = 1"}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(compliance_report, "orjson", None)
+    return request.param
+
+
+def _repo(tmp_path):
+    root = tmp_path / "repo"
+    for name, text in FILES.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+    return root
+
+
+def _records(data):
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def test_writer_roundtrip(encoder):
+    out = io.BytesIO()
+    record = {"path": "é.py", "count": 3, "nested": {"ok": True, "none": None}, "when": time}
+    with NDJSONReportWriter(out) as writer:
+        writer.header(ruleset="v1")
+        writer.write(record)
+        writer.summary({"files": 1})
+
+    header, written, summary = _records(out.getvalue())
+    assert header["record"] == "header" and header["ruleset"] == "v1"
+    assert written == {**record, "when": str(time)}
+    assert summary == {"record": "summary", "files": 1}
+    assert writer.records == 3
+
+
+@pytest.mark.parametrize("aggregate", [False, True])
+def test_scan_report_roundtrip(tmp_path, encoder, aggregate):
+    root = _repo(tmp_path)
+    checker = ComplianceChecker()
+    out = tmp_path / "report.ndjson"
+    summary = write_scan_report(checker.analyze_tree(root, jobs=1), out, aggregate=aggregate)
+
+    records = _records(out.read_text(encoding="utf-8"))
+    assert records[0]["record"] == "header" and records[0]["root"] == str(root)
+    assert records[0]["ruleset"] == checker.ruleset_version
+    assert records[-1] == {"record": "summary", **json.loads(json.dumps(summary))}
+    if aggregate:
+        assert {r["record"] for r in records[1:-1]} == {"group", "recommendations"}
+    else:
+        findings = [r for r in records if r["record"] == "finding"]
+        expected = sum(len(v) for text in FILES.values()
+                       for k, v in checker.analyze_code(text).items() if k in ("ai_act", "iso_42001"))
+        assert len(findings) == expected
+        assert {r["path"] for r in findings} == set(FILES)
+
+
+def test_stalled_writer_is_flushed_by_the_timer(tmp_path):
+    out = tmp_path / "report.ndjson"
+    with NDJSONReportWriter(out, flush_interval=0.05) as writer:
+        writer.header()
+        writer.write({"record": "finding", "path": "a.py"})
+        deadline = time.monotonic() + 5
+        while len(out.read_bytes().splitlines()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(out.read_bytes().splitlines()) == 2
+    assert not writer._timer.is_alive()
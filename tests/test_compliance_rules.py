@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from tools import compliance_rules
+from tools.compliance_rules import load_rule_pack
+from tools.compliance_tools import DEFAULT_RULE_PACK, ComplianceChecker
+
+RULE = {
+    "standard": "ai_act", "group": "custom", "type": "custom", "trigger": "present",
+    "risk_level": "high", "description": "Found: {elements}", "recommendation": "Review it",
+    "keywords": ["patient_triage"],
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_packs(monkeypatch):
+    monkeypatch.setattr(compliance_rules, "_loaded", {})
+
+
+def _artifacts(tmp_path):
+    return list((tmp_path / "cache" / "rule_packs").glob("*.json"))
+
+
+def test_artifact_is_reused(tmp_path, monkeypatch):
+    source = tmp_path / "pack.yaml"
+    source.write_text(json.dumps({"name": "p", "rules": [RULE]}))
+    pack = load_rule_pack(source)
+    [artifact] = _artifacts(tmp_path)
+    assert json.loads(artifact.read_text())["rules"] == [RULE]
+
+    def no_parse(*args):
+        raise AssertionError("pack source parsed again")
+
+    monkeypatch.setattr(compliance_rules, "_loaded", {})
+    monkeypatch.setattr(compliance_rules, "_parse", no_parse)
+    reloaded = load_rule_pack(source)
+    assert (reloaded.name, reloaded.version, reloaded.rules) == (pack.name, pack.version, pack.rules)
+    assert reloaded.matcher.first_offsets("x = patient_triage") == {"patient_triage": 4}
+
+
+def test_unusable_cache_dir_compiles_in_memory(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setenv("COMPLIANCE_CACHE_DIR", str(blocker / "cache"))
+
+    checker = ComplianceChecker()
+    assert checker.find_keywords("social_scoring") == {"social_scoring": 0}
+
+
+def test_unwritable_artifact_compiles_in_memory(monkeypatch):
+    def fail(*args, **kwargs):
+        raise PermissionError("read-only cache")
+
+    monkeypatch.setattr(compliance_rules.tempfile, "mkstemp", fail)
+    assert load_rule_pack(DEFAULT_RULE_PACK).rules
+
+
+@pytest.mark.parametrize("content", [
+    b"", b"\x80\x04\x95garbage", b"[]", b'{"format": 2}',
+    json.dumps({"format": 2, "name": "p", "version": "v", "rules": [dict(RULE, keywords="abc")]}).encode(),
+])
+def test_corrupt_artifact_is_recompiled(tmp_path, content):
+    load_rule_pack({"name": "p", "rules": [RULE]})
+    [artifact] = _artifacts(tmp_path)
+    artifact.write_bytes(content)
+
+    compliance_rules._loaded.clear()
+    pack = load_rule_pack({"name": "p", "rules": [RULE]})
+    assert pack.rules == [RULE]
+    assert json.loads(artifact.read_text())["rules"] == [RULE]
+
+
+def test_string_keywords_are_rejected():
+    with pytest.raises(ValueError, match="keywords"):
+        load_rule_pack({"rules": [dict(RULE, keywords="patient_triage")]})
@@ -0,0 +1,65 @@
+import pytest
+
+from tools import compliance_tree
+from tools.compliance_tools import ComplianceChecker
+from tools.compliance_tree import analyze_tree
+from tools.compliance_triage import Triage
+
+
+class _FlakyChecker(ComplianceChecker):
+    def find_keywords(self, content):
+        if "boom" in content:
+            raise RuntimeError("checker bug")
+        return super().find_keywords(content)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_failing_file_does_not_abort_batch(tmp_path, jobs):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("ai_policy = True\n")
+    (repo / "b.py").write_text("boom\n")
+    (repo / "c.py").write_text("risk_assessment()\n")
+
+    scan = analyze_tree(repo, jobs=jobs, checker=_FlakyChecker(), triage=False)
+    assert sorted(path for path, _ in scan) == ["a.py", "c.py"]
+    assert scan.summary["files_analyzed"] == 2
+    assert scan.summary["files_failed"] == 1
+    assert scan.summary["failures"] == [{"path": "b.py", "error": "RuntimeError: checker bug"}]
+
+
+class _StreamingChecker(ComplianceChecker):
+    def __init__(self):
+        super().__init__()
+        self.streamed = []
+
+    def find_keywords_in_file(self, path, chunk_size=1024):
+        self.streamed.append(path.rsplit("/", 1)[-1])
+        return super().find_keywords_in_file(path, chunk_size)
+
+
+def test_default_triage_streams_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(compliance_tree, "STREAM_THRESHOLD", 4096)
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "big.py").write_text("x = 1\n" * 2000 + "social_scoring()\n")
+    (repo / "small.py").write_text("social_scoring()\n")
+
+    checker = _StreamingChecker()
+    results = dict(analyze_tree(repo, jobs=1, checker=checker))
+    assert checker.streamed == ["big.py"]
+    assert results["big.py"].found_keywords() == results["small.py"].found_keywords()
+
+
+def test_default_limits_stream_before_skipping():
+    # Files between the two limits are analyzed in chunks, not dropped
+    assert Triage().max_size > compliance_tree.STREAM_THRESHOLD
+
+
+def test_files_over_the_size_limit_are_skipped(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "big.py").write_text("social_scoring()\n" * 100)
+    scan = analyze_tree(repo, jobs=1, triage=Triage(max_size=1000))
+    assert list(scan) == []
+    assert scan.summary["skipped"]["too_large"] == {"files": 1, "bytes": 1700, "dirs": 0}
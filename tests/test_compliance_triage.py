@@ -0,0 +1,150 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from tools.compliance_triage import DEFAULT_IGNORE, IgnoreRules, Triage
+
+# (pattern, path, is_dir, ignored by git)
+GITIGNORE_CASES = [
+    ("*.log", "debug.log", False, True),
+    ("*.log", "logs/debug.log", False, True),
+    ("*.log", "debug.log.txt", False, False),
+    ("build/", "build", True, True),
+    ("build/", "build", False, False),
+    ("build/", "src/build", True, True),
+    ("/build", "build", False, True),
+    ("/build", "src/build", False, False),
+    ("doc/*.txt", "doc/notes.txt", False, True),
+    ("doc/*.txt", "doc/server/arch.txt", False, False),
+    ("doc/*.txt", "src/doc/notes.txt", False, False),
+    ("**/foo", "foo", False, True),
+    ("**/foo", "a/b/foo", False, True),
+    ("a/**/b", "a/b", False, True),
+    ("a/**/b", "a/x/y/b", False, True),
+    ("a/**/b", "x/a/b", False, False),
+    ("abc/**", "abc/x", False, True),
+    ("abc/**", "abc/x/y", False, True),
+    ("file?.py", "file1.py", False, True),
+    ("file?.py", "file10.py", False, False),
+    ("file?.py", "dir/file1.py", False, True),
+    ("[ab].py", "a.py", False, True),
+    ("[ab].py", "c.py", False, False),
+    ("[!ab].py", "c.py", False, True),
+    ("[!ab].py", "a.py", False, False),
+    ("[a!].py", "!.py", False, True),      # only a leading ! negates
+    ("[a!].py", "b.py", False, False),
+    ("[^a].py", "b.py", False, True),
+    ("[a^].py", "^.py", False, True),
+    ("[]a].py", "].py", False, True),      # a leading ] is literal
+    ("[!]].py", "].py", False, False),
+    ("\\#hash", "#hash", False, True),
+    ("name.py", "sub/name.py", False, True),
+    ("name.py", "name.pyc", False, False),
+    ("a.b", "axb", False, False),
+]
+
+
+@pytest.mark.parametrize("pattern, path, is_dir, ignored", GITIGNORE_CASES)
+def test_pattern_translation(pattern, path, is_dir, ignored):
+    assert bool(IgnoreRules([pattern]).match(path, is_dir)) is ignored
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+@pytest.mark.parametrize("pattern, path, is_dir, ignored", GITIGNORE_CASES)
+def test_cases_agree_with_git(tmp_path, pattern, path, is_dir, ignored):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    (tmp_path / ".gitignore").write_text(pattern + "\n")
+    target = tmp_path / path
+    if is_dir:
+        target.mkdir(parents=True)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("")
+    checked = subprocess.run(["git", "-C", str(tmp_path), "check-ignore", "-q", path])
+    assert (checked.returncode == 0) is ignored
+
+
+def test_negation_reincludes():
+    rules = IgnoreRules(["*.log", "!keep.log", "# comment", ""])
+    assert rules.match("a.log", False) is True
+    assert rules.match("keep.log", False) is False
+    assert rules.match("a.py", False) is None
+
+
+def test_base_directory_scopes_rules():
+    rules = IgnoreRules(["/out", "*.tmp"], base="pkg")
+    assert rules.match("pkg/out", True) is True
+    assert rules.match("out", True) is None
+    assert rules.match("pkg/sub/out", True) is None
+    assert rules.match("pkg/sub/x.tmp", False) is True
+
+
+def test_combined_default_rules_match_one_by_one():
+    combined = IgnoreRules(DEFAULT_IGNORE)
+    one_by_one = [IgnoreRules([pattern]) for pattern in DEFAULT_IGNORE]
+    paths = ["src/app.py", "node_modules", "web/node_modules", "dist", "x.min.js", "a/b.png",
+             "yarn.lock", "pkg/api_pb2.py", "build", "README.md", "model.onnx", "vendor"]
+    for path in paths:
+        for is_dir in (False, True):
+            expected = any(rules.match(path, is_dir) for rules in one_by_one) or None
+            assert combined.match(path, is_dir) is expected, (path, is_dir)
+
+
+def _tree(root, files):
+    for rel_path, content in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+
+def test_walk_honours_gitignore_files(tmp_path):
+    _tree(tmp_path, {
+        ".gitignore": b"*.csv\n/secret/\n",
+        "app.py": b"x", "data.csv": b"1,2",
+        "secret/key.py": b"k",
+        "pkg/.gitignore": b"!keep.csv\ngen/\n",
+        "pkg/keep.csv": b"kept", "pkg/gen/out.py": b"g", "pkg/mod.py": b"m",
+        "node_modules/lib/index.js": b"n",
+    })
+    triage = Triage()
+    assert list(triage.walk(tmp_path)) == [".gitignore", "app.py", "pkg/.gitignore",
+                                           "pkg/keep.csv", "pkg/mod.py"]
+    assert triage.stats["gitignored"] == {"files": 1, "bytes": 3, "dirs": 2}
+    assert triage.stats["ignored"] == {"files": 0, "bytes": 0, "dirs": 1}
+
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() == 0, reason="needs a non-root POSIX user")
+def test_unreadable_directory_is_skipped(tmp_path):
+    _tree(tmp_path, {"ok.py": b"x", "locked/a.py": b"y"})
+    (tmp_path / "locked").chmod(0)
+    try:
+        triage = Triage()
+        assert list(triage.walk(tmp_path)) == ["ok.py"]
+        assert triage.stats["unreadable"]["dirs"] == 1
+    finally:
+        (tmp_path / "locked").chmod(0o755)
+
+
+def test_unreadable_directory_does_not_abort_walk(tmp_path, monkeypatch):
+    _tree(tmp_path, {"ok.py": b"x", "locked/a.py": b"y"})
+    scandir = os.scandir
+
+    def flaky_scandir(path):
+        if os.path.basename(os.path.normpath(path)) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", flaky_scandir)
+    triage = Triage()
+    assert list(triage.walk(tmp_path)) == ["ok.py"]
+    assert triage.stats["unreadable"] == {"files": 0, "bytes": 0, "dirs": 1}
+
+
+def test_filter_paths_counts_skipped_bytes(tmp_path):
+    _tree(tmp_path, {"app.py": b"x", "package-lock.json": b"{}" * 50, "dist/app.js": b"y" * 7})
+    triage = Triage()
+    kept = list(triage.filter_paths(["app.py", "package-lock.json", "dist/app.js"], tmp_path))
+    assert kept == ["app.py"]
+    assert triage.stats["ignored"] == {"files": 2, "bytes": 107, "dirs": 0}
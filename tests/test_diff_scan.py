@@ -0,0 +1,61 @@
+import subprocess
+
+import pytest
+
+from tools.compliance_cache import FindingsCache
+from tools.compliance_tools import ComplianceChecker
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    for i in range(3):
+        (repo / f"m{i}.py").write_text(f"model_{i} = 'ai_policy'\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "base")
+    return repo
+
+
+def _commit_change(repo, name="m0.py"):
+    (repo / name).write_text("social_scoring()\n")
+    _git(repo, "commit", "-qam", "change")
+    return _git(repo, "rev-parse", "HEAD~1"), _git(repo, "rev-parse", "HEAD")
+
+
+def test_first_scan_is_reported_as_full(repo, tmp_path):
+    base, head = _commit_change(repo)
+    cache = FindingsCache(tmp_path / "findings.sqlite")
+    summary = ComplianceChecker().analyze_diff(repo, base, head, jobs=1, cache=cache).run()
+
+    assert summary["scope"] == "full"
+    assert summary["unchanged_analyzed"] == 2
+    assert summary["changes"]["files_changed"] == 1
+
+
+def test_cached_unchanged_files_make_a_diff_scan(repo, tmp_path):
+    cache = FindingsCache(tmp_path / "findings.sqlite")
+    checker = ComplianceChecker()
+    head = _git(repo, "rev-parse", "HEAD")
+    checker.analyze_diff(repo, head, head, jobs=1, cache=cache).run()
+
+    base, head = _commit_change(repo)
+    summary = checker.analyze_diff(repo, base, head, jobs=1, cache=cache).run()
+    assert summary["scope"] == "diff"
+    assert summary["unchanged_analyzed"] == 0
+    assert summary["files_analyzed"] == 3
+    assert summary["changes"]["ai_act"]["social_scoring"] == 1
+
+
+def test_without_cache_every_file_is_analyzed(repo):
+    base, head = _commit_change(repo)
+    summary = ComplianceChecker().analyze_diff(repo, base, head, jobs=1).run()
+    assert summary["scope"] == "full"
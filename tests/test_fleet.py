@@ -0,0 +1,107 @@
+import json
+import threading
+
+import pytest
+
+from analysis import fleet
+from analysis.fleet import run_fleet
+from analysis.stages import StageError
+
+URLS = [f"https://github.com/acme/repo{i}" for i in range(5)]
+
+
+class FakeScan:
+    """Scanner failing (without retry) for the URLs in *failing*."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url, token, timeouts):
+        with self.lock:
+            self.calls.append(url)
+        if url in self.failing:
+            raise RuntimeError("boom")
+        return {"repo_url": url}
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_every_repository(tmp_path):
+    out = tmp_path / "fleet.ndjson"
+    counts = run_fleet(URLS, out, scan=FakeScan(failing=URLS[:1]), workers=2)
+
+    assert counts == {"ok": 4, "failed": 1, "skipped": 0}
+    records = _records(out)
+    assert [r["record"] for r in records] == ["header"] + ["repo"] * 5 + ["summary"]
+    assert records[-1] == {"record": "summary", "ok": 4, "failed": 1}
+
+
+def test_resume_after_crash(tmp_path):
+    out = tmp_path / "fleet.ndjson"
+    run_fleet(URLS[:3], out, scan=FakeScan(), workers=1)
+    # A crash: no summary, and the last record cut short
+    lines = out.read_text().splitlines(keepends=True)[:-1]
+    out.write_text("".join(lines[:-1]) + lines[-1][:10])
+
+    scan = FakeScan()
+    counts = run_fleet(URLS, out, scan=scan)
+
+    assert counts == {"ok": 3, "failed": 0, "skipped": 2}
+    assert sorted(scan.calls) == URLS[2:]
+    records = _records(out)
+    assert [r["record"] for r in records].count("header") == 1
+    assert [r["record"] for r in records].count("summary") == 1
+    assert sorted(r["url"] for r in records if r["record"] == "repo") == URLS
+    assert records[-1] == {"record": "summary", "ok": 5, "failed": 0}
+
+
+def test_repeated_resumes_keep_one_header_and_summary(tmp_path):
+    out = tmp_path / "fleet.ndjson"
+    run_fleet(URLS, out, scan=FakeScan(failing=URLS[:2]))
+    run_fleet(URLS, out, scan=FakeScan())
+    scan = FakeScan()
+    counts = run_fleet(URLS, out, scan=scan, retry_failed=True)
+
+    assert sorted(scan.calls) == URLS[:2]
+    assert counts == {"ok": 2, "failed": 0, "skipped": 3}
+    kinds = [r["record"] for r in _records(out)]
+    assert kinds == ["header"] + ["repo"] * 7 + ["summary"]
+    assert _records(out)[-1] == {"record": "summary", "ok": 5, "failed": 0}
+
+
+def test_clone_failures_are_retried(tmp_path):
+    attempts = []
+
+    def scan(url, token, timeouts):
+        attempts.append(url)
+        if len(attempts) < 3:
+            raise StageError("clone", "failed: rate limited")
+        return {}
+
+    counts = run_fleet(URLS[:1], tmp_path / "fleet.ndjson", scan=scan, backoff=0.01)
+    assert counts["ok"] == 1 and len(attempts) == 3
+    assert _records(tmp_path / "fleet.ndjson")[1]["attempts"] == 3
+
+
+def test_worktree_is_released_and_dropped_from_the_record(tmp_path, monkeypatch):
+    released = []
+
+    class Pool:
+        def release(self, path):
+            released.append(path.name)
+
+    monkeypatch.setattr(fleet, "mirror_pool", Pool)
+    out = tmp_path / "fleet.ndjson"
+    run_fleet(URLS[:1], out, scan=lambda url, token, timeouts: {"repo_path": "/tmp/wt-1"})
+
+    assert released == ["wt-1"]
+    assert "repo_path" not in _records(out)[1]["result"]
+
+
+def test_invalid_limits(tmp_path):
+    with pytest.raises(ValueError):
+        run_fleet(URLS, tmp_path / "fleet.ndjson", workers=0, scan=FakeScan())
@@ -0,0 +1,53 @@
+import pytest
+
+from analysis.history import HistoryStore, SQLiteBackend
+
+WEEK = 7 * 86400
+MONDAY = 4 * 86400   # 1970-01-05, the first week start
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(SQLiteBackend(tmp_path / "history.sqlite"))
+    yield store
+    store.close()
+
+
+def _diff(store, repo, at, **rules):
+    return store.record(repo, kind="diff", scanned_at=at, compliance={"ai_act": rules})
+
+
+def test_rule_trend_uses_the_latest_diff_scan_per_repo(store):
+    _diff(store, "a", MONDAY + 10, risk_management=3)
+    _diff(store, "a", MONDAY + 20, risk_management=1)   # supersedes the first
+    _diff(store, "b", MONDAY + 30, risk_management=2)
+    _diff(store, "b", MONDAY + 40)                      # fixed later that week
+    _diff(store, "c", MONDAY + WEEK + 5, risk_management=4)
+
+    assert store.rule_trend("risk_management") == [
+        {"start": MONDAY, "repos": 1, "occurrences": 1},
+        {"start": MONDAY + WEEK, "repos": 1, "occurrences": 4},
+    ]
+
+
+def test_rule_trend_ignores_other_kinds(store):
+    _diff(store, "a", MONDAY + 10, risk_management=2)
+    store.record("a", kind="full", scanned_at=MONDAY + 20, severities={"critical": 5})
+
+    assert store.rule_trend("risk_management") == [{"start": MONDAY, "repos": 1, "occurrences": 2}]
+    assert store.rule_trend("risk_management", kind="full") == []
+
+
+def test_trend_uses_the_latest_full_scan_per_repo(store):
+    store.record("a", kind="full", scanned_at=MONDAY + 10, severities={"critical": 5})
+    store.record("a", kind="full", scanned_at=MONDAY + 20, severities={"critical": 2})
+    store.record("b", kind="full", scanned_at=MONDAY + 30, severities={"critical": 1})
+    _diff(store, "b", MONDAY + 40, risk_management=1)   # no Trivy counts
+
+    assert store.trend("critical") == [{"start": MONDAY, "total": 3, "repos": 2}]
+    assert store.trend("critical", kind="diff") == [{"start": MONDAY, "total": 0, "repos": 1}]
+
+
+def test_invalid_kind(store):
+    with pytest.raises(ValueError):
+        store.rule_trend("risk_management", kind="nightly")
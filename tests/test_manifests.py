@@ -0,0 +1,246 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from analysis.repo_scan import manifests
+from analysis.repo_scan.manifests import _parser_for, build_sbom, find_manifests
+
+# manifest name → (contents, expected dependencies in file order)
+FIXTURES = {
+    "requirements.txt": (
+        """\
+# pinned with hashes
+requests[socks,security]==2.31.0 \\
+    --hash=sha256:58cd2187c01e70e6e26505bca751777aa9f2ee0b7f4300988b709f44e013003f \\
+    --hash=sha256:942c5a758f98d790eaed1a29cb6eefc7ffb0d1cf7af05c3d2791656dbd6ad1e1
+Django_REST.framework >= 3.14  # a range: no version
+numpy===1.26.4; python_version >= "3.9"
+-r dev.txt
+-e .
+git+https://github.com/psf/black
+""",
+        [("pypi", "requests", "2.31.0"), ("pypi", "django-rest-framework", None), ("pypi", "numpy", "1.26.4")],
+    ),
+    "requirements-dev.txt": ("pytest==8.0.0\n", [("pypi", "pytest", "8.0.0")]),
+    "pyproject.toml": (
+        """\
+[project]
+dependencies = ["PyYAML>=6", "attrs==23.2.0"]
+[project.optional-dependencies]
+fast = ["orjson"]
+[tool.poetry.dependencies]
+python = "^3.10"
+Flask = "^3.0"
+[tool.poetry.group.test.dependencies]
+pytest = "*"
+""",
+        [("pypi", "pyyaml", None), ("pypi", "attrs", "23.2.0"), ("pypi", "orjson", None),
+         ("pypi", "flask", None), ("pypi", "pytest", None)],
+    ),
+    "poetry.lock": (
+        '[[package]]\nname = "Jinja2"\nversion = "3.1.3"\n\n[[package]]\nname = "markupsafe"\nversion = "2.1.5"\n',
+        [("pypi", "jinja2", "3.1.3"), ("pypi", "markupsafe", "2.1.5")],
+    ),
+    "uv.lock": (
+        'version = 1\n\n[[package]]\nname = "typing_extensions"\nversion = "4.9.0"\nsource = { registry = "https://pypi.org/simple" }\n',
+        [("pypi", "typing-extensions", "4.9.0")],
+    ),
+    "Pipfile.lock": (
+        json.dumps({"_meta": {}, "default": {"idna": {"version": "==3.6"}}, "develop": {"Mypy": {"version": "==1.8.0"}}}),
+        [("pypi", "idna", "3.6"), ("pypi", "mypy", "1.8.0")],
+    ),
+    "package-lock.json": (  # lockfileVersion 3
+        json.dumps({
+            "lockfileVersion": 3,
+            "packages": {
+                "": {"name": "app", "version": "1.0.0"},
+                "node_modules/@babel/core": {"version": "7.23.9"},
+                "node_modules/debug/node_modules/ms": {"version": "2.0.0"},
+                "node_modules/app-lib": {"resolved": "packages/lib", "link": True},
+            },
+        }),
+        [("npm", "@babel/core", "7.23.9"), ("npm", "ms", "2.0.0")],
+    ),
+    "npm-shrinkwrap.json": (  # lockfileVersion 1
+        json.dumps({
+            "lockfileVersion": 1,
+            "dependencies": {"debug": {"version": "2.6.9", "dependencies": {"ms": {"version": "2.0.0"}}}},
+        }),
+        [("npm", "debug", "2.6.9"), ("npm", "ms", "2.0.0")],
+    ),
+    "package.json": (
+        json.dumps({"dependencies": {"react": "^18.2.0"}, "devDependencies": {"@types/node": "20.x"}}),
+        [("npm", "react", None), ("npm", "@types/node", None)],
+    ),
+    "Cargo.lock": (
+        'version = 3\n\n[[package]]\nname = "serde_json"\nversion = "1.0.113"\n',
+        [("cargo", "serde_json", "1.0.113")],
+    ),
+    "Gemfile.lock": (
+        "GEM\n  remote: https://rubygems.org/\n  specs:\n    rack (3.0.9)\n    rails (7.1.3)\n"
+        "      rack (>= 2.2.4)\n\nDEPENDENCIES\n  rails\n",
+        [("gem", "rack", "3.0.9"), ("gem", "rails", "7.1.3")],
+    ),
+    "composer.lock": (
+        json.dumps({"packages": [{"name": "monolog/monolog", "version": "v3.5.0"}],
+                    "packages-dev": [{"name": "phpunit/phpunit", "version": "10.5.10"}]}),
+        [("composer", "monolog/monolog", "3.5.0"), ("composer", "phpunit/phpunit", "10.5.10")],
+    ),
+    "go.mod": (
+        """\
+module example.com/app
+
+go 1.21
+
+require github.com/pkg/errors v0.9.1
+
+require (
+\tgolang.org/x/net v0.20.0 // indirect
+\t// a comment line
+\tgithub.com/stretchr/testify v1.8.4
+)
+
+replace github.com/pkg/errors => ../errors
+""",
+        [("golang", "github.com/pkg/errors", "v0.9.1"), ("golang", "golang.org/x/net", "v0.20.0"),
+         ("golang", "github.com/stretchr/testify", "v1.8.4")],
+    ),
+}
+
+YARN_LOCKS = {
+    "v1": (
+        """\
+# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@babel/code-frame@^7.0.0", "@babel/code-frame@^7.22.13":
+  version "7.23.5"
+  resolved "https://registry.yarnpkg.com/@babel/code-frame/-/code-frame-7.23.5.tgz"
+  dependencies:
+    chalk "^2.4.2"
+
+lodash@^4.17.21:
+  version "4.17.21"
+""",
+        [("npm", "@babel/code-frame", "7.23.5"), ("npm", "lodash", "4.17.21")],
+    ),
+    "berry": (
+        """\
+__metadata:
+  version: 6
+  cacheKey: 8
+
+"@babel/code-frame@npm:^7.0.0, @babel/code-frame@npm:^7.22.13":
+  version: 7.23.5
+  resolution: "@babel/code-frame@npm:7.23.5"
+
+"app@workspace:.":
+  version: 0.0.0-use.local
+  resolution: "app@workspace:."
+
+"lodash@npm:^4.17.21":
+  version: 4.17.21
+""",
+        [("npm", "@babel/code-frame", "7.23.5"), ("npm", "lodash", "4.17.21")],
+    ),
+}
+
+PNPM_LOCKS = {
+    "v5": (
+        """\
+lockfileVersion: 5.4
+packages:
+  /@babel/core/7.23.9:
+    resolution: {integrity: sha512-x}
+  /react-dom/18.2.0_react@18.2.0:
+    resolution: {integrity: sha512-y}
+  /react/18.2.0:
+    resolution: {integrity: sha512-z}
+""",
+        [("npm", "@babel/core", "7.23.9"), ("npm", "react-dom", "18.2.0"), ("npm", "react", "18.2.0")],
+    ),
+    "v6": (
+        """\
+lockfileVersion: '6.0'
+packages:
+  /@babel/core@7.23.9:
+    resolution: {integrity: sha512-x}
+  /react-dom@18.2.0(react@18.2.0):
+    resolution: {integrity: sha512-y}
+  /@types/3d-view@1.0.0:
+    resolution: {integrity: sha512-z}
+""",
+        [("npm", "@babel/core", "7.23.9"), ("npm", "react-dom", "18.2.0"), ("npm", "@types/3d-view", "1.0.0")],
+    ),
+    "v9": (
+        """\
+lockfileVersion: '9.0'
+packages:
+  '@babel/core@7.23.9':
+    resolution: {integrity: sha512-x}
+  react-dom@18.2.0:
+    resolution: {integrity: sha512-y}
+snapshots:
+  react-dom@18.2.0(react@18.2.0):
+    dependencies:
+      react: 18.2.0
+""",
+        [("npm", "@babel/core", "7.23.9"), ("npm", "react-dom", "18.2.0")],
+    ),
+}
+
+
+def _parse(tmp_path: Path, name: str, text: str):
+    path = tmp_path / name
+    path.write_text(text)
+    return list(_parser_for(name)(path))
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_parsers(tmp_path, name):
+    text, expected = FIXTURES[name]
+    assert _parse(tmp_path, name, text) == expected
+
+
+@pytest.mark.parametrize("version", YARN_LOCKS)
+def test_yarn_lock(tmp_path, version):
+    text, expected = YARN_LOCKS[version]
+    assert _parse(tmp_path, "yarn.lock", text) == expected
+
+
+@pytest.mark.parametrize("version", PNPM_LOCKS)
+def test_pnpm_lock(tmp_path, version):
+    text, expected = PNPM_LOCKS[version]
+    assert _parse(tmp_path, "pnpm-lock.yaml", text) == expected
+
+
+def test_lockfile_wins_over_its_manifest(tmp_path):
+    for name in ("package.json", "yarn.lock", "pyproject.toml", "poetry.lock"):
+        (tmp_path / name).write_text("")
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "package.json").write_text("{}")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "package.json").write_text("{}")
+
+    found = [p.relative_to(tmp_path).as_posix() for p in find_manifests(tmp_path)]
+    assert found == ["poetry.lock", "yarn.lock", "web/package.json"]
+
+
+def test_build_sbom_dedups_components_and_reports_bad_manifests(tmp_path, monkeypatch):
+    for sub in ("a", "b"):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "requirements.txt").write_text("Requests==2.31.0\n")
+    (tmp_path / "go.mod").write_text("require github.com/pkg/errors v0.9.1\n")
+    (tmp_path / "package.json").write_text("{not json")
+    monkeypatch.setattr(manifests, "PARALLEL_THRESHOLD", 1000)
+
+    sbom = build_sbom(tmp_path)
+    components = {c["purl"]: c for c in sbom["components"]}
+    assert set(components) == {"pkg:pypi/requests@2.31.0", "pkg:golang/github.com/pkg/errors@v0.9.1"}
+    assert [p["value"] for p in components["pkg:pypi/requests@2.31.0"]["properties"]] == [
+        "a/requirements.txt", "b/requirements.txt",
+    ]
+    errors = [p["value"] for p in sbom["metadata"]["properties"] if p["name"] == "manifest-error"]
+    assert len(errors) == 1 and errors[0].startswith("package.json: JSONDecodeError")
@@ -0,0 +1,114 @@
+import os
+import time
+
+import pytest
+
+from analysis.repo_scan import mirror
+from analysis.repo_scan.mirror import MirrorPool
+
+pytestmark = pytest.mark.skipif(mirror.fcntl is None, reason="needs file locks")
+
+
+def _worktree(pool, name, age=0.0):
+    """A worktree directory (no git involved) leased by *pool*, *age* seconds old."""
+    path = pool._worktrees / name
+    path.mkdir()
+    pool._take_lease(name)
+    past = time.time() - age
+    os.utime(pool._leases / name, (past, past))
+    os.utime(path, (past, past))
+    return path
+
+
+def test_held_lease_survives_the_ttl(tmp_path):
+    pool = MirrorPool(tmp_path, worktree_ttl=60)
+    path = _worktree(pool, "abc-0001", age=3600)
+    pool.prune()
+    assert path.is_dir()
+
+
+def test_abandoned_worktree_is_pruned_after_the_ttl(tmp_path):
+    owner = MirrorPool(tmp_path, worktree_ttl=60)
+    old = _worktree(owner, "abc-0001", age=3600)
+    recent = _worktree(owner, "abc-0002", age=10)
+    # The owning process goes away: its lease locks are released
+    for fh in owner._held.values():
+        fh.close()
+
+    MirrorPool(tmp_path, worktree_ttl=60).prune()
+    assert not old.exists() and not (tmp_path / "leases" / "abc-0001").exists()
+    assert recent.is_dir()
+
+
+def test_release_drops_the_lease(tmp_path):
+    pool = MirrorPool(tmp_path)
+    path = _worktree(pool, "abc-0001")
+    pool.release(path)
+    assert not path.exists()
+    assert not (tmp_path / "leases" / "abc-0001").exists()
+    assert pool._held == {}
+
+
+def test_worktree_without_lease_ages_by_mtime(tmp_path):
+    pool = MirrorPool(tmp_path, worktree_ttl=60)
+    legacy = pool._worktrees / "abc-0001"
+    legacy.mkdir()
+    os.utime(legacy, (time.time() - 3600,) * 2)
+    pool.prune()
+    assert not legacy.exists()
+
+
+def _git(repo, *args):
+    import subprocess
+    return subprocess.run(["git", "-C", str(repo), *args], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def origin(tmp_path, monkeypatch):
+    # Local repositories need no credentials (and are not https URLs)
+    monkeypatch.setattr(mirror, "_auth_args", lambda url, token: [])
+    repo = tmp_path / "origin"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "dev@example.com")
+    _git(repo, "config", "user.name", "dev")
+    (repo / "requirements.txt").write_text("flask==3.0.0\n")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "init")
+    return repo
+
+
+def test_checkout_is_leased_and_mirror_repacked(tmp_path, origin, monkeypatch):
+    monkeypatch.setattr(mirror, "_GC_PACK_LIMIT", 0)
+    pool = MirrorPool(tmp_path / "pool", worktree_ttl=0)
+    url = f"file://{origin}"
+    for i in range(3):
+        (origin / "requirements.txt").write_text(f"flask==3.1.{i}\n")
+        _git(origin, "commit", "-qam", f"bump {i}")
+        with pool.worktree(url) as path:
+            assert (path / "requirements.txt").read_text() == f"flask==3.1.{i}\n"
+            pool.prune()  # the TTL is 0, but the lease is held
+            assert path.is_dir()
+        assert not path.exists()
+
+    packs = list((pool._repos / f"{pool.key(url)}.git" / "objects" / "pack").glob("*.pack"))
+    assert len(packs) == 1
+    assert list(pool._leases.iterdir()) == []
+
+
+def test_lock_wait_is_bounded(tmp_path):
+    lock = tmp_path / "repo.lock"
+    with mirror._locked(lock):
+        with pytest.raises(TimeoutError):
+            with mirror._locked(lock, deadline=time.monotonic() + 0.2):
+                pass
+
+
+def test_git_past_deadline_is_killed(tmp_path):
+    started = time.monotonic()
+    with pytest.raises(mirror.subprocess.TimeoutExpired):
+        # An alias so git itself spawns the long-running child
+        mirror._git(tmp_path, "-c", "alias.wait=!sleep 30", "wait",
+                    deadline=time.monotonic() + 0.5)
+    assert time.monotonic() - started < 5
@@ -0,0 +1,70 @@
+import zipfile
+
+import pytest
+
+from analysis import report_builder
+from analysis.report_builder import render_policies, render_policy
+
+CTX = {"trivy": {"critical": 2, "high": 5}, "risk": "HIGH"}
+
+
+@pytest.fixture
+def fresh_env(monkeypatch):
+    monkeypatch.setattr(report_builder, "_env", None)
+
+
+def test_template_is_loaded_on_first_use(fresh_env):
+    assert report_builder._env is None
+    policy = render_policy(**CTX)
+    env = report_builder._env
+
+    assert env is not None and "**HIGH**" in policy and "| Critical | 2 |" in policy
+    render_policy(**CTX)
+    assert report_builder._env is env
+
+
+def test_bytecode_cache_is_private(fresh_env, tmp_path, monkeypatch):
+    # An unusable shared cache dir must not matter: bytecode never lives there
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setenv("COMPLIANCE_CACHE_DIR", str(blocker))
+
+    assert "**HIGH**" in render_policy(**CTX)
+    cache = report_builder._env.bytecode_cache
+    assert cache is None or not cache.directory.startswith(str(tmp_path))
+
+
+def test_renders_without_a_bytecode_cache(fresh_env, monkeypatch):
+    def unusable():
+        raise RuntimeError("Cannot determine safe temp directory.")
+
+    monkeypatch.setattr(report_builder, "FileSystemBytecodeCache", unusable)
+    assert "**HIGH**" in render_policy(**CTX)
+    assert report_builder._env.bytecode_cache is None
+
+
+def test_render_policies_to_directory(tmp_path):
+    contexts = {"acme": CTX, "team/beta": {**CTX, "risk": "LOW"}}
+    written = render_policies(contexts, tmp_path / "out")
+
+    assert written == ["acme.md", "team/beta.md"]
+    assert "**HIGH**" in (tmp_path / "out" / "acme.md").read_text(encoding="utf-8")
+    assert "**LOW**" in (tmp_path / "out" / "team" / "beta.md").read_text(encoding="utf-8")
+
+
+def test_render_policies_to_zip(tmp_path):
+    pairs = ((f"repo-{i}", {**CTX, "risk": f"R{i}"}) for i in range(3))
+    written = render_policies(pairs, tmp_path / "packs" / "policies.zip")
+
+    assert written == ["repo-0.md", "repo-1.md", "repo-2.md"]
+    with zipfile.ZipFile(tmp_path / "packs" / "policies.zip") as archive:
+        assert archive.namelist() == written
+        assert "**R2**" in archive.read("repo-2.md").decode("utf-8")
+
+
+@pytest.mark.parametrize("name", ["../escape", "a/../../escape", "/etc/passwd", ""])
+@pytest.mark.parametrize("out", ["dir", "policies.zip"])
+def test_render_policies_rejects_invalid_names(tmp_path, name, out):
+    with pytest.raises(ValueError, match="Invalid policy name"):
+        render_policies({name: CTX}, tmp_path / out)
+    assert not (tmp_path.parent / "escape.md").exists()
@@ -0,0 +1,166 @@
+import json
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from analysis.repo_scan import sbom
+from analysis.repo_scan.clone import MANIFEST_PATTERNS
+from analysis.repo_scan.sbom import SbomCache, generate_sbom, source_key
+from analysis.repo_scan.trivy_server import server_db_version
+
+COUNTS = {"critical": 1, "high": 2, "medium": 0, "low": 0, "unknown": 0}
+
+
+@pytest.fixture
+def trivy(tmp_path, monkeypatch):
+    """Fake Trivy: records SBOM writes and vulnerability scans."""
+    calls = {"write": 0, "scan": 0, "versions": ("0.50.0", "2026-10-01T00:00:00Z"), "timeouts": []}
+
+    def write_sbom(repo_dir, timeout=None, output=None):
+        calls["write"] += 1
+        calls["timeouts"].append(timeout)
+        output.write_text("{}")
+        return output
+
+    def scan_sbom(sbom_path, timeout=None):
+        calls["scan"] += 1
+        calls["timeouts"].append(timeout)
+        return dict(COUNTS)
+
+    def trivy_versions(timeout=60):
+        calls["timeouts"].append(timeout)
+        return calls["versions"]
+
+    monkeypatch.setattr(sbom, "write_sbom", write_sbom)
+    monkeypatch.setattr(sbom, "scan_sbom", scan_sbom)
+    monkeypatch.setattr(sbom, "trivy_versions", trivy_versions)
+    monkeypatch.setattr(sbom, "source_key", lambda repo_dir: "commit:abc")
+    return calls
+
+
+def test_cached_sbom_and_counts_are_reused(tmp_path, trivy):
+    cache = SbomCache(tmp_path / "sbom")
+    first = generate_sbom(tmp_path, cache)
+    second = generate_sbom(tmp_path, cache)
+
+    assert not first["cached"] and second["cached"]
+    assert second["severities"] == COUNTS and second["trivy"] == {"critical": 1, "high": 2}
+    assert trivy["write"] == 1 and trivy["scan"] == 1
+
+
+def test_new_db_rescans_the_cached_sbom(tmp_path, trivy):
+    cache = SbomCache(tmp_path / "sbom")
+    generate_sbom(tmp_path, cache)
+    trivy["versions"] = ("0.50.0", "2026-10-02T00:00:00Z")
+
+    assert not generate_sbom(tmp_path, cache)["cached"]
+    assert trivy["write"] == 1 and trivy["scan"] == 2
+
+
+def test_new_trivy_rewrites_the_sbom(tmp_path, trivy):
+    cache = SbomCache(tmp_path / "sbom")
+    generate_sbom(tmp_path, cache)
+    trivy["versions"] = ("0.51.0", "2026-10-01T00:00:00Z")
+
+    generate_sbom(tmp_path, cache)
+    assert trivy["write"] == 2 and trivy["scan"] == 2
+
+
+def test_counts_are_not_reused_with_unknown_db(tmp_path, trivy):
+    cache = SbomCache(tmp_path / "sbom")
+    trivy["versions"] = ("0.50.0", None)
+    generate_sbom(tmp_path, cache)
+
+    assert not generate_sbom(tmp_path, cache)["cached"]
+    assert trivy["write"] == 1 and trivy["scan"] == 2
+
+
+def test_timeout_bounds_every_trivy_call(tmp_path, trivy):
+    generate_sbom(tmp_path, SbomCache(tmp_path / "sbom"), timeout=30)
+
+    assert len(trivy["timeouts"]) == 3
+    assert all(0 < t <= 30 for t in trivy["timeouts"])
+    assert trivy["timeouts"] == sorted(trivy["timeouts"], reverse=True)
+
+
+def test_concurrent_writers_use_separate_temp_files(tmp_path, trivy, monkeypatch):
+    outputs = []
+    barrier = threading.Barrier(2)
+
+    def write_sbom(repo_dir, timeout=None, output=None):
+        outputs.append(output)
+        barrier.wait(timeout=5)
+        output.write_text("{}")
+        return output
+
+    monkeypatch.setattr(sbom, "write_sbom", write_sbom)
+    cache = SbomCache(tmp_path / "sbom")
+    threads = [threading.Thread(target=generate_sbom, args=(tmp_path, cache)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(outputs)) == 2
+    assert not list(cache.dir.glob("*.tmp"))
+
+
+def _serve(routes):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in routes:
+                self.send_error(404)
+                return
+            body = json.dumps(routes[self.path]).encode()
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_server_db_version():
+    server = _serve({"/version": {"Version": "0.50.0",
+                                  "VulnerabilityDB": {"UpdatedAt": "2026-10-01T06:00:00Z"}}})
+    try:
+        assert server_db_version(f"http://127.0.0.1:{server.server_port}") == "2026-10-01T06:00:00Z"
+    finally:
+        server.shutdown()
+
+
+def test_server_without_version_endpoint():
+    server = _serve({})
+    try:
+        assert server_db_version(f"http://127.0.0.1:{server.server_port}") is None
+    finally:
+        server.shutdown()
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def test_sparse_checkout_is_keyed_by_its_patterns(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / "requirements-prod.txt").write_text("jinja2==3.1.2\n")
+    (repo / "app.py").write_text("print('hi')\n")
+    _git(repo, "add", ".")
+    _git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+
+    full = source_key(repo)
+    _git(repo, "sparse-checkout", "set", "--no-cone", *MANIFEST_PATTERNS)
+    manifests = source_key(repo)
+    _git(repo, "sparse-checkout", "set", "--no-cone", "*.txt")
+
+    assert full.startswith("commit:") and manifests.startswith(full + ":sparse:")
+    assert len({full, manifests, source_key(repo)}) == 3
+    assert (repo / "requirements-prod.txt").exists() and not (repo / "app.py").exists()
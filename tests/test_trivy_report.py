@@ -0,0 +1,111 @@
+import io
+import json
+
+import pytest
+
+from analysis.repo_scan import trivy_report
+from analysis.repo_scan.trivy_report import _Reader, iter_vulnerabilities, parse_trivy_report
+
+REPORT = {
+    "SchemaVersion": 2,
+    "ArtifactName": "repo",
+    "Elapsed": 12.5e-1,   # skipped scalars are decoded one by one
+    "Results": [
+        {
+            "Target": "poetry.lock",
+            "Type": "poetry",
+            "Packages": [{"Name": "jinja2", "Version": "3.1.2"}],
+            "Vulnerabilities": [
+                {"VulnerabilityID": "CVE-2024-0001", "PkgName": "jinja2", "InstalledVersion": "3.1.2",
+                 "Severity": "HIGH", "CVSS": {"nvd": {"V3Score": 7.5}}, "Title": "Éscape"},
+                {"VulnerabilityID": "CVE-2024-0002", "PkgName": "urllib3", "InstalledVersion": "1.26.0",
+                 "Severity": "CRITICAL", "CVSS": {"nvd": {"V3Score": 9.8, "V2Score": 1e1}}},
+            ],
+        },
+        {"Target": "Dockerfile", "Class": "config", "Misconfigurations": [{"ID": "DS001"}]},
+        {
+            "Target": "package-lock.json",
+            "Type": "npm",
+            "Vulnerabilities": [
+                {"VulnerabilityID": "GHSA-xxxx", "PkgName": "lodash", "InstalledVersion": "4.17.0",
+                 "Severity": "MEDIUM", "CVSS": {"ghsa": {"V3Score": 5.25E+0}}},
+            ],
+        },
+    ],
+}
+TEXT = json.dumps(REPORT, ensure_ascii=False, indent=1)
+
+
+class _Split(io.StringIO):
+    """File returning its text in two reads, split at *at*."""
+
+    def __init__(self, text, at):
+        super().__init__(text)
+        self.at = at
+        self.first = True
+
+    def read(self, size=-1):
+        if self.first:
+            self.first = False
+            return super().read(self.at)
+        return super().read(size)
+
+
+def _values(fh):
+    reader = _Reader(fh)
+    return [reader.value() for _ in range(5)]
+
+
+@pytest.mark.parametrize("text", ["7.25 1e+10 -3 true [1.5e-3, 20]", "12345 0.5 null 6E2 \"x\""])
+def test_scalars_split_at_every_offset(text):
+    expected = _values(io.StringIO(text))
+    for at in range(1, len(text) + 1):
+        assert _values(_Split(text, at)) == expected, at
+
+
+def test_report_split_at_every_offset(tmp_path, monkeypatch):
+    expected = [
+        (vuln, result["Target"], result.get("Type"))
+        for result in REPORT["Results"]
+        for vuln in result.get("Vulnerabilities", [])
+    ]
+    for at in range(1, len(TEXT) + 1):
+        split = _Split(TEXT, at)
+        monkeypatch.setattr(trivy_report, "open", lambda *args, **kwargs: split, raising=False)
+        assert list(iter_vulnerabilities(tmp_path / "report.json")) == expected, at
+
+
+def test_one_char_chunks(tmp_path, monkeypatch):
+    path = tmp_path / "report.json"
+    path.write_text(TEXT, encoding="utf-8")
+    whole = parse_trivy_report(path).as_dict()
+    monkeypatch.setattr(trivy_report, "_CHUNK_SIZE", 1)
+
+    assert parse_trivy_report(path).as_dict() == whole
+    assert whole["severities"] == {"critical": 1, "high": 1, "medium": 1, "low": 0, "unknown": 0}
+    assert [record["score"] for record in whole["top"]] == [9.8, 7.5, 5.25]
+    assert whole["ecosystems"] == {"poetry": 2, "npm": 1}
+
+
+def test_large_value_is_not_redecoded_per_chunk(monkeypatch):
+    monkeypatch.setattr(trivy_report, "_CHUNK_SIZE", 16)
+    decodes = 0
+    raw_decode = trivy_report._decoder.raw_decode
+
+    class Counting:
+        def raw_decode(self, s, idx=0):
+            nonlocal decodes
+            decodes += 1
+            return raw_decode(s, idx)
+
+    monkeypatch.setattr(trivy_report, "_decoder", Counting())
+    text = json.dumps({"Description": "x" * 100_000})
+    assert _Reader(io.StringIO(text)).value() == {"Description": "x" * 100_000}
+    assert decodes < 20
+
+
+def test_truncated_report_raises(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(TEXT[:-40], encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_vulnerabilities(path))
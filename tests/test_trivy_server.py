@@ -0,0 +1,127 @@
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from analysis.repo_scan import trivy_server
+from analysis.repo_scan.trivy_server import LocalServer, _alive, _Selector
+from utils.cache_dir import cache_dir
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+
+
+@pytest.fixture
+def slow_trivy(tmp_path, monkeypatch):
+    """A ``trivy`` on PATH whose server never answers its health check."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "trivy"
+    script.write_text("#!/bin/sh\nsleep 60\n")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return script
+
+
+def _wait_dead(pid, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while _alive(pid) and time.monotonic() < deadline:
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+        time.sleep(0.05)
+    return not _alive(pid)
+
+
+def test_starting_server_is_recorded_and_reused(tmp_path, slow_trivy):
+    server = LocalServer(tmp_path / "trivy")
+    server.dir.mkdir()
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="still starting"):
+        server.ensure(start_timeout=0.3)
+    assert time.monotonic() - started < 5
+
+    state = json.loads((server.dir / "server.json").read_text())
+    assert _alive(state["pid"]) and not state.get("ready")
+    # The next caller waits for the same server instead of spawning another
+    with pytest.raises(RuntimeError):
+        server.ensure(start_timeout=0.1)
+    assert json.loads((server.dir / "server.json").read_text())["pid"] == state["pid"]
+
+    server.stop()
+    assert _wait_dead(state["pid"])
+    assert not (server.dir / "server.json").exists()
+
+
+def test_server_that_exits_is_reported(tmp_path, slow_trivy):
+    slow_trivy.write_text("#!/bin/sh\nexit 1\n")
+    server = LocalServer(tmp_path / "trivy")
+    server.dir.mkdir()
+    with pytest.raises(RuntimeError, match="exited"):
+        server.ensure(start_timeout=5)
+    assert not (server.dir / "server.json").exists()
+
+
+@pytest.fixture
+def local(tmp_path, monkeypatch):
+    """Fake local server: starts when ``state["ready"]`` is set; records shared DB downloads."""
+    state = {"ready": False, "alive": True, "downloads": 0}
+
+    class FakeServer:
+        db_dir = tmp_path / "db"
+
+        def __init__(self, root=None):
+            pass
+
+        def ensure(self, start_timeout=None):
+            if not state["ready"]:
+                raise RuntimeError("Trivy server is still starting" if state["alive"] else "exited")
+            return "http://127.0.0.1:4954"
+
+        def starting(self):
+            return state["alive"] and not state["ready"]
+
+        def status(self):
+            return {"url": "http://127.0.0.1:4954"} if state["ready"] else None
+
+    def warm_shared_db(db_dir, max_age=None):
+        state["downloads"] += 1
+        return db_dir
+
+    monkeypatch.delenv("COMPLIANCE_TRIVY_MODE", raising=False)
+    monkeypatch.delenv("COMPLIANCE_TRIVY_SERVER", raising=False)
+    monkeypatch.setattr(trivy_server, "LocalServer", FakeServer)
+    monkeypatch.setattr(trivy_server, "warm_shared_db", warm_shared_db)
+    monkeypatch.setattr(trivy_server, "HEALTH_INTERVAL", 0.0)
+    return state
+
+
+def test_selector_switches_to_server_once_it_answers(local):
+    selector = _Selector()
+    assert selector.get().mode == "standalone"
+    assert local["downloads"] == 0  # the server is downloading the DB already
+
+    assert selector.get().mode == "standalone"
+    local["ready"] = True
+    backend = selector.get()
+    assert backend.mode == "server" and backend.server == "http://127.0.0.1:4954"
+
+
+def test_selector_uses_a_fresh_shared_db_while_server_starts(local):
+    metadata = cache_dir("trivy", "shared") / "db" / "metadata.json"
+    metadata.parent.mkdir(parents=True)
+    metadata.write_text("{}")
+
+    selector = _Selector()
+    assert selector.get().mode == "shared"
+    local["ready"] = True
+    assert selector.get().mode == "server"
+
+
+def test_selector_falls_back_to_shared_when_server_exits(local):
+    local["alive"] = False
+    selector = _Selector()
+    assert selector.get().mode == "shared" and local["downloads"] == 1
+    assert selector.pending is None
@@ -0,0 +1,77 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from analysis.repo_scan import vuln_index
+from analysis.repo_scan.trivy_server import TrivyBackend
+from analysis.repo_scan.vuln_index import VulnIndex, scan_components
+
+JINJA = "pkg:pypi/jinja2@3.1.2"
+NUMPY = "pkg:pypi/numpy@1.26.4"
+EXOTIC = "pkg:generic/firmware@1.0"   # an ecosystem Trivy does not analyze
+DB = "2026-10-01T00:00:00Z"
+
+
+@pytest.fixture
+def trivy(monkeypatch):
+    """Fake ``trivy sbom``: analyzes pypi components; jinja2 is vulnerable."""
+    calls = []
+
+    def run(cmd, check, timeout):
+        sbom = json.loads(Path(cmd[-1]).read_text())
+        purls = [c["purl"] for c in sbom["components"]]
+        calls.append(purls)
+        pypi = [purl for purl in purls if purl.startswith("pkg:pypi/")]
+        report = {"Results": [{
+            "Target": "components.cdx.json",
+            "Type": "python-pkg",
+            "Packages": [{"Name": purl, "Identifier": {"PURL": purl, "BOMRef": purl}} for purl in pypi],
+            "Vulnerabilities": [
+                {"VulnerabilityID": "CVE-2024-0001", "Severity": "HIGH",
+                 "PkgIdentifier": {"PURL": JINJA, "BOMRef": JINJA}},
+            ] if JINJA in pypi else [],
+        }]}
+        Path(cmd[cmd.index("--output") + 1]).write_text(json.dumps(report))
+
+    monkeypatch.setattr(vuln_index.subprocess, "run", run)
+    monkeypatch.setattr(vuln_index, "trivy_backend", lambda: TrivyBackend("standalone"))
+    return calls
+
+
+def test_only_analyzed_components_are_returned(trivy):
+    assert scan_components([JINJA, NUMPY, EXOTIC]) == {
+        JINJA: [("CVE-2024-0001", "high")],
+        NUMPY: [],
+    }
+
+
+def test_work_dir_is_removed_on_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(vuln_index, "trivy_backend", lambda: TrivyBackend("standalone"))
+
+    def run(cmd, check, timeout):
+        raise vuln_index.subprocess.CalledProcessError(1, cmd)
+
+    monkeypatch.setattr(vuln_index.subprocess, "run", run)
+    with pytest.raises(vuln_index.subprocess.CalledProcessError):
+        scan_components([JINJA])
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unanalyzed_components_are_never_cached(tmp_path, trivy):
+    index = VulnIndex(tmp_path / "index")
+    assert index.severities([JINJA, NUMPY, EXOTIC], DB)["high"] == 1
+    assert index.get([JINJA, NUMPY, EXOTIC], DB) == {JINJA: [("CVE-2024-0001", "high")], NUMPY: []}
+
+    index.resolve([JINJA, NUMPY, EXOTIC], DB)
+    assert trivy == [[JINJA, NUMPY, EXOTIC], [EXOTIC]]
+
+
+def test_entries_are_keyed_by_db_version(tmp_path, trivy):
+    index = VulnIndex(tmp_path / "index")
+    index.resolve([JINJA], DB)
+    index.resolve([JINJA], DB)
+    index.resolve([JINJA], "2026-10-02T00:00:00Z")
+    assert trivy == [[JINJA], [JINJA]]
@@ -0,0 +1,41 @@
+import io
+import zipfile
+
+import pytest
+
+from utils.zip_pack import ZipPack
+
+
+def test_pack_roundtrip(tmp_path):
+    (tmp_path / "sbom.json").write_text('{"components": []}')
+    with ZipPack() as pack:
+        pack.add_file("sbom.json", tmp_path / "sbom.json")
+        pack.add_text("POLICY.md", "# Policy\n")
+        pack.add_chunks("notes.txt", iter(["a", b"b", "c"]))
+        with pack.close() as archive:
+            data = archive.read()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.read("POLICY.md") == b"# Policy\n"
+        assert archive.read("notes.txt") == b"abc"
+        assert archive.namelist() == ["sbom.json", "POLICY.md", "notes.txt"]
+
+
+def test_error_before_close_aborts_the_pack(tmp_path):
+    path = tmp_path / "pack.zip"
+    with pytest.raises(RuntimeError):
+        with ZipPack(path) as pack:
+            pack.add_text("POLICY.md", "# Policy\n")
+            raise RuntimeError("render failed")
+
+    assert not pack._thread.is_alive()
+    assert pack.file.closed and not path.exists()
+
+
+def test_writer_error_is_raised_by_close(tmp_path):
+    path = tmp_path / "pack.zip"
+    with ZipPack(path) as pack:
+        pack.add_file("missing.json", tmp_path / "missing.json")
+        with pytest.raises(FileNotFoundError):
+            pack.close()
+    assert not path.exists()
@@ -0,0 +1,116 @@
+"""
+Cross-file Findings Aggregation
+
+Groups identical findings across the files of a scan: one group per rule and
+element set, with a file count and a bounded sample of locations. Reports
+and UIs built from the groups scale with the number of distinct issues
+rather than with the number of files, and recommendations are listed once.
+"""
+
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.compliance_findings import (
+    GENERAL_RECOMMENDATIONS, RISK_ORDER, ComplianceResult, Rule, render_finding,
+)
+
+# Locations kept per group
+DEFAULT_MAX_LOCATIONS = 5
+
+
+class FindingGroup:
+    """Every occurrence of one rule firing with the same elements"""
+
+    __slots__ = ("rule", "elements", "count", "locations")
+
+    def __init__(self, rule: Rule, elements: Tuple[str, ...]):
+        self.rule = rule
+        self.elements = elements
+        self.count = 0
+        self.locations: List[str] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "standard": self.rule.standard,
+            **render_finding(self.rule, self.elements),
+            "count": self.count,
+            "locations": list(self.locations),
+        }
+
+
+class FindingsAggregate:
+    """
+    Deduplicated findings of many files.
+
+    Locations are reservoir-sampled, so every file has the same chance of
+    being listed however many files share a finding.
+
+    Args:
+        max_locations: Number of sample locations kept per group
+        seed: Seed of the location sampler (for reproducible reports)
+    """
+
+    def __init__(self, max_locations: int = DEFAULT_MAX_LOCATIONS, seed: Optional[int] = 0):
+        self.max_locations = max_locations
+        self.files = 0
+        self.overall_risk = "low"
+        self._groups: Dict[Tuple[str, int, Tuple[str, ...]], FindingGroup] = {}
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def add(self, path: str, result: ComplianceResult) -> None:
+        """Fold the findings of one file into the groups"""
+        self.files += 1
+        if RISK_ORDER[result.overall_risk] > RISK_ORDER[self.overall_risk]:
+            self.overall_risk = result.overall_risk
+
+        version = result.table.version
+        for finding in result.findings:
+            key = (version, finding.rule_id, finding.elements)
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = FindingGroup(result.rule(finding), finding.elements)
+            self._sample(group, path)
+
+    def _sample(self, group: FindingGroup, path: str) -> None:
+        group.count += 1
+        if len(group.locations) < self.max_locations:
+            group.locations.append(path)
+        else:
+            slot = self._random.randrange(group.count)
+            if slot < self.max_locations:
+                group.locations[slot] = path
+
+    def consume(self, scan: Iterable[Tuple[str, ComplianceResult]]
+                ) -> Iterator[Tuple[str, ComplianceResult]]:
+        """Aggregate a scan while passing its results through"""
+        for path, result in scan:
+            self.add(path, result)
+            yield path, result
+
+    def groups(self) -> List[FindingGroup]:
+        """Groups by decreasing risk, then decreasing number of files"""
+        return sorted(
+            self._groups.values(),
+            key=lambda group: (-RISK_ORDER[group.rule.risk_level], -group.count),
+        )
+
+    def issues(self, standard: str) -> List[FindingGroup]:
+        return [group for group in self.groups() if group.rule.standard == standard]
+
+    def recommendations(self) -> List[str]:
+        """Each distinct recommendation once, most urgent first, then the general ones"""
+        recommendations = dict.fromkeys(group.rule.recommendation for group in self.groups())
+        recommendations.update(dict.fromkeys(GENERAL_RECOMMENDATIONS.get(self.overall_risk, ())))
+        return list(recommendations)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "overall_risk": self.overall_risk,
+            "ai_act": [group.as_dict() for group in self.issues("ai_act")],
+            "iso_42001": [group.as_dict() for group in self.issues("iso_42001")],
+            "recommendations": self.recommendations(),
+        }
@@ -0,0 +1,142 @@
+"""
+Compliance Findings Cache
+
+On-disk cache of per-file compliance findings, keyed by the file content hash
+and the version of the rule set that produced them. Findings are stored as the
+list of rule keywords a file mentions, from which ``ComplianceChecker.evaluate``
+rebuilds the full result.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+from utils.cache_dir import cache_dir
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    digest    TEXT    NOT NULL,
+    ruleset   TEXT    NOT NULL,
+    file_type TEXT    NOT NULL,
+    payload   BLOB    NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL    NOT NULL,
+    PRIMARY KEY (digest, ruleset, file_type)
+);
+CREATE INDEX IF NOT EXISTS findings_last_used ON findings (last_used);
+"""
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Return the content hash used as cache key.
+
+    This is git's blob id, so hashes of committed files can also be read from
+    ``git ls-tree`` without opening the files.
+    """
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def file_digest(path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """``content_digest`` of a file, read in fixed-size chunks"""
+    with open(path, "rb") as f:
+        digest = hashlib.sha1(b"blob %d\0" % os.fstat(f.fileno()).st_size)
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FindingsCache:
+    """
+    SQLite-backed findings cache with a size cap and LRU eviction.
+
+    Entries written under another rule-set version are never returned, so
+    changing a rule definition invalidates them automatically; they age out
+    through normal eviction. The database runs in WAL mode so pool workers
+    can read while the parent process writes.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path else cache_dir("findings") / "findings.sqlite"
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes: Optional[int] = None
+
+    def __reduce__(self):
+        # Connections are per process: workers reopen the database lazily
+        return type(self), (self.path, self.max_bytes)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def get(self, digest: str, ruleset: str, file_type: str) -> Optional[List[str]]:
+        """Return the cached keywords of a file, or ``None`` on a miss"""
+        row = self.conn.execute(
+            "SELECT payload FROM findings WHERE digest = ? AND ruleset = ? AND file_type = ?",
+            (digest, ruleset, file_type),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, digest: str, ruleset: str, file_type: str, found: List[str]) -> None:
+        """Store the keywords found in a file (call ``commit`` to persist)"""
+        payload = json.dumps(found, separators=(",", ":")).encode("utf-8")
+        if self._total_bytes is not None:
+            # A replaced entry's bytes are freed by the write
+            row = self.conn.execute(
+                "SELECT size FROM findings WHERE digest = ? AND ruleset = ? AND file_type = ?",
+                (digest, ruleset, file_type),
+            ).fetchone()
+            self._total_bytes += len(payload) - (row[0] if row else 0)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?)",
+            (digest, ruleset, file_type, payload, len(payload), time.time()),
+        )
+
+    def touch(self, digest: str, ruleset: str, file_type: str) -> None:
+        """Mark an entry as recently used"""
+        self.conn.execute(
+            "UPDATE findings SET last_used = ? WHERE digest = ? AND ruleset = ? AND file_type = ?",
+            (time.time(), digest, ruleset, file_type),
+        )
+
+    def commit(self) -> None:
+        """Persist pending writes and evict least recently used entries over the cap"""
+        conn = self.conn
+        if self._total_bytes is None:
+            self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM findings").fetchone()[0]
+
+        if self._total_bytes > self.max_bytes:
+            # Evict down to 90% of the cap so eviction does not run on every commit
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+            stale = []
+            for rowid, size in conn.execute("SELECT rowid, size FROM findings ORDER BY last_used"):
+                if self._total_bytes - freed <= target:
+                    break
+                stale.append((rowid,))
+                freed += size
+            conn.executemany("DELETE FROM findings WHERE rowid = ?", stale)
+            self._total_bytes -= freed
+
+        conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.commit()
+            self._conn.close()
+            self._conn = None
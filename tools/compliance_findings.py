@@ -0,0 +1,218 @@
+"""
+Compliance Findings Model
+
+Compact representation of compliance findings. Rule metadata (finding type,
+risk level, description and recommendation templates) lives once in a shared
+``RuleTable``; each ``Finding`` only stores an integer rule id and the
+keywords involved. Descriptions, summaries and the dictionary shape returned
+by ``ComplianceChecker.analyze_code`` are rendered on demand.
+"""
+
+import weakref
+from typing import Any, Container, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+# Risk levels from least to most severe
+RISK_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+_SPEC_FIELDS = ("standard", "group", "type", "trigger", "risk_level",
+                "description", "recommendation", "keywords")
+
+# Interned tables by rule-set version, shared by every result in the process
+_tables: "weakref.WeakValueDictionary[str, RuleTable]" = weakref.WeakValueDictionary()
+
+
+class Rule:
+    """One requirement group and how it turns into findings"""
+
+    __slots__ = ("id", "standard", "group", "type", "trigger", "risk_level",
+                 "description", "recommendation", "keywords", "_keys")
+
+    def __init__(self, id: int, standard: str, group: str, type: str, trigger: str,
+                 risk_level: str, description: str, recommendation: str,
+                 keywords: Sequence[str]):
+        self.id = id
+        self.standard = standard
+        self.group = group
+        self.type = type
+        self.trigger = trigger              # "present" or "missing"
+        self.risk_level = risk_level
+        self.description = description      # template with an {elements} field
+        self.recommendation = recommendation
+        self.keywords = tuple(keywords)
+        self._keys = tuple(keyword.lower() for keyword in self.keywords)
+
+    def spec(self) -> Dict[str, Any]:
+        """The keyword arguments this rule was built from (minus its id)"""
+        return {name: getattr(self, name) for name in _SPEC_FIELDS}
+
+
+class Finding:
+    """A fired rule: the rule id plus the keywords found (or missing)"""
+
+    __slots__ = ("rule_id", "elements")
+
+    def __init__(self, rule_id: int, elements: Tuple[str, ...]):
+        self.rule_id = rule_id
+        self.elements = elements
+
+    def __reduce__(self):
+        return Finding, (self.rule_id, self.elements)
+
+
+class RuleTable:
+    """Ordered, immutable set of rules identified by a rule-set version"""
+
+    def __init__(self, version: str, specs: Iterable[Mapping[str, Any]]):
+        self.version = version
+        self.rules: Tuple[Rule, ...] = tuple(Rule(i, **spec) for i, spec in enumerate(specs))
+
+    @classmethod
+    def intern(cls, version: str, specs: Iterable[Mapping[str, Any]]) -> "RuleTable":
+        """Return the process-wide table for *version*, building it on first use"""
+        table = _tables.get(version)
+        if table is None:
+            table = _tables[version] = cls(version, specs)
+        return table
+
+    def __reduce__(self):
+        # Unpickled results share the receiving process' interned table
+        return RuleTable.intern, (self.version, [rule.spec() for rule in self.rules])
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __getitem__(self, rule_id: int) -> Rule:
+        return self.rules[rule_id]
+
+    def evaluate(self, found: Container[str]) -> "ComplianceResult":
+        """Fire every rule against the (lowercase) keywords found in a document"""
+        findings: List[Finding] = []
+        risk = 0
+        for rule in self.rules:
+            if rule.trigger == "present":
+                fired = [
+                    Finding(rule.id, (keyword,))
+                    for keyword, key in zip(rule.keywords, rule._keys)
+                    if key in found
+                ]
+            else:
+                missing = tuple(
+                    keyword for keyword, key in zip(rule.keywords, rule._keys) if key not in found
+                )
+                fired = [Finding(rule.id, missing)] if missing else []
+            if fired:
+                findings.extend(fired)
+                risk = max(risk, RISK_ORDER[rule.risk_level])
+
+        overall_risk = ("low", "medium", "high")[risk]
+        return ComplianceResult(self, tuple(findings), overall_risk)
+
+
+# Recommendations added once per report, by overall risk level
+GENERAL_RECOMMENDATIONS = {
+    "high": (
+        "Conduct a full Data Protection Impact Assessment (DPIA)",
+        "Implement a complete AI governance framework",
+        "Consider seeking external certification or audit",
+    ),
+    "medium": (
+        "Document all AI system components and their purpose",
+        "Implement risk monitoring and mitigation procedures",
+    ),
+}
+
+
+def render_summary(overall_risk: str, ai_act_issues: int, iso_issues: int) -> str:
+    """Generate a summary of compliance findings"""
+    summary = f"Compliance Analysis Summary:\n"
+    summary += f"- Overall Risk Level: {overall_risk.upper()}\n"
+    summary += f"- EU AI Act Issues: {ai_act_issues}\n"
+    summary += f"- ISO 42001 Issues: {iso_issues}\n\n"
+
+    if overall_risk == "high":
+        summary += "URGENT: This code contains high-risk elements that require immediate attention for regulatory compliance."
+    elif overall_risk == "medium":
+        summary += "ATTENTION NEEDED: Several compliance issues need to be addressed before production deployment."
+    else:
+        summary += "MINOR ISSUES: Low-risk compliance issues identified, consider addressing them in future updates."
+
+    return summary
+
+
+def _describe(rule: Rule, elements: Tuple[str, ...]) -> str:
+    return rule.description.format(elements=", ".join(elements))
+
+
+def render_finding(rule: Rule, elements: Tuple[str, ...]) -> Dict[str, Any]:
+    """One firing of *rule* in the dictionary shape of ``analyze_code``"""
+    rendered: Dict[str, Any] = {"type": rule.type}
+    if rule.trigger == "present":
+        rendered["category"] = elements[0]
+    else:
+        rendered["missing_elements"] = list(elements)
+    rendered["risk_level"] = rule.risk_level
+    rendered["description"] = _describe(rule, elements)
+    rendered["recommendation"] = rule.recommendation
+    return rendered
+
+
+class ComplianceResult:
+    """
+    Findings for one document.
+
+    Holds only rule ids and keyword references; use ``summary``,
+    ``describe`` or ``as_dict`` to render text when it is actually needed.
+    """
+
+    __slots__ = ("table", "findings", "overall_risk", "_summary")
+
+    def __init__(self, table: RuleTable, findings: Tuple[Finding, ...], overall_risk: str):
+        self.table = table
+        self.findings = findings
+        self.overall_risk = overall_risk
+        self._summary = None
+
+    def __reduce__(self):
+        return ComplianceResult, (self.table, self.findings, self.overall_risk)
+
+    def rule(self, finding: Finding) -> Rule:
+        return self.table[finding.rule_id]
+
+    def issues(self, standard: str) -> List[Finding]:
+        """Findings raised under one standard ("ai_act" or "iso_42001")"""
+        return [f for f in self.findings if self.table[f.rule_id].standard == standard]
+
+    def found_keywords(self) -> List[str]:
+        """The (lowercase) rule keywords the document mentions, recovered from the findings"""
+        found = {key for rule in self.table if rule.trigger == "missing" for key in rule._keys}
+        for finding in self.findings:
+            keys = (keyword.lower() for keyword in finding.elements)
+            if self.table[finding.rule_id].trigger == "present":
+                found.update(keys)
+            else:
+                found.difference_update(keys)
+        return sorted(found)
+
+    def describe(self, finding: Finding) -> str:
+        return _describe(self.table[finding.rule_id], finding.elements)
+
+    @property
+    def summary(self) -> str:
+        if self._summary is None:
+            self._summary = render_summary(
+                self.overall_risk, len(self.issues("ai_act")), len(self.issues("iso_42001"))
+            )
+        return self._summary
+
+    def finding_dict(self, finding: Finding) -> Dict[str, Any]:
+        """Render one finding in the dictionary shape of ``analyze_code``"""
+        return render_finding(self.table[finding.rule_id], finding.elements)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Compatibility view: the findings dictionary returned by ``analyze_code``"""
+        return {
+            "ai_act": [self.finding_dict(f) for f in self.issues("ai_act")],
+            "iso_42001": [self.finding_dict(f) for f in self.issues("iso_42001")],
+            "overall_risk": self.overall_risk,
+            "summary": self.summary,
+        }
@@ -0,0 +1,114 @@
+"""
+Compliance Keyword Matcher
+
+Compiles the compliance rule vocabulary once and finds every keyword in a
+single case-insensitive pass over the analysed content.
+"""
+
+from typing import Dict, Iterable, Iterator, Tuple
+
+try:  # optional C extension, see requirements.txt
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Below this many keywords one ``str.find`` per keyword beats walking the
+# automaton over every character (see the ``matcher/*`` benchmark cases)
+AUTOMATON_MIN_KEYWORDS = 150
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword matcher built on an Aho-Corasick automaton.
+
+    The content is lowercased once per call, which keeps the results identical
+    to the ``keyword in code_content.lower()`` checks the analyzers used to run
+    for every keyword. Offsets therefore refer to the lowercased text, which is
+    the same as the input for ASCII content.
+
+    Small vocabularies (fewer than ``AUTOMATON_MIN_KEYWORDS``), or a missing
+    ``pyahocorasick``, use one ``str.find`` per keyword over that single
+    lowercased copy instead.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(k.lower() for k in keywords))
+        self.max_length = max(map(len, self.keywords), default=0)
+
+        self._automaton = None
+        if ahocorasick is not None and len(self.keywords) >= AUTOMATON_MIN_KEYWORDS:
+            automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def __reduce__(self):
+        # Rebuild the automaton on unpickling (e.g. in process pool workers)
+        return type(self), (self.keywords,)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield ``(offset, keyword)`` for every occurrence of every keyword.
+
+        Overlapping occurrences are all reported; the order is unspecified.
+        """
+        lowered = text.lower()
+        if self._automaton is not None:
+            for end, keyword in self._automaton.iter(lowered):
+                yield end - len(keyword) + 1, keyword
+            return
+
+        for keyword in self.keywords:
+            start = lowered.find(keyword)
+            while start != -1:
+                yield start, keyword
+                start = lowered.find(keyword, start + 1)
+
+    def first_offsets(self, text: str) -> Dict[str, int]:
+        """
+        Return ``{keyword: offset}`` for the first occurrence of each keyword found.
+
+        Stops scanning as soon as every keyword has been seen.
+        """
+        lowered = text.lower()
+        found: Dict[str, int] = {}
+
+        if self._automaton is not None:
+            for end, keyword in self._automaton.iter(lowered):
+                if keyword not in found:
+                    found[keyword] = end - len(keyword) + 1
+                    if len(found) == len(self.keywords):
+                        break
+            return found
+
+        for keyword in self.keywords:
+            offset = lowered.find(keyword)
+            if offset != -1:
+                found[keyword] = offset
+        return found
+
+    def first_offsets_stream(self, chunks: Iterable[str]) -> Dict[str, int]:
+        """
+        Like ``first_offsets`` over the concatenation of *chunks*.
+
+        Only one chunk plus an overlap of ``max_length - 1`` characters from the
+        previous one is held at a time, so keywords crossing a chunk boundary
+        are still found while memory stays bounded by the chunk size.
+        """
+        overlap = max(self.max_length - 1, 0)
+        found: Dict[str, int] = {}
+        tail = ""
+        base = 0  # offset of ``tail`` in the whole text
+
+        for chunk in chunks:
+            window = tail + chunk
+            for keyword, offset in self.first_offsets(window).items():
+                found.setdefault(keyword, base + offset)
+            if len(found) == len(self.keywords):
+                break
+
+            cut = max(len(window) - overlap, 0)
+            tail = window[cut:]
+            base += cut
+        return found
@@ -0,0 +1,96 @@
+"""
+Compliance Findings Matrix
+
+Columnar representation of compliance results for many documents: a
+documents × keywords presence matrix plus vectorized derivations of the
+per-document risk level and missing-element counts.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from tools.compliance_findings import RISK_ORDER
+
+RISK_LEVELS = np.array(sorted(RISK_ORDER, key=RISK_ORDER.get))
+
+
+class FindingsMatrix:
+    """
+    Boolean presence matrix with rows for documents and columns for keywords.
+
+    ``presence[i, j]`` is true when document *i* mentions ``columns[j]``.
+    Results match what ``ComplianceChecker.analyze_code`` reports for each
+    document individually.
+    """
+
+    def __init__(self, presence: np.ndarray, columns: Tuple[str, ...], rules,
+                 groups: Dict[str, np.ndarray]):
+        self.presence = presence
+        self.columns = columns
+        self.rules = rules    # RuleTable of the checker
+        self.groups = groups  # "standard.group" -> column indices
+
+    @classmethod
+    def build(cls, checker, texts: Iterable[str]) -> "FindingsMatrix":
+        columns = checker._matcher.keywords
+        index = {keyword: i for i, keyword in enumerate(columns)}
+
+        rows: List[int] = []
+        cols: List[int] = []
+        n_docs = 0
+        for row, text in enumerate(texts):
+            found = checker.find_keywords(text)
+            rows.extend([row] * len(found))
+            cols.extend(index[keyword] for keyword in found)
+            n_docs = row + 1
+
+        presence = np.zeros((n_docs, len(columns)), dtype=bool)
+        presence[rows, cols] = True
+
+        groups = {
+            f"{rule.standard}.{rule.group}": np.array(
+                [index[keyword.lower()] for keyword in rule.keywords], dtype=np.intp
+            )
+            for rule in checker.rules
+        }
+        return cls(presence, columns, checker.rules, groups)
+
+    def __len__(self) -> int:
+        return self.presence.shape[0]
+
+    def _block(self, rule) -> np.ndarray:
+        return self.presence[:, self.groups[f"{rule.standard}.{rule.group}"]]
+
+    def missing_counts(self) -> Dict[str, np.ndarray]:
+        """Number of missing elements per document for every "missing"-triggered group"""
+        return {
+            f"{rule.standard}.{rule.group}": np.count_nonzero(~self._block(rule), axis=1)
+            for rule in self.rules
+            if rule.trigger == "missing"
+        }
+
+    def issue_counts(self) -> Dict[str, np.ndarray]:
+        """Number of findings per document and standard (``len(findings[standard])``)"""
+        counts: Dict[str, np.ndarray] = {}
+        for rule in self.rules:
+            block = self._block(rule)
+            if rule.trigger == "present":
+                fired = np.count_nonzero(block, axis=1)
+            else:
+                fired = (~block).any(axis=1).astype(np.intp)
+            counts[rule.standard] = counts.get(rule.standard, 0) + fired
+        return counts
+
+    def risk_codes(self) -> np.ndarray:
+        """Overall risk per document as 0 (low), 1 (medium) or 2 (high)"""
+        codes = np.zeros(len(self), dtype=np.uint8)
+        for rule in self.rules:
+            block = self._block(rule)
+            fired = block.any(axis=1) if rule.trigger == "present" else (~block).any(axis=1)
+            np.maximum(codes, np.where(fired, RISK_ORDER[rule.risk_level], 0).astype(np.uint8), out=codes)
+        return codes
+
+    def overall_risk(self) -> np.ndarray:
+        """Overall risk label ("low", "medium" or "high") per document"""
+        return RISK_LEVELS[self.risk_codes()]
@@ -0,0 +1,201 @@
+"""
+Streaming Compliance Reports
+
+Writes repository scan results as NDJSON: a header record, one record per
+finding as files complete, and a trailing summary record. Nothing is kept in
+memory beyond the current file, and the output is flushed by a timer so a
+consumer can start reading before the scan ends, even while it stalls.
+
+In aggregated mode, identical findings are grouped across files instead and
+written as one record per distinct issue, followed by the deduplicated
+recommendations.
+
+Records are encoded with ``orjson`` when it is installed (and a compact
+``json`` encoder otherwise).
+
+Usage: python -m tools.compliance_report ROOT [OUTPUT]   (OUTPUT defaults to stdout)
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from tools.compliance_aggregate import FindingsAggregate
+from tools.compliance_findings import ComplianceResult
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+# Seconds between forced flushes of the output
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+_compact = json.JSONEncoder(separators=(",", ":"), default=str)
+
+
+def json_encoder(fast: bool = True) -> Callable[[Any], bytes]:
+    """
+    Return a compact ``obj -> bytes`` JSON encoder.
+
+    Args:
+        fast: Use ``orjson`` when available instead of the standard library
+    """
+    if fast and orjson is not None:
+        return lambda obj: orjson.dumps(obj, default=str)
+    return lambda obj: _compact.encode(obj).encode("ascii")
+
+
+class NDJSONReportWriter:
+    """
+    Line-per-record compliance report.
+
+    Args:
+        out: Output path, binary file object, or "-" for stdout
+        fast: Prefer the ``orjson`` encoder
+        flush_interval: Maximum seconds a written record may sit in the buffer;
+            a background thread flushes pending records once it elapses
+    """
+
+    def __init__(self, out: Union[str, Path, BinaryIO], fast: bool = True,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        if out == "-":
+            self._file, self._owned = sys.stdout.buffer, False
+        elif isinstance(out, (str, Path)):
+            self._file, self._owned = open(out, "wb"), True
+        else:
+            self._file, self._owned = out, False
+        self._encode = json_encoder(fast)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self.records = 0
+        # Guards the file between writers and the flush timer
+        self._lock = threading.Lock()
+        self._pending = False
+        self._closed = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "NDJSONReportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = self._encode(record) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self.records += 1
+            self._pending = True
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Thread(target=self._flush_timer, daemon=True)
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._file.flush()
+        self._pending = False
+        self._last_flush = time.monotonic()
+
+    def _flush_timer(self) -> None:
+        while not self._closed.wait(self.flush_interval / 2):
+            with self._lock:
+                if (self._pending and not self._closed.is_set()
+                        and time.monotonic() - self._last_flush >= self.flush_interval):
+                    self._flush()
+
+    def header(self, **meta: Any) -> None:
+        """Write the leading record describing the scan"""
+        self.write({
+            "record": "header",
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **meta,
+        })
+        self.flush()
+
+    def result(self, path: str, result: ComplianceResult) -> None:
+        """Write one record per finding of a file"""
+        for finding in result.findings:
+            self.write({
+                "record": "finding",
+                "path": path,
+                "standard": result.rule(finding).standard,
+                **result.finding_dict(finding),
+            })
+
+    def aggregate(self, aggregate: FindingsAggregate) -> None:
+        """Write one record per distinct finding group, then the recommendations"""
+        for group in aggregate.groups():
+            self.write({"record": "group", **group.as_dict()})
+        self.write({"record": "recommendations", "recommendations": aggregate.recommendations()})
+
+    def summary(self, summary: Dict[str, Any]) -> None:
+        """Write the trailing summary record"""
+        self.write({"record": "summary", **summary})
+        self.flush()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+        if self._owned:
+            self._file.close()
+
+
+def write_scan_report(scan: Iterable[Tuple[str, ComplianceResult]],
+                      out: Union[str, Path, BinaryIO], fast: bool = True,
+                      meta: Optional[Dict[str, Any]] = None,
+                      aggregate: bool = False) -> Dict[str, Any]:
+    """
+    Stream a scan (e.g. ``ComplianceChecker.analyze_tree``) into an NDJSON report.
+
+    Args:
+        scan: Iterable of ``(relative_path, ComplianceResult)``, such as a TreeScan
+        out: Output path, binary file object, or "-" for stdout
+        fast: Prefer the ``orjson`` encoder
+        meta: Extra fields for the header record
+        aggregate: Write deduplicated finding groups once the scan ends
+            instead of one record per finding
+
+    Returns:
+        The summary written as the last record
+    """
+    with NDJSONReportWriter(out, fast=fast) as writer:
+        header = dict(meta or {})
+        checker = getattr(scan, "checker", None)
+        if checker is not None:
+            header.setdefault("ruleset", checker.ruleset_version)
+        if hasattr(scan, "root"):
+            header.setdefault("root", str(scan.root))
+        writer.header(**header)
+
+        if aggregate:
+            findings = FindingsAggregate()
+            for path, result in scan:
+                findings.add(path, result)
+            writer.aggregate(findings)
+        else:
+            for path, result in scan:
+                writer.result(path, result)
+
+        summary = scan.summary if hasattr(scan, "summary") else {}
+        writer.summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python -m tools.compliance_report ROOT [OUTPUT]")
+    from tools.compliance_tools import get_compliance_checker
+    write_scan_report(get_compliance_checker().analyze_tree(sys.argv[1]),
+                      sys.argv[2] if len(sys.argv) == 3 else "-")
@@ -0,0 +1,185 @@
+"""
+Compliance Rule Packs
+
+Rule packs describe the requirement groups the ``ComplianceChecker`` applies:
+which keywords belong to each group, whether a finding fires when they are
+present or missing, and how the finding is described. Packs are plain
+YAML/JSON files of the form::
+
+    name: healthcare-high-risk
+    rules:
+      - standard: ai_act
+        group: high_risk_systems
+        type: high_risk_system
+        trigger: present          # or "missing"
+        risk_level: high          # low / medium / high
+        description: "Potential high-risk AI system identified: {elements}"
+        recommendation: "Conduct a full impact assessment"
+        keywords: [patient_triage, clinical_decision_support]
+
+Each pack is validated once and stored as a compact JSON artifact in the
+on-disk cache, keyed by the hash of the pack source. Later loads read the
+artifact instead of parsing the YAML source (the slow part), and every
+checker in a process shares the same loaded pack. The artifact is plain
+data: loading one never runs code, and it is validated again on load. When
+the cache directory is not usable the pack is compiled in memory.
+
+Usage: python -m tools.compliance_rules PACK [PACK ...]   (precompile packs)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+from tools.compliance_matcher import KeywordMatcher
+from utils.cache_dir import cache_dir
+
+# Bump when the artifact layout changes
+ARTIFACT_FORMAT = 2
+
+_TRIGGERS = {"present", "missing"}
+_RISK_LEVELS = {"low", "medium", "high"}
+_RULE_FIELDS = ("standard", "group", "type", "trigger", "risk_level",
+                "description", "recommendation", "keywords")
+
+# Loaded packs by source digest, shared by every checker in the process
+_loaded: Dict[str, "RulePack"] = {}
+
+RulePackSource = Union[str, Path, Mapping[str, Any]]
+
+
+class RulePack:
+    """A compiled rule pack: validated rules plus a ready-to-use keyword matcher"""
+
+    def __init__(self, name: str, version: str, rules: List[Dict[str, Any]],
+                 matcher: KeywordMatcher):
+        self.name = name
+        self.version = version    # rule-set version used to key cached findings
+        self.rules = rules
+        self.matcher = matcher
+
+    def requirements(self, standard: str) -> Dict[str, List[str]]:
+        """Keywords per requirement group of one standard"""
+        return {
+            rule["group"]: list(rule["keywords"])
+            for rule in self.rules
+            if rule["standard"] == standard
+        }
+
+
+def _validate(pack: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    rules = pack.get("rules")
+    if not isinstance(rules, list) or not rules:
+        raise ValueError("Rule pack must define a non-empty 'rules' list")
+
+    validated = []
+    for i, rule in enumerate(rules):
+        missing = [field for field in _RULE_FIELDS if field not in rule]
+        if missing:
+            raise ValueError(f"Rule #{i} is missing: {', '.join(missing)}")
+        if rule["trigger"] not in _TRIGGERS:
+            raise ValueError(f"Rule #{i} has an invalid trigger: {rule['trigger']!r}")
+        if rule["risk_level"] not in _RISK_LEVELS:
+            raise ValueError(f"Rule #{i} has an invalid risk level: {rule['risk_level']!r}")
+        keywords = rule["keywords"]
+        if not isinstance(keywords, list) or not all(
+                isinstance(keyword, str) and keyword for keyword in keywords):
+            raise ValueError(f"Rule #{i} keywords must be non-empty strings")
+        validated.append({field: rule[field] for field in _RULE_FIELDS})
+    return validated
+
+
+def _parse(path: Path, raw: bytes) -> Mapping[str, Any]:
+    if path.suffix in (".yml", ".yaml"):
+        import yaml  # only needed for YAML packs
+        return yaml.safe_load(raw)
+    return json.loads(raw)
+
+
+def _compile(pack: Mapping[str, Any], version: str) -> RulePack:
+    rules = _validate(pack)
+    matcher = KeywordMatcher(keyword for rule in rules for keyword in rule["keywords"])
+    return RulePack(pack.get("name", "custom"), version, rules, matcher)
+
+
+def _save_artifact(path: Path, pack: RulePack) -> None:
+    payload = {
+        "format": ARTIFACT_FORMAT,
+        "name": pack.name,
+        "version": pack.version,
+        "rules": pack.rules,
+    }
+    # Write to a temporary file first so concurrent loaders never see a partial artifact
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _load_artifact(path: Path) -> Optional[RulePack]:
+    try:
+        payload = json.loads(path.read_bytes())
+        if payload.get("format") != ARTIFACT_FORMAT:
+            return None
+        # The cache directory is shared: never trust an artifact blindly
+        return _compile(payload, str(payload["version"]))
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        # Missing, unreadable, partial or tampered with
+        return None
+
+
+def load_rule_pack(source: RulePackSource) -> RulePack:
+    """
+    Load a rule pack, compiling it on first use.
+
+    Args:
+        source: Path to a YAML/JSON pack, or the pack itself as a mapping
+
+    Returns:
+        The compiled pack, shared with every other caller in the process
+    """
+    from tools.compliance_tools import ANALYZER_VERSION
+
+    if isinstance(source, Mapping):
+        path = None
+        raw = json.dumps(source, sort_keys=True).encode("utf-8")
+    else:
+        path = Path(source)
+        raw = path.read_bytes()
+
+    digest = hashlib.sha256(ANALYZER_VERSION.encode("utf-8") + b"\0" + raw).hexdigest()
+    pack = _loaded.get(digest)
+    if pack is not None:
+        return pack
+
+    try:
+        artifact: Optional[Path] = cache_dir("rule_packs") / f"{digest}.json"
+    except OSError:
+        artifact = None
+    pack = _load_artifact(artifact) if artifact is not None else None
+    if pack is None:
+        pack = _compile(source if path is None else _parse(path, raw), digest[:16])
+        if artifact is not None:
+            try:
+                _save_artifact(artifact, pack)
+            except OSError:
+                pass  # read-only or full cache: the in-memory pack works all the same
+
+    _loaded[digest] = pack
+    return pack
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python -m tools.compliance_rules PACK [PACK ...]")
+    for arg in sys.argv[1:]:
+        pack = load_rule_pack(arg)
+        print(f"{arg}: {pack.name} v{pack.version} ({len(pack.matcher.keywords)} keywords)")
@@ -6,191 +6,358 @@ Tools for analyzing code compliance with AI regulations and standards.
 
 import os
 import json
+import codecs
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
+from typing import Container, Dict, Iterable, Iterator, List, Optional, Union, Any
+
+from tools.compliance_findings import (
+    GENERAL_RECOMMENDATIONS, ComplianceResult, RuleTable, render_summary,
+)
+from tools.compliance_rules import RulePackSource, load_rule_pack
+
+# Bump when the analysis logic changes so cached findings are invalidated
+ANALYZER_VERSION = "2"
+
+# Built-in vocabularies of the default rule pack
+AI_ACT_REQUIREMENTS = {
+    "high_risk_systems": [
+        "biometric_identification",
+        "critical_infrastructure",
+        "education_training",
+        "employment_worker_management",
+        "essential_services",
+        "law_enforcement",
+        "migration_asylum",
+        "administration_justice"
+    ],
+    "documentation_requirements": [
+        "technical_documentation",
+        "risk_assessment",
+        "data_governance",
+        "human_oversight",
+        "accuracy_metrics",
+        "logging_capabilities",
+        "transparency_information"
+    ],
+    "prohibited_systems": [
+        "subliminal_manipulation",
+        "vulnerability_exploitation",
+        "social_scoring",
+        "real_time_biometric_identification"
+    ]
+}
+
+ISO_42001_REQUIREMENTS = {
+    "governance": [
+        "ai_policy",
+        "roles_responsibilities",
+        "risk_management_process",
+        "continuous_improvement"
+    ],
+    "documentation": [
+        "ai_inventory",
+        "data_quality_assessment",
+        "model_validation",
+        "implementation_records",
+        "performance_monitoring"
+    ],
+    "operational_controls": [
+        "change_management",
+        "incident_response",
+        "data_protection",
+        "supplier_management",
+        "training_awareness"
+    ]
+}
+
+# How each requirement group turns into findings: the trigger says whether a
+# finding fires for every keyword "present" or once when any is "missing";
+# descriptions are templates filled with the keywords involved
+RULE_GROUPS = [
+    {
+        "standard": "ai_act",
+        "group": "high_risk_systems",
+        "type": "high_risk_system",
+        "trigger": "present",
+        "risk_level": "high",
+        "description": "Potential high-risk AI system identified: {elements}",
+        "recommendation": "Conduct a full impact assessment and ensure all documentation requirements are met",
+    },
+    {
+        # Simple heuristic check for documentation mentions
+        # (a "document_<req>" mention always contains <req> itself)
+        "standard": "ai_act",
+        "group": "documentation_requirements",
+        "type": "documentation",
+        "trigger": "missing",
+        "risk_level": "medium",
+        "description": "Missing documentation elements: {elements}",
+        "recommendation": "Add comments or documentation addressing these missing elements",
+    },
+    {
+        "standard": "ai_act",
+        "group": "prohibited_systems",
+        "type": "prohibited_system",
+        "trigger": "present",
+        "risk_level": "high",
+        "description": "Potential prohibited AI practice identified: {elements}",
+        "recommendation": "Remove or substantially modify this functionality to comply with AI Act",
+    },
+    {
+        "standard": "iso_42001",
+        "group": "governance",
+        "type": "governance",
+        "trigger": "missing",
+        "risk_level": "medium",
+        "description": "Missing governance elements: {elements}",
+        "recommendation": "Implement governance controls for these elements",
+    },
+    {
+        "standard": "iso_42001",
+        "group": "documentation",
+        "type": "documentation",
+        "trigger": "missing",
+        "risk_level": "low",
+        "description": "Missing ISO 42001 documentation elements: {elements}",
+        "recommendation": "Add documentation for these elements",
+    },
+    {
+        "standard": "iso_42001",
+        "group": "operational_controls",
+        "type": "operational_controls",
+        "trigger": "missing",
+        "risk_level": "medium",
+        "description": "Missing operational controls: {elements}",
+        "recommendation": "Implement operational controls for these elements",
+    },
+]
+
+# Built-in rule pack: the vocabularies above combined with RULE_GROUPS
+DEFAULT_RULE_PACK = {
+    "name": "eu-ai-act-iso-42001",
+    "rules": [
+        dict(
+            spec,
+            keywords={"ai_act": AI_ACT_REQUIREMENTS, "iso_42001": ISO_42001_REQUIREMENTS}[
+                spec["standard"]
+            ][spec["group"]],
+        )
+        for spec in RULE_GROUPS
+    ],
+}
+
+# Read size used when streaming files through the analyzer
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+def _iter_text_chunks(path: Union[str, Path], chunk_size: int) -> Iterator[str]:
+    """Yield the UTF-8 text of a file in chunks of at most *chunk_size* bytes"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
 
 class ComplianceChecker:
     """
     Tool to check code for compliance with AI regulations and standards.
     """
     
-    def __init__(self):
-        self.ai_act_requirements = {
-            "high_risk_systems": [
-                "biometric_identification",
-                "critical_infrastructure",
-                "education_training",
-                "employment_worker_management",
-                "essential_services",
-                "law_enforcement",
-                "migration_asylum",
-                "administration_justice"
-            ],
-            "documentation_requirements": [
-                "technical_documentation",
-                "risk_assessment",
-                "data_governance",
-                "human_oversight",
-                "accuracy_metrics",
-                "logging_capabilities",
-                "transparency_information"
-            ],
-            "prohibited_systems": [
-                "subliminal_manipulation",
-                "vulnerability_exploitation",
-                "social_scoring",
-                "real_time_biometric_identification"
-            ]
-        }
+    def __init__(self, rule_pack: Optional[RulePackSource] = None):
+        """
+        Args:
+            rule_pack: Path to a YAML/JSON rule pack, or the pack as a mapping
+                (defaults to the built-in EU AI Act / ISO 42001 pack)
+        """
+        self._rule_pack_source = rule_pack
+        self.rule_pack = load_rule_pack(DEFAULT_RULE_PACK if rule_pack is None else rule_pack)
         
-        self.iso_42001_requirements = {
-            "governance": [
-                "ai_policy",
-                "roles_responsibilities",
-                "risk_management_process",
-                "continuous_improvement"
-            ],
-            "documentation": [
-                "ai_inventory",
-                "data_quality_assessment",
-                "model_validation",
-                "implementation_records",
-                "performance_monitoring"
-            ],
-            "operational_controls": [
-                "change_management",
-                "incident_response",
-                "data_protection",
-                "supplier_management",
-                "training_awareness"
-            ]
-        }
+        self.ai_act_requirements = self.rule_pack.requirements("ai_act")
+        self.iso_42001_requirements = self.rule_pack.requirements("iso_42001")
+        
+        # Compiled once per pack so each analysis is a single pass
+        self._matcher = self.rule_pack.matcher
+        
+        # Identifies the rule definitions in cached findings
+        self.ruleset_version = self.rule_pack.version
+        
+        # Rule metadata shared by every result built from this rule set
+        self.rules = RuleTable.intern(self.ruleset_version, self.rule_pack.rules)
     
-    def analyze_code(self, code_content: str, file_type: str = "py") -> Dict[str, Any]:
+    def __reduce__(self):
+        # Workers reload the compiled pack from the on-disk artifact
+        return ComplianceChecker, (self._rule_pack_source,)
+    
+    def find_keywords(self, code_content: str) -> Dict[str, int]:
         """
-        Analyze code for potential compliance issues.
+        Find every rule keyword in the code in one case-insensitive pass.
         
         Args:
             code_content: The content of the code file to analyze
-            file_type: The type of file (py, js, etc.)
             
         Returns:
-            Dictionary with compliance findings
+            Dictionary mapping each keyword found to its first match offset
         """
-        findings = {
-            "ai_act": self._analyze_ai_act_compliance(code_content, file_type),
-            "iso_42001": self._analyze_iso_42001_compliance(code_content, file_type)
-        }
-        
-        # Calculate overall risk level
-        risk_levels = [finding.get("risk_level", 0) for category in findings.values() 
-                      for finding in category if isinstance(finding, dict)]
+        return self._matcher.first_offsets(code_content)
+    
+    def find_keywords_in_file(self, path: Union[str, Path],
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Streaming variant of ``find_keywords`` for a UTF-8 file.
         
-        if "high" in risk_levels:
-            findings["overall_risk"] = "high"
-        elif "medium" in risk_levels:
-            findings["overall_risk"] = "medium"
-        else:
-            findings["overall_risk"] = "low"
+        Args:
+            path: Path of the file to scan
+            chunk_size: Number of bytes read and scanned at a time
             
-        findings["summary"] = self._generate_compliance_summary(findings)
+        Returns:
+            Dictionary mapping each keyword found to its first match offset
+        """
+        return self._matcher.first_offsets_stream(_iter_text_chunks(path, chunk_size))
+    
+    def analyze(self, code_content: str, file_type: str = "py") -> ComplianceResult:
+        """
+        Analyze code into a compact ``ComplianceResult``.
+        
+        Descriptions and the summary are only rendered when accessed; use
+        ``analyze_code`` for the plain dictionary.
         
-        return findings
+        Args:
+            code_content: The content of the code file to analyze
+            file_type: The type of file (py, js, etc.)
+            
+        Returns:
+            Compact compliance result
+        """
+        return self.evaluate(self.find_keywords(code_content), file_type)
     
-    def _analyze_ai_act_compliance(self, code_content: str, file_type: str) -> List[Dict[str, Any]]:
-        """Analyze code for AI Act compliance issues"""
-        findings = []
+    def evaluate(self, found: Container[str], file_type: str = "py") -> ComplianceResult:
+        """
+        Build the compliance result for a set of keywords found in a file.
         
-        # Check for high-risk indicators
-        for high_risk in self.ai_act_requirements["high_risk_systems"]:
-            if high_risk in code_content.lower():
-                findings.append({
-                    "type": "high_risk_system",
-                    "category": high_risk,
-                    "risk_level": "high",
-                    "description": f"Potential high-risk AI system identified: {high_risk}",
-                    "recommendation": "Conduct a full impact assessment and ensure all documentation requirements are met"
-                })
+        Args:
+            found: Lowercase keywords present, e.g. from ``find_keywords``
+            file_type: The type of file (py, js, etc.)
+            
+        Returns:
+            Compact compliance result
+        """
+        return self.rules.evaluate(found)
+    
+    def analyze_code(self, code_content: str, file_type: str = "py") -> Dict[str, Any]:
+        """
+        Analyze code for potential compliance issues.
         
-        # Check for documentation indicators
-        missing_docs = []
-        for doc_req in self.ai_act_requirements["documentation_requirements"]:
-            # Simple heuristic check for documentation mentions
-            if doc_req not in code_content.lower() and f"document_{doc_req}" not in code_content.lower():
-                missing_docs.append(doc_req)
+        Args:
+            code_content: The content of the code file to analyze
+            file_type: The type of file (py, js, etc.)
+            
+        Returns:
+            Dictionary with compliance findings
+        """
+        return self.analyze(code_content, file_type).as_dict()
+    
+    def analyze_stream(self, chunks: Iterable[str], file_type: str = "py") -> Dict[str, Any]:
+        """
+        Analyze code supplied as consecutive text chunks.
         
-        if missing_docs:
-            findings.append({
-                "type": "documentation",
-                "missing_elements": missing_docs,
-                "risk_level": "medium",
-                "description": f"Missing documentation elements: {', '.join(missing_docs)}",
-                "recommendation": "Add comments or documentation addressing these missing elements"
-            })
+        Only one chunk (plus a small overlap for keywords that cross a chunk
+        boundary) is held at a time, so peak memory does not depend on the
+        total size of the content.
         
-        # Check for prohibited systems indicators
-        for prohibited in self.ai_act_requirements["prohibited_systems"]:
-            if prohibited in code_content.lower():
-                findings.append({
-                    "type": "prohibited_system",
-                    "category": prohibited,
-                    "risk_level": "high",
-                    "description": f"Potential prohibited AI practice identified: {prohibited}",
-                    "recommendation": "Remove or substantially modify this functionality to comply with AI Act"
-                })
+        Args:
+            chunks: Consecutive pieces of the content to analyze
+            file_type: The type of file (py, js, etc.)
+            
+        Returns:
+            Dictionary with compliance findings, as returned by ``analyze_code``
+        """
+        return self.evaluate(self._matcher.first_offsets_stream(chunks), file_type).as_dict()
+    
+    def analyze_file(self, path: Union[str, Path], file_type: Optional[str] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Analyze a (possibly very large) UTF-8 file in streaming mode.
         
-        return findings
+        Args:
+            path: Path of the file to analyze
+            file_type: The type of file (defaults to the file extension)
+            chunk_size: Number of bytes read and scanned at a time
+            
+        Returns:
+            Dictionary with compliance findings, as returned by ``analyze_code``
+        """
+        if file_type is None:
+            file_type = Path(path).suffix.lstrip(".") or "other"
+        return self.evaluate(self.find_keywords_in_file(path, chunk_size), file_type).as_dict()
     
-    def _analyze_iso_42001_compliance(self, code_content: str, file_type: str) -> List[Dict[str, Any]]:
-        """Analyze code for ISO 42001 compliance issues"""
-        findings = []
+    def analyze_many(self, texts: Iterable[str]):
+        """
+        Score many documents at once into a presence matrix.
         
-        # Check for governance indicators
-        missing_governance = []
-        for gov_req in self.iso_42001_requirements["governance"]:
-            if gov_req not in code_content.lower():
-                missing_governance.append(gov_req)
+        Skips building per-file findings and summaries; use the returned
+        matrix to derive risk levels and missing-element counts in bulk.
         
-        if missing_governance:
-            findings.append({
-                "type": "governance",
-                "missing_elements": missing_governance,
-                "risk_level": "medium",
-                "description": f"Missing governance elements: {', '.join(missing_governance)}",
-                "recommendation": "Implement governance controls for these elements"
-            })
+        Args:
+            texts: Contents of the documents to analyze
+            
+        Returns:
+            A ``FindingsMatrix`` with one row per document and one column per
+            rule keyword
+        """
+        from tools.compliance_matrix import FindingsMatrix
+        return FindingsMatrix.build(self, texts)
+    
+    def analyze_tree(self, path: Union[str, Path], jobs: Optional[int] = None, cache=None,
+                     triage=True):
+        """
+        Analyze every file of a repository checkout in a process pool.
         
-        # Check for documentation indicators
-        missing_docs = []
-        for doc_req in self.iso_42001_requirements["documentation"]:
-            if doc_req not in code_content.lower():
-                missing_docs.append(doc_req)
+        Args:
+            path: Root directory, e.g. the one returned by ``clone_repo``
+            jobs: Number of worker processes (defaults to the CPU count)
+            cache: Optional FindingsCache; unchanged files skip analysis
+            triage: ``Triage`` dropping vendored, binary, minified and generated
+                files (``True`` for the default rules, ``False`` to scan everything)
+            
+        Returns:
+            A ``TreeScan`` yielding ``(relative_path, ComplianceResult)`` as
+            files complete; its ``summary`` holds the aggregated repo-level result
+        """
+        from tools.compliance_tree import TreeScan, resolve_triage
+        return TreeScan(path, self, jobs=jobs, cache=cache, triage=resolve_triage(triage))
+    
+    def analyze_diff(self, path: Union[str, Path], base: str, head: str,
+                     jobs: Optional[int] = None, cache=None, triage=True):
+        """
+        Analyze a checkout of *head*, scoping work to the files changed since *base*.
         
-        if missing_docs:
-            findings.append({
-                "type": "documentation",
-                "missing_elements": missing_docs,
-                "risk_level": "low",
-                "description": f"Missing ISO 42001 documentation elements: {', '.join(missing_docs)}",
-                "recommendation": "Add documentation for these elements"
-            })
+        Files are keyed by their git blob ids, so with a FindingsCache only
+        files changed since *base* (or never scanned before) are analyzed and
+        the rest of the verdict is merged from cached findings.
         
-        # Check for operational controls
-        missing_controls = []
-        for control in self.iso_42001_requirements["operational_controls"]:
-            if control not in code_content.lower():
-                missing_controls.append(control)
+        Args:
+            path: Git work tree with *head* checked out and *base* fetched
+            base: Base commit (e.g. the PR target)
+            head: Head commit (e.g. the PR branch)
+            jobs: Number of worker processes (defaults to the CPU count)
+            cache: Optional FindingsCache holding findings of earlier scans
+            triage: ``Triage`` to apply, as for ``analyze_tree``
+            
+        Returns:
+            A ``DiffScan``; its ``summary`` holds the full repo verdict plus a
+            ``changes`` entry for the changed files
+        """
+        from analysis.repo_scan.revisions import changed_files, rev_parse, tree_blobs
+        from tools.compliance_tree import DiffScan, resolve_triage
         
-        if missing_controls:
-            findings.append({
-                "type": "operational_controls",
-                "missing_elements": missing_controls,
-                "risk_level": "medium",
-                "description": f"Missing operational controls: {', '.join(missing_controls)}",
-                "recommendation": "Implement operational controls for these elements"
-            })
+        path = Path(path)
+        base, head = rev_parse(path, base), rev_parse(path, head)
+        if rev_parse(path, "HEAD") != head:
+            raise ValueError("The work tree must have the head commit checked out")
         
-        return findings
+        return DiffScan(path, self, tree_blobs(path, head), changed_files(path, base, head),
+                        jobs=jobs, cache=cache, base=base, head=head,
+                        triage=resolve_triage(triage))
     
     def _generate_compliance_summary(self, findings: Dict[str, Any]) -> str:
         """Generate a summary of compliance findings"""
@@ -198,23 +365,17 @@ class ComplianceChecker:
         iso_issues = len(findings.get("iso_42001", []))
         overall_risk = findings.get("overall_risk", "unknown")
         
-        summary = f"Compliance Analysis Summary:\n"
-        summary += f"- Overall Risk Level: {overall_risk.upper()}\n"
-        summary += f"- EU AI Act Issues: {ai_act_issues}\n"
-        summary += f"- ISO 42001 Issues: {iso_issues}\n\n"
-        
-        if overall_risk == "high":
-            summary += "URGENT: This code contains high-risk elements that require immediate attention for regulatory compliance."
-        elif overall_risk == "medium":
-            summary += "ATTENTION NEEDED: Several compliance issues need to be addressed before production deployment."
-        else:
-            summary += "MINOR ISSUES: Low-risk compliance issues identified, consider addressing them in future updates."
-            
-        return summary
+        return render_summary(overall_risk, ai_act_issues, iso_issues)
 
-def get_compliance_checker() -> ComplianceChecker:
-    """Get an instance of the compliance checker tool"""
-    return ComplianceChecker()
+# Shared checkers by rule pack path (None is the built-in pack)
+_checkers: Dict[Optional[str], ComplianceChecker] = {}
+
+def get_compliance_checker(rule_pack: Optional[Union[str, Path]] = None) -> ComplianceChecker:
+    """Get the shared instance of the compliance checker tool for a rule pack"""
+    key = None if rule_pack is None else str(rule_pack)
+    if key not in _checkers:
+        _checkers[key] = ComplianceChecker(rule_pack)
+    return _checkers[key]
 
 def generate_compliance_report(findings: Dict[str, Any], output_path: Optional[str] = None) -> str:
     """
@@ -226,9 +387,12 @@ def generate_compliance_report(findings: Dict[str, Any], output_path: Optional[s
         
     Returns:
         Path to the generated report
+        
+    For repository-wide scans, stream results with
+    ``tools.compliance_report.write_scan_report`` instead.
     """
     report = {
-        "timestamp": str(Path.now()),
+        "timestamp": datetime.now().isoformat(),
         "findings": findings,
         "recommendations": _generate_recommendations(findings)
     }
@@ -241,22 +405,17 @@ def generate_compliance_report(findings: Dict[str, Any], output_path: Optional[s
     return json.dumps(report, indent=2)
 
 def _generate_recommendations(findings: Dict[str, Any]) -> List[str]:
-    """Generate actionable recommendations based on findings"""
-    recommendations = []
+    """Generate actionable recommendations based on findings (each listed once)"""
+    recommendations = {}
     
     # Extract all recommendations from findings
     for category in ["ai_act", "iso_42001"]:
         for finding in findings.get(category, []):
             if isinstance(finding, dict) and "recommendation" in finding:
-                recommendations.append(finding["recommendation"])
+                recommendations[finding["recommendation"]] = None
     
     # Add general recommendations based on risk level
-    if findings.get("overall_risk") == "high":
-        recommendations.append("Conduct a full Data Protection Impact Assessment (DPIA)")
-        recommendations.append("Implement a complete AI governance framework")
-        recommendations.append("Consider seeking external certification or audit")
-    elif findings.get("overall_risk") == "medium":
-        recommendations.append("Document all AI system components and their purpose")
-        recommendations.append("Implement risk monitoring and mitigation procedures")
+    for recommendation in GENERAL_RECOMMENDATIONS.get(findings.get("overall_risk"), ()):
+        recommendations[recommendation] = None
     
-    return recommendations 
\ No newline at end of file
+    return list(recommendations) 
\ No newline at end of file
@@ -0,0 +1,381 @@
+"""
+Repository-wide Compliance Analysis
+
+Walks a checked-out repository (e.g. the directory returned by
+``analysis.repo_scan.clone.clone_repo``) and fans its files out to a process
+pool, streaming per-file findings back as they complete. A ``Triage`` in
+front of the pool drops vendored, binary, minified and generated files.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import (Any, Collection, Dict, Iterable, Iterator, List, Mapping, NamedTuple,
+                    Optional, Tuple, Union)
+
+from tools.compliance_cache import content_digest, file_digest
+from tools.compliance_findings import RISK_ORDER, ComplianceResult
+from tools.compliance_triage import SNIFF_SIZE, Triage
+
+# Directories that never contain analysable sources
+SKIP_DIRS = {".git", ".hg", ".svn"}
+
+# Files larger than this are hashed and analyzed in streaming mode
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+# Failed files listed by name in the summary (the count is always complete)
+MAX_FAILURES_LISTED = 50
+
+# Per-process checker, cache and triage installed by the pool initializer
+_worker_checker = None
+_worker_cache = None
+_worker_triage = None
+
+
+class Skipped(NamedTuple):
+    """A file dropped by triage after looking at its content"""
+    reason: str
+    size: int
+
+
+class Failed(NamedTuple):
+    """A file that could not be read or analyzed"""
+    error: str
+
+
+# (relative path, result, Skipped or Failed, content digest, served from cache)
+FileResult = Tuple[str, Union[ComplianceResult, Skipped, Failed], Optional[str], bool]
+
+
+def _init_worker(checker, cache, triage=None) -> None:
+    global _worker_checker, _worker_cache, _worker_triage
+    _worker_checker = checker
+    _worker_cache = cache
+    _worker_triage = triage
+
+
+def _file_type(rel_path: str) -> str:
+    return os.path.splitext(rel_path)[1].lstrip(".") or "other"
+
+
+def _analyze_file(checker, cache, root: str, rel_path: str,
+                  digest: Optional[str] = None, triage: Optional[Triage] = None) -> FileResult:
+    """
+    Read one file and return its result, from the cache when possible.
+
+    A *digest* already known to the caller (e.g. a git blob id) lets cache
+    hits skip reading the file altogether. With a *triage*, files whose
+    first bytes look binary, minified or generated are skipped.
+    """
+    path = os.path.join(root, rel_path)
+    file_type = _file_type(rel_path)
+
+    if cache is not None and digest is not None:
+        found = cache.get(digest, checker.ruleset_version, file_type)
+        if found is not None:
+            return rel_path, checker.evaluate(set(found), file_type), digest, True
+
+    size = os.path.getsize(path)
+    streaming = size > STREAM_THRESHOLD
+    with open(path, "rb") as f:
+        data = f.read(SNIFF_SIZE) if streaming else f.read()
+    if triage is not None:
+        reason = triage.sniff(rel_path, data, size)
+        if reason:
+            return rel_path, Skipped(reason, size), None, False
+    if streaming:
+        data = None
+
+    if cache is not None and digest is None:
+        digest = file_digest(path) if streaming else content_digest(data)
+        found = cache.get(digest, checker.ruleset_version, file_type)
+        if found is not None:
+            return rel_path, checker.evaluate(set(found), file_type), digest, True
+
+    if streaming:
+        found = checker.find_keywords_in_file(path)
+    else:
+        found = checker.find_keywords(data.decode("utf-8", errors="ignore"))
+    return rel_path, checker.evaluate(found, file_type), digest, False
+
+
+def _analyze_batch(root: str, items: List[Tuple[str, Optional[str]]]) -> List[FileResult]:
+    """Worker entry point: analyze a batch of ``(relative_path, known digest)`` items"""
+    results = []
+    for rel_path, digest in items:
+        try:
+            results.append(
+                _analyze_file(_worker_checker, _worker_cache, root, rel_path, digest, _worker_triage)
+            )
+        except Exception as exc:
+            # One unreadable or undecodable file must not take the batch down
+            results.append((rel_path, Failed(f"{type(exc).__name__}: {exc}"), None, False))
+    return results
+
+
+def iter_tree_files(root: Union[str, Path]) -> Iterator[str]:
+    """Yield the POSIX paths, relative to *root*, of every regular file in the tree"""
+    root = os.fspath(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for name in sorted(filenames):
+            full_path = os.path.join(dirpath, name)
+            if os.path.islink(full_path) or not os.path.isfile(full_path):
+                continue
+            yield os.path.relpath(full_path, root).replace(os.sep, "/")
+
+
+class _Tally:
+    """Running risk-level and issue counts over a stream of results"""
+
+    def __init__(self):
+        self.files = 0
+        self.risk_levels: Counter = Counter()
+        self.issues: Dict[str, Counter] = {"ai_act": Counter(), "iso_42001": Counter()}
+
+    def add(self, result: ComplianceResult) -> None:
+        self.files += 1
+        self.risk_levels[result.overall_risk] += 1
+        for finding in result.findings:
+            rule = result.rule(finding)
+            key = finding.elements[0] if rule.trigger == "present" else rule.type
+            self.issues.setdefault(rule.standard, Counter())[key] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "overall_risk": max(self.risk_levels, key=RISK_ORDER.get, default="low"),
+            "risk_levels": dict(self.risk_levels),
+            **{standard: dict(counter) for standard, counter in self.issues.items()},
+        }
+
+
+class TreeScan:
+    """
+    Streaming analysis of every file below *root*.
+
+    Iterating yields ``(relative_path, ComplianceResult)`` pairs in completion
+    order.
+    Only a bounded number of batches is in flight at any time, and results are
+    folded into the repo-level ``summary`` as they arrive instead of being
+    retained.
+
+    With a ``FindingsCache``, workers look files up by content hash and only
+    analyze cache misses; the parent process writes new entries back.
+
+    *paths* restricts the scan to the given relative paths (instead of walking
+    the tree) and *digests* supplies content hashes already known for some of
+    them, such as git blob ids.
+
+    With a ``Triage``, ignored paths are dropped while walking and workers
+    skip files whose content looks binary, minified or generated; the
+    summary reports skipped files and bytes per reason.
+    """
+
+    def __init__(self, root: Union[str, Path], checker, jobs: Optional[int] = None,
+                 cache=None, batch_size: int = 32, paths: Optional[Iterable[str]] = None,
+                 digests: Optional[Mapping[str, str]] = None, triage: Optional[Triage] = None):
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise ValueError("root must be an existing directory")
+
+        self.checker = checker
+        self.cache = cache
+        self.jobs = jobs or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.paths = paths
+        self.digests = digests or {}
+        self.triage = triage
+
+        self._tally = _Tally()
+        self._failures: List[Dict[str, str]] = []
+        self._files_failed = 0
+        self._files_cached = 0
+
+    def __iter__(self) -> Iterator[Tuple[str, ComplianceResult]]:
+        for batch in self._results():
+            for rel_path, result, digest, cached in batch:
+                if isinstance(result, Failed):
+                    self._files_failed += 1
+                    if len(self._failures) < MAX_FAILURES_LISTED:
+                        self._failures.append({"path": rel_path, "error": result.error})
+                    continue
+                if isinstance(result, Skipped):
+                    self.triage.record(result.reason, result.size)
+                    continue
+                if self.cache is not None:
+                    self._update_cache(rel_path, result, digest, cached)
+                self._record(rel_path, result, cached)
+                yield rel_path, result
+            if self.cache is not None:
+                self.cache.commit()
+
+    def run(self) -> Dict[str, Any]:
+        """Consume the whole scan and return the repo-level summary"""
+        for _ in self:
+            pass
+        return self.summary
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """Aggregated repo-level result of the files processed so far"""
+        return {
+            "root": str(self.root),
+            "files_analyzed": self._tally.files,
+            "files_failed": self._files_failed,
+            "failures": list(self._failures),
+            "files_cached": self._files_cached,
+            **self._skipped(),
+            **self._tally.summary(),
+        }
+
+    def _skipped(self) -> Dict[str, Any]:
+        stats = self.triage.stats if self.triage is not None else {}
+        return {
+            "files_skipped": sum(entry["files"] for entry in stats.values()),
+            "bytes_skipped": sum(entry["bytes"] for entry in stats.values()),
+            "skipped": stats,
+        }
+
+    def _update_cache(self, rel_path: str, result: ComplianceResult, digest: str,
+                      cached: bool) -> None:
+        ruleset = self.checker.ruleset_version
+        file_type = _file_type(rel_path)
+        if cached:
+            self._files_cached += 1
+            self.cache.touch(digest, ruleset, file_type)
+        else:
+            self.cache.put(digest, ruleset, file_type, result.found_keywords())
+
+    def _record(self, rel_path: str, result: ComplianceResult, cached: bool) -> None:
+        self._tally.add(result)
+
+    def _batches(self) -> Iterator[List[Tuple[str, Optional[str]]]]:
+        if self.paths is not None:
+            paths = (self.paths if self.triage is None
+                     else self.triage.filter_paths(self.paths, self.root))
+        else:
+            paths = iter_tree_files(self.root) if self.triage is None else self.triage.walk(self.root)
+        batch: List[Tuple[str, Optional[str]]] = []
+        for rel_path in paths:
+            batch.append((rel_path, self.digests.get(rel_path)))
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _results(self) -> Iterator[List[FileResult]]:
+        root = str(self.root)
+
+        if self.jobs == 1:
+            _init_worker(self.checker, self.cache, self.triage)
+            for batch in self._batches():
+                yield _analyze_batch(root, batch)
+            return
+
+        max_in_flight = self.jobs * 2
+        with ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=_init_worker, initargs=(self.checker, self.cache, self.triage)
+        ) as pool:
+            pending = set()
+            for batch in self._batches():
+                pending.add(pool.submit(_analyze_batch, root, batch))
+                if len(pending) < max_in_flight:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+
+class DiffScan(TreeScan):
+    """
+    TreeScan of one commit that also tracks the files changed since a base commit.
+
+    Every file of the commit is looked up in the cache by its git blob id, so
+    unchanged files that were scanned before are neither read nor analyzed;
+    only changed (or never seen) files reach the analyzer. ``summary`` is the
+    full repo verdict and its ``changes`` entry covers the changed files only.
+
+    Its ``scope`` says how much work that took: ``"diff"`` when every
+    unchanged file came from the cache, ``"full"`` when none did (e.g. the
+    first scan of a repository, or no cache at all) and ``"partial"`` in
+    between.
+    """
+
+    def __init__(self, root: Union[str, Path], checker, blobs: Mapping[str, str],
+                 changed: Collection[str], jobs: Optional[int] = None, cache=None,
+                 base: Optional[str] = None, head: Optional[str] = None,
+                 triage: Optional[Triage] = None):
+        super().__init__(root, checker, jobs=jobs, cache=cache, paths=list(blobs), digests=blobs,
+                         triage=triage)
+        self.changed = set(changed)
+        self.base = base
+        self.head = head
+        self._changed_tally = _Tally()
+        # Unchanged files served from the cache / analyzed again
+        self._unchanged_cached = 0
+        self._unchanged_analyzed = 0
+
+    def _record(self, rel_path: str, result: ComplianceResult, cached: bool) -> None:
+        super()._record(rel_path, result, cached)
+        if rel_path in self.changed:
+            self._changed_tally.add(result)
+        elif cached:
+            self._unchanged_cached += 1
+        else:
+            self._unchanged_analyzed += 1
+
+    @property
+    def scope(self) -> str:
+        if not self._unchanged_analyzed:
+            return "diff"
+        return "partial" if self._unchanged_cached else "full"
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **super().summary,
+            "base": self.base,
+            "head": self.head,
+            "scope": self.scope,
+            "unchanged_analyzed": self._unchanged_analyzed,
+            "changes": {
+                "files_changed": len(self.changed),
+                "files_analyzed": self._changed_tally.files,
+                **self._changed_tally.summary(),
+            },
+        }
+
+
+def resolve_triage(triage: Union[Triage, bool, None]) -> Optional[Triage]:
+    """``True`` selects the default triage, ``False``/``None`` disables it"""
+    if triage is True:
+        return Triage()
+    return triage or None
+
+
+def analyze_tree(path: Union[str, Path], jobs: Optional[int] = None,
+                 checker=None, cache=None, triage: Union[Triage, bool] = True) -> TreeScan:
+    """
+    Analyze every file of a repository checkout in parallel.
+
+    Args:
+        path: Root directory of the checkout
+        jobs: Number of worker processes (defaults to the CPU count)
+        checker: ComplianceChecker to use (defaults to a new one)
+        cache: Optional FindingsCache; unchanged files skip analysis
+        triage: Triage to apply, ``True`` for the default one, ``False`` for none
+
+    Returns:
+        A TreeScan yielding per-file results; its ``summary`` holds the
+        aggregated repo-level result once iteration finishes
+    """
+    if checker is None:
+        from tools.compliance_tools import ComplianceChecker
+        checker = ComplianceChecker()
+    return TreeScan(path, checker, jobs=jobs, cache=cache, triage=resolve_triage(triage))
@@ -0,0 +1,356 @@
+"""
+Compliance File Triage
+
+Cheap filtering in front of the ``ComplianceChecker`` so that repository
+scans do not spend time on dependencies, build output, lockfiles, media,
+binaries, minified bundles or generated code.
+
+Two stages:
+
+* ``Triage.walk`` filters paths while walking the tree: built-in ignore
+  rules, ``.gitignore`` files (plus ``.git/info/exclude``) and a size limit.
+* ``Triage.sniff`` looks at the first few KB of each file, which the workers
+  read anyway, to skip binaries, minified assets and generated sources.
+
+Skipped files and bytes are counted per reason in ``Triage.stats``.
+"""
+
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+# Built-in ignore rules, in .gitignore syntax
+DEFAULT_IGNORE = [
+    # Dependencies and build output
+    "node_modules/", "bower_components/", "vendor/", "third_party/",
+    ".venv/", "venv/", "site-packages/", "__pycache__/", ".tox/", ".mypy_cache/",
+    "dist/", "build/", "target/", ".next/", "coverage/",
+    # Lockfiles
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "*.lock",
+    # Minified assets and source maps
+    "*.min.js", "*.min.css", "*.map",
+    # Archives, packages and compiled artifacts
+    "*.whl", "*.egg", "*.zip", "*.tar", "*.gz", "*.tgz", "*.bz2", "*.xz", "*.7z", "*.jar",
+    "*.so", "*.dylib", "*.dll", "*.exe", "*.o", "*.a", "*.pyc", "*.class",
+    # Media and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.webp", "*.svg", "*.pdf",
+    "*.mp3", "*.mp4", "*.mov", "*.wav", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Serialized models and data
+    "*.pkl", "*.pt", "*.pth", "*.onnx", "*.h5", "*.npy", "*.npz", "*.parquet",
+    # Generated code with well-known names
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+]
+
+# VCS metadata, never walked nor reported
+_VCS_DIRS = {".git", ".hg", ".svn"}
+
+# Files above this size are skipped before being read. Files above
+# ``compliance_tree.STREAM_THRESHOLD`` (8 MiB) and up to this limit are
+# analyzed in streaming mode, in bounded memory: the limit only caps the
+# time spent on a single file.
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Bytes of each file inspected by ``sniff``
+SNIFF_SIZE = 8192
+
+# Extensions whose files are checked for minification
+_MINIFIABLE = {".js", ".mjs", ".cjs", ".css"}
+# Average line length above which such a file is considered minified
+_MINIFIED_LINE_LENGTH = 500
+
+# Markers of generated sources in the first lines of a file
+_GENERATED = re.compile(rb"@generated|DO NOT EDIT|Code generated by|autogenerated", re.IGNORECASE)
+
+
+# Regex prefix of patterns that match at any depth
+_ANY_DIR = "(?:.*/)?"
+
+
+def _bracket_class(pattern: str, start: int) -> Optional[Tuple[str, int]]:
+    """
+    Translate the ``[...]`` class opening at *start* into a regex class.
+
+    As in git, only a leading ``!`` (or ``^``) negates, and a ``]`` right
+    after the opening bracket (or the negation) is a literal. Returns the
+    regex and the index after the class, or None if the class is not closed.
+    """
+    i = start + 1
+    negated = i < len(pattern) and pattern[i] in "!^"
+    if negated:
+        i += 1
+    body_start = i
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    if i >= len(pattern):
+        return None
+    body = pattern[body_start:i].replace("[", "\\[")
+    if body.startswith("]"):
+        body = "\\" + body
+    if not negated and body.startswith("^"):
+        body = "\\" + body
+    return "[" + ("^" if negated else "") + body + "]", i + 1
+
+
+def _compile_pattern(pattern: str) -> Optional[Tuple[Pattern, bool, bool]]:
+    """Translate one .gitignore line into ``(regex, negated, directory_only)``"""
+    pattern = pattern.rstrip("\n").rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+    if pattern.startswith("\\"):
+        pattern = pattern[1:]
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+
+    # Patterns containing a slash are relative to the .gitignore directory
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and (bracket := _bracket_class(pattern, i)) is not None:
+            class_regex, i = bracket
+            regex += class_regex
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+
+    if not anchored:
+        regex = _ANY_DIR + regex
+    return re.compile(regex + r"\Z"), negated, directory_only
+
+
+def _combine(rules: List[Tuple[Pattern, bool, bool]]) -> Pattern:
+    """One regex matching whatever any of *rules* matches"""
+    floating, anchored = [], []
+    for regex, _, _ in rules:
+        body = regex.pattern[:-len(r"\Z")]
+        if body.startswith(_ANY_DIR):
+            # Share the leading "any directory" part instead of retrying it per rule
+            floating.append(body[len(_ANY_DIR):])
+        else:
+            anchored.append(body)
+    parts = [f"{_ANY_DIR}(?:{'|'.join(floating)})"] if floating else []
+    parts += anchored
+    return re.compile(f"(?:{'|'.join(parts)})\\Z" if parts else r"(?!)")
+
+
+class IgnoreRules:
+    """
+    An ordered list of .gitignore rules relative to one base directory.
+
+    Without negations the order does not matter, and the rules are also
+    combined into one alternation per path kind so a path is matched in a
+    single regex call (the built-in rules have no negations).
+    """
+
+    def __init__(self, patterns: Iterable[str], base: str = ""):
+        self.base = base
+        self.rules = [rule for rule in map(_compile_pattern, patterns) if rule]
+        self._combined: Optional[Tuple[Pattern, Pattern]] = None
+        if not any(negated for _, negated, _ in self.rules):
+            self._combined = (
+                _combine([rule for rule in self.rules if not rule[2]]),   # files
+                _combine(self.rules),                                     # directories
+            )
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path], base: str = "") -> "IgnoreRules":
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                return cls(f, base)
+        except OSError:  # unreadable: nothing to apply
+            return cls((), base)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no rule applies"""
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        if self._combined is not None:
+            return True if self._combined[is_dir].match(rel_path) else None
+
+        verdict = None
+        for regex, negated, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                verdict = not negated
+        return verdict
+
+
+def _size(root: Union[str, Path], rel_path: str) -> int:
+    try:
+        return os.lstat(os.path.join(root, rel_path)).st_size
+    except OSError:
+        return 0
+
+
+class Triage:
+    """
+    Decide which files of a tree are worth analyzing.
+
+    Args:
+        ignore: Ignore rules in .gitignore syntax applied to every tree
+        use_gitignore: Also honour the tree's .gitignore files
+        max_size: Skip files larger than this many bytes (None disables)
+        skip_generated: Skip files carrying a "generated" marker
+    """
+
+    def __init__(self, ignore: Iterable[str] = DEFAULT_IGNORE, use_gitignore: bool = True,
+                 max_size: Optional[int] = DEFAULT_MAX_SIZE, skip_generated: bool = True):
+        self.ignore = IgnoreRules(ignore)
+        self.use_gitignore = use_gitignore
+        self.max_size = max_size
+        self.skip_generated = skip_generated
+
+        self.skipped_files: Counter = Counter()
+        self.skipped_bytes: Counter = Counter()
+        self.skipped_dirs: Counter = Counter()
+
+    def __getstate__(self):
+        # Workers only need the configuration, not the running counts
+        state = self.__dict__.copy()
+        state["skipped_files"] = Counter()
+        state["skipped_bytes"] = Counter()
+        state["skipped_dirs"] = Counter()
+        return state
+
+    def record(self, reason: str, size: int) -> None:
+        self.skipped_files[reason] += 1
+        self.skipped_bytes[reason] += size
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Files and bytes skipped so far, plus directories pruned, per reason"""
+        return {
+            reason: {
+                "files": self.skipped_files[reason],
+                "bytes": self.skipped_bytes[reason],
+                "dirs": self.skipped_dirs[reason],
+            }
+            for reason in self.skipped_files | self.skipped_dirs
+        }
+
+    def _ignored(self, rules: List[IgnoreRules], rel_path: str, is_dir: bool) -> Optional[str]:
+        if self.ignore.match(rel_path, is_dir):
+            return "ignored"
+        verdict = None
+        for gitignore in rules:
+            matched = gitignore.match(rel_path, is_dir)
+            if matched is not None:
+                verdict = matched
+        return "gitignored" if verdict else None
+
+    def walk(self, root: Union[str, Path]) -> Iterator[str]:
+        """Yield the POSIX paths, relative to *root*, of the regular files that pass"""
+        root = os.fspath(root)
+        rules: List[IgnoreRules] = []
+        if self.use_gitignore:
+            exclude = os.path.join(root, ".git", "info", "exclude")
+            if os.path.isfile(exclude):
+                rules.append(IgnoreRules.from_file(exclude))
+        yield from self._walk(root, "", rules)
+
+    def _walk(self, root: str, rel_dir: str, rules: List[IgnoreRules]) -> Iterator[str]:
+        directory = os.path.join(root, rel_dir)
+        if self.use_gitignore and os.path.isfile(os.path.join(directory, ".gitignore")):
+            rules = rules + [IgnoreRules.from_file(os.path.join(directory, ".gitignore"), rel_dir)]
+
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            # e.g. no permission: skip the directory rather than the whole walk
+            self.skipped_dirs["unreadable"] += 1
+            return
+
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if entry.is_symlink():
+                continue
+            if entry.is_dir():
+                if entry.name in _VCS_DIRS:
+                    continue
+                reason = self._ignored(rules, rel_path, True)
+                if reason:
+                    # Pruned without listing its content
+                    self.skipped_dirs[reason] += 1
+                else:
+                    yield from self._walk(root, rel_path, rules)
+            elif entry.is_file():
+                try:
+                    size = entry.stat().st_size
+                except OSError:  # removed while walking
+                    continue
+                reason = self._ignored(rules, rel_path, False)
+                if reason is None and self.max_size is not None and size > self.max_size:
+                    reason = "too_large"
+                if reason:
+                    self.record(reason, size)
+                else:
+                    yield rel_path
+
+    def filter_paths(self, rel_paths: Iterable[str],
+                     root: Optional[Union[str, Path]] = None) -> Iterator[str]:
+        """
+        Apply the built-in ignore rules to an explicit list of relative paths.
+
+        With the *root* they are relative to, skipped bytes are counted too.
+        """
+        for rel_path in rel_paths:
+            parts = rel_path.split("/")
+            prefixes = ("/".join(parts[:i]) for i in range(1, len(parts)))
+            if (parts[0] in _VCS_DIRS or any(self.ignore.match(p, True) for p in prefixes)
+                    or self.ignore.match(rel_path, False)):
+                self.record("ignored", _size(root, rel_path) if root is not None else 0)
+            else:
+                yield rel_path
+
+    def sniff(self, rel_path: str, head: bytes, size: int) -> Optional[str]:
+        """
+        Classify a file from its first ``SNIFF_SIZE`` bytes.
+
+        Returns the reason to skip it ("too_large", "binary", "minified" or
+        "generated"), or None if it should be analyzed.
+        """
+        if self.max_size is not None and size > self.max_size:
+            return "too_large"
+        head = head[:SNIFF_SIZE]
+        # Same heuristic as git: a NUL byte means binary
+        if b"\0" in head:
+            return "binary"
+        if (os.path.splitext(rel_path)[1] in _MINIFIABLE and len(head) >= 1024
+                and len(head) > _MINIFIED_LINE_LENGTH * (head.count(b"\n") + 1)):
+            return "minified"
+        if self.skip_generated and _GENERATED.search(head, 0, 1024):
+            return "generated"
+        return None
@@ -0,0 +1,15 @@
+import os
+from pathlib import Path
+
+
+def cache_dir(*parts: str) -> Path:
+    """
+    Return (and create) a directory below the shared on-disk cache root.
+
+    The root defaults to ``~/.cache/ai-compliance-mvp`` and can be moved with
+    the ``COMPLIANCE_CACHE_DIR`` environment variable.
+    """
+    root = os.getenv("COMPLIANCE_CACHE_DIR") or Path.home() / ".cache" / "ai-compliance-mvp"
+    path = Path(root).joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
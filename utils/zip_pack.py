@@ -0,0 +1,124 @@
+"""
+Streaming ZIP archives for compliance packs.
+
+Entries are queued and written by a background thread: files are copied
+from disk in chunks and text is encoded chunk by chunk, so no entry is ever
+held in memory whole, and compression (zlib releases the GIL) overlaps with
+whatever the caller does meanwhile. The archive is written to a given path,
+or to a spooled temporary file that moves to disk once it outgrows
+``spool_max``.
+
+Use the pack as a context manager: leaving the block without ``close``
+(e.g. on an exception) aborts it, so neither the writer thread nor the
+archive file is left behind.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Optional, Union
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_SPOOL_MAX = 8 * 1024 * 1024
+
+_DONE = object()
+
+
+class ZipPack:
+    """
+    ZIP archive built in the background.
+
+    Args:
+        path: Write the archive to this file (default: a spooled temporary file)
+        spool_max: Bytes a temporary archive may keep in memory before spilling to disk
+        compresslevel: zlib level of the entries
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None,
+                 spool_max: int = DEFAULT_SPOOL_MAX, compresslevel: int = 6):
+        self.path = Path(path) if path else None
+        self.file: BinaryIO = (
+            open(self.path, "w+b") if self.path else tempfile.SpooledTemporaryFile(max_size=spool_max)
+        )
+        # Bounded: a fast producer waits instead of queueing unbounded text
+        self._queue: queue.Queue = queue.Queue(maxsize=16)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._aborted = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(compresslevel,), daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "ZipPack":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if not self._closed:
+            self.abort()
+
+    def add_file(self, name: str, path: Union[str, Path]) -> None:
+        """Queue the file at *path* as entry *name*"""
+        self._queue.put((name, path, None))
+
+    def add_text(self, name: str, text: str) -> None:
+        """Queue *text* as entry *name* (UTF-8)"""
+        self._queue.put((name, None, (text,)))
+
+    def add_chunks(self, name: str, chunks: Iterable[Union[str, bytes]]) -> None:
+        """Queue entry *name* from an iterable of chunks, consumed by the writer thread"""
+        self._queue.put((name, None, chunks))
+
+    def _run(self, compresslevel: int) -> None:
+        try:
+            with zipfile.ZipFile(self.file, "w", compression=zipfile.ZIP_DEFLATED,
+                                 compresslevel=compresslevel) as archive:
+                while (item := self._queue.get()) is not _DONE:
+                    if self._aborted.is_set():
+                        continue
+                    name, path, chunks = item
+                    if path is not None:
+                        large = os.path.getsize(path) > zipfile.ZIP64_LIMIT
+                        with open(path, "rb") as src, archive.open(name, "w", force_zip64=large) as dst:
+                            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                    else:
+                        with archive.open(name, "w") as dst:
+                            for chunk in chunks:
+                                dst.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        except BaseException as exc:
+            self._error = exc
+            # Keep consuming so that producers never block on a dead writer
+            while self._queue.get() is not _DONE:
+                pass
+
+    def close(self) -> BinaryIO:
+        """
+        Wait for every queued entry and return the archive, rewound.
+
+        Raises:
+            Whatever the writer thread failed with (e.g. a missing file)
+        """
+        self._closed = True
+        self._queue.put(_DONE)
+        self._thread.join()
+        if self._error is not None:
+            self._discard()
+            raise self._error
+        self.file.flush()
+        self.file.seek(0)
+        return self.file
+
+    def abort(self) -> None:
+        """Drop the queued entries, stop the writer thread and delete the archive."""
+        self._closed = True
+        self._aborted.set()
+        self._queue.put(_DONE)
+        self._thread.join()
+        self._discard()
+
+    def _discard(self) -> None:
+        self.file.close()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)